@@ -42,9 +42,84 @@ class Config:
     
     # 爬取配置
     CRAWL_INTERVAL = int(os.environ.get('CRAWL_INTERVAL') or 3600)  # 默认1小时爬取一次
+    CRAWL_SCHEDULER_BACKEND = os.environ.get('CRAWL_SCHEDULER_BACKEND') or ('celery' if os.environ.get('CELERY_BROKER_URL') else 'thread')  # 定时采集执行方式：celery/thread/eager
+    CRAWL_SCHEDULER_TICK = float(os.environ.get('CRAWL_SCHEDULER_TICK') or 30)  # 检查到期采集任务的间隔（秒）
+    CRAWL_SCHEDULER_WORKERS = int(os.environ.get('CRAWL_SCHEDULER_WORKERS') or 2)  # 进程内同时运行的采集任务数
+    CRAWL_SCHEDULER_AUTOSTART = os.environ.get('CRAWL_SCHEDULER_AUTOSTART', 'true').lower() in ['true', '1', 'yes']  # 通过run.py启动时是否同时启动调度线程
+    
+    # 后台作业配置
+    JOB_BACKEND = os.environ.get('JOB_BACKEND') or ('celery' if os.environ.get('CELERY_BROKER_URL') else 'thread')  # 后台作业执行方式：celery/thread/eager，消息队列无法连接时改为thread
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)  # 进程内同时运行的后台作业数
+    JOB_PROGRESS_INTERVAL = float(os.environ.get('JOB_PROGRESS_INTERVAL') or 1)  # 作业进度写入数据库和检查取消请求的间隔（秒）
     MAX_CRAWL_RESULTS = int(os.environ.get('MAX_CRAWL_RESULTS') or 100)  # 每次爬取最大结果数
     CRAWL_TIMEOUT = int(os.environ.get('CRAWL_TIMEOUT') or 30)  # 爬取超时时间
     CRAWL_RETRY_TIMES = int(os.environ.get('CRAWL_RETRY_TIMES') or 3)  # 爬取重试次数
+    CRAWL_CONNECT_TIMEOUT = float(os.environ.get('CRAWL_CONNECT_TIMEOUT') or 5)  # 连接超时时间，CRAWL_TIMEOUT作为读取超时
+    CRAWL_RETRY_BACKOFF = float(os.environ.get('CRAWL_RETRY_BACKOFF') or 0.5)  # 重试退避基数（秒），按指数增长并加随机抖动
+    CRAWL_RETRY_BACKOFF_MAX = float(os.environ.get('CRAWL_RETRY_BACKOFF_MAX') or 30)  # 单次退避最长等待时间
+    CRAWL_RETRY_AFTER_MAX = float(os.environ.get('CRAWL_RETRY_AFTER_MAX') or 60)  # 遵循Retry-After的最长等待时间，超过则放弃重试
+    CRAWL_RETRY_STATUSES = os.environ.get('CRAWL_RETRY_STATUSES') or '429,500,502,503,504'  # 需要重试的状态码
+    
+    # HTTP连接池配置
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS') or 10)  # 每个会话缓存的连接池数量
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE') or 20)  # 每个主机保持的最大连接数
+    HTTP_POOL_BLOCK = (os.environ.get('HTTP_POOL_BLOCK') or 'false').lower() in ['true', '1', 'yes']  # 连接耗尽时是否阻塞等待
+    
+    # 异步采集引擎配置
+    CRAWL_MAX_CONCURRENCY = int(os.environ.get('CRAWL_MAX_CONCURRENCY') or 200)  # 全局最大在途请求数
+    CRAWL_PER_HOST_CONCURRENCY = int(os.environ.get('CRAWL_PER_HOST_CONCURRENCY') or 20)  # 单个主机最大连接数
+    CRAWL_BATCH_WORKERS = int(os.environ.get('CRAWL_BATCH_WORKERS') or 16)  # 多关键词批量采集的并发请求数
+    HTML_PARSER_BACKEND = os.environ.get('HTML_PARSER_BACKEND') or 'lxml'  # 搜索结果解析后端：lxml或bs4
+    FETCH_TIMING_HEADER = os.environ.get('FETCH_TIMING_HEADER', 'false').lower() in ['true', '1', 'yes']  # 是否在响应中返回抓取耗时的Server-Timing头，管理员也可用X-Fetch-Timing: 1请求头单次开启
+    FETCH_TIMING_SAMPLES = int(os.environ.get('FETCH_TIMING_SAMPLES') or 500)  # 保留最近多少次抓取的耗时明细
+    ENCODING_SAMPLE_BYTES = int(os.environ.get('ENCODING_SAMPLE_BYTES') or 32768)  # 页面未声明字符集时统计检测的样本长度
+    LIST_PAGE_CACHE_TTL = float(os.environ.get('LIST_PAGE_CACHE_TTL') or 60)  # 列表页解析结果的内存缓存时间（秒）
+    SPIDER_DEFINITIONS = os.environ.get('SPIDER_DEFINITIONS') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'spiders.json')  # 声明式列表页爬虫定义文件
+    
+    # 跳转链接解析配置
+    REDIRECT_RESOLVE_PREFIXES = os.environ.get('REDIRECT_RESOLVE_PREFIXES') or 'www.baidu.com/link,baidu.com/link'  # 入库前解析为真实地址的跳转链接前缀
+    REDIRECT_RESOLVE_WORKERS = int(os.environ.get('REDIRECT_RESOLVE_WORKERS') or 16)  # 同时在途的解析请求数
+    REDIRECT_RESOLVE_TIMEOUT = float(os.environ.get('REDIRECT_RESOLVE_TIMEOUT') or 10)  # 单次解析请求超时时间（秒）
+    REDIRECT_MEMORY_SIZE = int(os.environ.get('REDIRECT_MEMORY_SIZE') or 10000)  # 进程内缓存的解析结果数量
+    
+    # 页面条件请求缓存配置
+    HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR') or os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'cache', 'http')
+    HTTP_CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES') or 268435456)  # 256MB，超出后按最近最少使用淘汰
+    
+    # HTTP录制回放配置
+    HTTP_ARCHIVE_MODE = os.environ.get('HTTP_ARCHIVE_MODE') or 'off'  # off不启用，record把每次抓取写入归档，replay只从归档读取不访问网络
+    HTTP_ARCHIVE_PATH = os.environ.get('HTTP_ARCHIVE_PATH') or os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'cache', 'http_archive.jsonl.gz')
+    
+    # 封面缩略图缓存配置
+    THUMBNAIL_DIR = os.environ.get('THUMBNAIL_DIR') or os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'cache', 'thumbnails')
+    THUMBNAIL_SIZE = os.environ.get('THUMBNAIL_SIZE') or '160x120'  # 缩略图最大宽高
+    THUMBNAIL_MAX_BYTES = int(os.environ.get('THUMBNAIL_MAX_BYTES') or 134217728)  # 128MB，超出后按最近最少使用淘汰
+    THUMBNAIL_MAX_AGE_DAYS = int(os.environ.get('THUMBNAIL_MAX_AGE_DAYS') or 30)  # 缩略图保存天数
+    THUMBNAIL_MAX_IMAGE_BYTES = int(os.environ.get('THUMBNAIL_MAX_IMAGE_BYTES') or 5242880)  # 原图大小上限
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS') or 8)  # 同时下载的封面数量
+    
+    # 详情页下载限制
+    DETAIL_MAX_BYTES = int(os.environ.get('DETAIL_MAX_BYTES') or 5242880)  # 5MB，超出部分不再读取
+    DETAIL_CONTENT_TYPES = os.environ.get('DETAIL_CONTENT_TYPES') or 'text/html,application/xhtml+xml'  # 允许下载的内容类型
+    DETAIL_WORKERS = int(os.environ.get('DETAIL_WORKERS') or 32)  # 批量深度采集同时抓取和提取的页面数
+    DETAIL_WRITE_BATCH = int(os.environ.get('DETAIL_WRITE_BATCH') or 100)  # 深度采集结果每批写库并提交的数量
+    XPATH_CACHE_RULES = int(os.environ.get('XPATH_CACHE_RULES') or 1024)  # 缓存编译后XPath的采集规则数量
+    RAW_HTML_COMPRESSION = os.environ.get('RAW_HTML_COMPRESSION') or 'zstd'  # 详细内容原始HTML的压缩格式，zstd或zlib，未安装zstandard时使用zlib
+    RAW_HTML_COMPRESSION_LEVEL = os.environ.get('RAW_HTML_COMPRESSION_LEVEL')  # 压缩级别，为空时zstd使用9，zlib使用6
+    
+    # 深度采集队列配置
+    FRONTIER_BATCH_SIZE = int(os.environ.get('FRONTIER_BATCH_SIZE') or 50)  # 工作进程每批领取的URL数量
+    FRONTIER_LEASE_SECONDS = int(os.environ.get('FRONTIER_LEASE_SECONDS') or 300)  # 领取后的租约时长，进程中断后到期即可被重新领取
+    FRONTIER_MAX_ATTEMPTS = int(os.environ.get('FRONTIER_MAX_ATTEMPTS') or 5)  # 最大尝试次数
+    FRONTIER_RETRY_BASE = float(os.environ.get('FRONTIER_RETRY_BASE') or 60)  # 失败后首次重试的等待时间（秒），之后每次加倍
+    FRONTIER_RETRY_MAX = float(os.environ.get('FRONTIER_RETRY_MAX') or 3600)  # 重试等待时间上限（秒）
+    FRONTIER_POLL_INTERVAL = float(os.environ.get('FRONTIER_POLL_INTERVAL') or 5)  # 队列为空时工作进程的等待间隔（秒）
+    
+    # 按主机限流配置，可在采集规则中按站点覆盖
+    CRAWL_HOST_RPS = float(os.environ.get('CRAWL_HOST_RPS') or 5.0)  # 单个主机每秒请求数，0表示不限速
+    CRAWL_HOST_MAX_IN_FLIGHT = int(os.environ.get('CRAWL_HOST_MAX_IN_FLIGHT') or 10)  # 单个主机最大在途请求数
+    CRAWL_HOST_BURST = int(os.environ.get('CRAWL_HOST_BURST') or 10)  # 令牌桶容量，空闲后允许的瞬时请求数
+    CRAWL_LIMIT_RELOAD_SECONDS = int(os.environ.get('CRAWL_LIMIT_RELOAD_SECONDS') or 60)  # 规则限额覆盖的重新加载间隔
     
     # 安全配置
     CSRF_ENABLED = True
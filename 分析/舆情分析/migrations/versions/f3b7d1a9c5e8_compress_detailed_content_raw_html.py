@@ -0,0 +1,133 @@
+"""Compress detailed content raw html
+
+Revision ID: f3b7d1a9c5e8
+Revises: e5a9c1d7b3f2
+Create Date: 2026-10-19 09:41:27.306514
+
+"""
+import os
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+try:
+    import zstandard
+except ImportError:  # 未安装zstandard时使用zlib压缩
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d1a9c5e8'
+down_revision = 'e5a9c1d7b3f2'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+RAW_HTML_BINARY = sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql')
+
+# 迁移固定在编写时的压缩格式和分批逻辑，不引用应用代码，应用代码以后的改动不影响这次迁移
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+DEFAULT_LEVELS = {'zstd': 9, 'zlib': 6}
+
+SELECT_BATCH = sa.text(
+    'SELECT id, raw_html FROM detailed_content WHERE id > :last_id AND raw_html IS NOT NULL ORDER BY id LIMIT :limit'
+)
+UPDATE = sa.text('UPDATE detailed_content SET raw_html = :raw_html WHERE id = :row_id')
+
+
+def stored_bytes(value):
+    """数据库驱动返回的原始值统一为bytes，压缩之前写入的行可能是str"""
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return bytes(value)
+
+
+def codec_of(data):
+    """按数据头部识别压缩格式，未压缩时返回None"""
+    if data[:4] == ZSTD_MAGIC:
+        return 'zstd'
+    if len(data) >= 2 and data[0] == 0x78 and ((data[0] << 8) | data[1]) % 31 == 0:
+        return 'zlib'
+    return None
+
+
+def compress(data, codec, level):
+    """按压缩格式压缩UTF-8字节"""
+    level = DEFAULT_LEVELS[codec] if level is None else int(level)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def decompress(data):
+    """解压为UTF-8字节，未压缩的数据原样返回"""
+    codec = codec_of(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('数据为zstd压缩格式，需要安装zstandard')
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            # 恰好以类似zlib头部开头的未压缩文本
+            pass
+    return data
+
+
+def iter_batches(bind):
+    """按主键分批读取原始HTML列，每批只在内存中保留这一批页面"""
+    last_id = 0
+    while True:
+        rows = bind.execute(SELECT_BATCH, {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        yield [(row[0], row[1]) for row in rows]
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('detailed_content', schema=None) as batch_op:
+        batch_op.alter_column('raw_html',
+               existing_type=sa.Text(),
+               type_=RAW_HTML_BINARY,
+               existing_nullable=True,
+               postgresql_using="convert_to(raw_html, 'UTF8')")
+
+    # 已有的原始HTML按批压缩，压缩格式与应用配置读取同样的环境变量，未安装zstandard时使用zlib
+    codec = os.environ.get('RAW_HTML_COMPRESSION') or 'zstd'
+    if codec not in DEFAULT_LEVELS:
+        raise ValueError(f'不支持的压缩格式：{codec}')
+    if codec == 'zstd' and zstandard is None:
+        codec = 'zlib'
+    level = os.environ.get('RAW_HTML_COMPRESSION_LEVEL') or None
+    bind = op.get_bind()
+    for batch in iter_batches(bind):
+        rows = []
+        for row_id, value in batch:
+            data = stored_bytes(value)
+            if codec_of(data) is None:
+                rows.append({'row_id': row_id, 'raw_html': compress(data, codec, level)})
+        if rows:
+            bind.execute(UPDATE, rows)
+
+
+def downgrade():
+    # 先按批解压回UTF-8文本，再改回文本列；SQLite的列类型只是声明，写回str才能按文本读取
+    bind = op.get_bind()
+    for batch in iter_batches(bind):
+        rows = []
+        for row_id, value in batch:
+            html = decompress(stored_bytes(value)).decode('utf-8', errors='replace')
+            rows.append({'row_id': row_id, 'raw_html': html if bind.dialect.name == 'sqlite' else html.encode('utf-8')})
+        bind.execute(UPDATE, rows)
+
+    with op.batch_alter_table('detailed_content', schema=None) as batch_op:
+        batch_op.alter_column('raw_html',
+               existing_type=RAW_HTML_BINARY,
+               type_=sa.Text(),
+               existing_nullable=True,
+               postgresql_using="convert_from(raw_html, 'UTF8')")
@@ -1,2 +1,2 @@
 # Models package
-from .models import User, Topic, Keyword, TopicKeyword, Role, Setting, CollectionTemp, DataWarehouse, CollectionRule, DetailedContent, AiEngine
+from .models import User, Topic, Keyword, TopicKeyword, Role, Setting, CollectionTemp, DataWarehouse, CollectionRule, RedirectCache, CrawlFrontier, CrawlTask, CrawlRun, CrawlJob, DetailedContent, AiEngine
@@ -2,6 +2,7 @@
 from __init__ import db
 from flask_login import UserMixin
 from datetime import datetime
+from .types import CompressedText
 
 class Role(db.Model):
     __tablename__ = 'roles'
@@ -148,6 +149,8 @@ class CollectionRule(db.Model):
     title_xpath = db.Column(db.String(255), nullable=False)
     content_xpath = db.Column(db.String(255), nullable=False)
     request_headers = db.Column(db.Text)  # 存储为JSON字符串
+    rate_limit_rps = db.Column(db.Float)  # 该站点每秒请求数上限，为空时使用全局配置
+    max_concurrency = db.Column(db.Integer)  # 该站点最大在途请求数，为空时使用全局配置
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))  # 关联用户
@@ -157,6 +160,111 @@ class CollectionRule(db.Model):
     def __repr__(self):
         return '<CollectionRule {}>'.format(self.site_name)
 
+class RedirectCache(db.Model):
+    """跳转链接解析缓存模型"""
+    __tablename__ = 'redirect_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source_hash = db.Column(db.String(40), unique=True, nullable=False)  # 跳转链接的SHA1，用于索引
+    source_url = db.Column(db.Text, nullable=False)  # 跳转链接
+    target_url = db.Column(db.String(1024), nullable=False)  # 解析得到的真实地址
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)  # 解析时间
+    
+    def __repr__(self):
+        return '<RedirectCache {}>'.format(self.target_url)
+
+class CrawlFrontier(db.Model):
+    """深度采集待抓取队列模型"""
+    __tablename__ = 'crawl_frontier'
+    __table_args__ = (
+        db.Index('ix_crawl_frontier_status_next', 'status', 'next_eligible_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(1024), nullable=False)
+    url_hash = db.Column(db.String(40), unique=True, nullable=False)  # URL的SHA1，入队去重
+    host = db.Column(db.String(255), index=True)  # 主机名，出队时按主机轮转
+    priority = db.Column(db.Integer, default=0)  # 优先级，数值大的先抓取
+    warehouse_id = db.Column(db.Integer, db.ForeignKey('data_warehouse.id'))  # 关联的数据仓库记录
+    status = db.Column(db.String(16), default='pending')  # pending/running/done/failed
+    attempts = db.Column(db.Integer, default=0)  # 已尝试次数
+    next_eligible_at = db.Column(db.DateTime, default=datetime.utcnow)  # 最早可抓取时间
+    lease_owner = db.Column(db.String(32))  # 领取该URL的工作进程
+    leased_until = db.Column(db.DateTime)  # 租约到期时间，进程中断后到期即可被重新领取
+    last_error = db.Column(db.Text)  # 最近一次失败原因
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return '<CrawlFrontier {} {}>'.format(self.status, self.url)
+
+class CrawlTask(db.Model):
+    """定时采集任务模型"""
+    __tablename__ = 'crawl_tasks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    spider = db.Column(db.String(50), nullable=False)  # 爬虫名称，对应爬虫注册表
+    keyword = db.Column(db.String(200))  # 搜索关键词，按来源采集的列表页爬虫可为空
+    pages = db.Column(db.Integer, default=1)  # 每次最多采集的页数
+    max_results = db.Column(db.Integer)  # 每次最多采集的结果数，为空时使用MAX_CRAWL_RESULTS
+    interval = db.Column(db.Integer)  # 采集间隔（秒），为空时使用CRAWL_INTERVAL
+    incremental = db.Column(db.Boolean, default=True)  # 只收录新数据，遇到没有新数据的页即停止翻页
+    enabled = db.Column(db.Boolean, default=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # 采集结果归属的用户
+    next_run_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # 下次运行时间
+    last_run_at = db.Column(db.DateTime)  # 上次运行时间
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    runs = db.relationship('CrawlRun', backref='task', lazy='dynamic', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return '<CrawlTask {}>'.format(self.name)
+
+class CrawlRun(db.Model):
+    """定时采集运行记录模型"""
+    __tablename__ = 'crawl_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('crawl_tasks.id'), nullable=False, index=True)
+    trigger = db.Column(db.String(16), default='schedule')  # schedule/manual
+    status = db.Column(db.String(16), default='running')  # running/success/failed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)  # 运行耗时（毫秒）
+    pages = db.Column(db.Integer, default=0)  # 抓取的页数
+    fetched = db.Column(db.Integer, default=0)  # 抓取到的结果数
+    saved = db.Column(db.Integer, default=0)  # 新收录的结果数
+    duplicates = db.Column(db.Integer, default=0)  # 已采集过的结果数
+    filtered = db.Column(db.Integer, default=0)  # 过滤的脏数据数
+    error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return '<CrawlRun {} {}>'.format(self.task_id, self.status)
+
+class CrawlJob(db.Model):
+    """后台作业模型"""
+    __tablename__ = 'crawl_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)  # 作业类型，如detail
+    status = db.Column(db.String(16), default='pending', index=True)  # pending/running/success/failed/cancelled
+    params = db.Column(db.Text)  # 作业参数，JSON字符串
+    total = db.Column(db.Integer, default=0)  # 需要处理的条数
+    done = db.Column(db.Integer, default=0)  # 处理成功的条数
+    failed = db.Column(db.Integer, default=0)  # 处理失败的条数
+    cancel_requested = db.Column(db.Boolean, default=False)  # 是否已请求取消，作业在处理下一批前检查
+    message = db.Column(db.Text)  # 结果说明或失败原因
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return '<CrawlJob {} {}>'.format(self.kind, self.status)
+
 class DetailedContent(db.Model):
     """详细采集内容模型"""
     __tablename__ = 'detailed_content'
@@ -165,7 +273,8 @@ class DetailedContent(db.Model):
     warehouse_id = db.Column(db.Integer, db.ForeignKey('data_warehouse.id'), nullable=False, unique=True)
     detailed_title = db.Column(db.String(512))  # 详细标题
     detailed_content = db.Column(db.Text)  # 详细内容
-    raw_html = db.Column(db.Text)  # 原始HTML
+    # 原始HTML，压缩保存且延迟加载，只在访问该属性时读取和解压
+    raw_html = db.deferred(db.Column(CompressedText))
     collected_at = db.Column(db.DateTime, default=datetime.utcnow)  # 采集时间
     is_collected = db.Column(db.Boolean, default=True)  # 是否成功采集
     collection_error = db.Column(db.Text)  # 采集错误信息
@@ -0,0 +1,34 @@
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from utils.compression import compress_text, decompress_text
+from utils.config_helper import get_config_value
+
+
+class CompressedText(TypeDecorator):
+    """
+    压缩保存的长文本
+
+    模型属性上仍是str，写入时按RAW_HTML_COMPRESSION配置以zstd或zlib压缩为二进制，读取时按数据头部
+    识别压缩格式解压，压缩之前写入的未压缩文本原样返回，更换压缩格式后新旧数据可以共存。
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        # MySQL的BLOB上限为64KB，详情页需要LONGBLOB
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, get_config_value('RAW_HTML_COMPRESSION', 'zstd'),
+                             get_config_value('RAW_HTML_COMPRESSION_LEVEL') or None)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
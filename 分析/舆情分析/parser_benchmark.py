@@ -0,0 +1,98 @@
+"""
+解析后端性能对比
+
+对保存下来的百度搜索结果页，分别用各个解析后端解析多次，输出每页平均耗时，并检查各后端的解析结果是否一致；
+新华网列表页由爬虫注册表中的声明式定义解析，分别测试传入文本和传入字节两种方式。
+
+用法：
+    python parser_benchmark.py                          # 使用默认的新华网列表页
+    python parser_benchmark.py --baidu baidu_page.html  # 同时测试保存的百度搜索结果页
+    python parser_benchmark.py --save-baidu 宜宾         # 抓取一页百度搜索结果保存为baidu_page.html
+"""
+import argparse
+import os
+import time
+
+from services.parsers import PARSER_BACKENDS, get_parser_backend
+from services.spider import XinhuaSpider
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+XINHUA_BASE_URL = "http://sc.news.cn/scyw.htm"
+
+
+def save_baidu_page(keyword, path):
+    """抓取一页百度搜索结果并保存，供后续反复测试"""
+    from services.spider import BaiduSpider
+    from services.http_client import get_http_pool
+
+    spider = BaiduSpider()
+    response = get_http_pool().get(spider.build_url(keyword), headers=spider.headers, cookies=spider.cookies)
+    response.encoding = 'utf-8'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(response.text)
+    print(f"已保存百度搜索结果页：{path}（状态码 {response.status_code}）")
+
+
+def benchmark(label, html, parsers, rounds):
+    """
+    逐一解析并输出每页平均耗时，再以第一个解析函数的结果为基准检查其他结果是否一致
+
+    Args:
+        label (str): 页面名称
+        html (str): 页面HTML
+        parsers (dict): {名称: 解析函数}，解析函数的参数为页面HTML
+        rounds (int): 解析次数
+    """
+    print(f"\n{label}（{len(html)} 字符，{rounds} 轮）")
+    outputs = {}
+    for name, parse in parsers.items():
+        outputs[name] = parse(html)  # 预热
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parse(html)
+        per_page = (time.perf_counter() - start) / rounds * 1000
+        print(f"  {name:<8} {per_page:8.3f} ms/页  结果 {len(outputs[name])} 条")
+
+    baseline_name = next(iter(outputs))
+    baseline = outputs.pop(baseline_name)
+    for name, output in outputs.items():
+        print(f"  {name} 与 {baseline_name} 结果{'一致' if output == baseline else '不一致'}")
+
+
+def backend_parsers(parse_with):
+    """各解析后端的{名称: 解析函数}，bs4排在最前作为对比基准"""
+    names = sorted(PARSER_BACKENDS, key=lambda name: name != 'bs4')
+    return {name: (lambda page, backend=get_parser_backend(name): parse_with(backend, page)) for name in names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析后端性能对比')
+    parser.add_argument('--baidu', help='保存的百度搜索结果页路径')
+    parser.add_argument('--xinhua', default=os.path.join(BASE_DIR, 'xinhua_page.html'), help='保存的新华网列表页路径')
+    parser.add_argument('--rounds', type=int, default=200, help='每个后端的解析次数')
+    parser.add_argument('--save-baidu', metavar='KEYWORD', help='抓取并保存一页百度搜索结果')
+    args = parser.parse_args()
+
+    if args.save_baidu:
+        args.baidu = args.baidu or os.path.join(BASE_DIR, 'baidu_page.html')
+        save_baidu_page(args.save_baidu, args.baidu)
+
+    if args.baidu:
+        with open(args.baidu, 'r', encoding='utf-8') as f:
+            benchmark('百度搜索结果页', f.read(), backend_parsers(lambda backend, html: backend.parse_baidu(html)),
+                      args.rounds)
+
+    if args.xinhua and os.path.exists(args.xinhua):
+        with open(args.xinhua, 'r', encoding='utf-8') as f:
+            # 新华网列表页只由爬虫注册表中的声明式定义解析，对比传入文本和按字符集直接解析字节
+            spider = XinhuaSpider()
+            html = f.read()
+            content = html.encode('utf-8')
+            benchmark('新华网列表页', html, {
+                'text': lambda page: spider.parse_results(page, base_url=XINHUA_BASE_URL),
+                'bytes': lambda page: spider.parse_results(content, 'utf-8', XINHUA_BASE_URL),
+            }, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+采集流水线离线基准测试
+
+在内存数据库中完整执行一次“采集 -> 批量保存到数据仓库 -> 批量详细内容采集”流程，输出各阶段耗时
+和按用途汇总的抓取耗时分解。先用 --record 联网运行一次，把所有抓取写入HTTP归档，之后用 --replay
+从归档回放，不访问网络，每次运行面对完全相同的页面，便于对比优化前后的耗时和做性能剖析。
+
+详细内容采集需要采集规则，默认从开发数据库复制，也可用 --rules 指定JSON文件
+（[{"site_name": ..., "site_url": ..., "title_xpath": ..., "content_xpath": ...}, ...]）。
+
+用法：
+    python pipeline_benchmark.py --record bench.jsonl.gz --keyword 宜宾 --pages 3   # 联网运行并录制
+    python pipeline_benchmark.py --replay bench.jsonl.gz --keyword 宜宾 --pages 3   # 离线回放
+    python pipeline_benchmark.py --replay bench.jsonl.gz --rounds 5 --profile out.prof
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import tempfile
+import time
+
+from config import config
+from services.http_archive import HttpArchive, set_http_archive
+
+
+def load_rules(path):
+    """读取采集规则，未指定文件时从开发数据库复制"""
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(config['development'].SQLALCHEMY_DATABASE_URI)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                'SELECT site_name, site_url, title_xpath, content_xpath, request_headers FROM collection_rules'
+            )).mappings().all()
+        return [dict(row) for row in rows]
+    except Exception as e:
+        print(f"未能从开发数据库读取采集规则（{e}），详细内容采集将全部失败")
+        return []
+    finally:
+        engine.dispose()
+
+
+def create_benchmark_app(workdir):
+    """创建使用内存数据库的应用，页面缓存和缩略图写入临时目录，后台作业在请求中直接执行"""
+    from __init__ import create_app
+
+    app = create_app('testing')
+    app.config.update(
+        WTF_CSRF_ENABLED=False,
+        HTTP_CACHE_DIR=os.path.join(workdir, 'http'),
+        THUMBNAIL_DIR=os.path.join(workdir, 'thumbnails'),
+        JOB_BACKEND='eager'
+    )
+    return app
+
+
+def reset_state(db, rules):
+    """重建数据库并清空进程内缓存，保证每一轮从相同的初始状态开始"""
+    import services.redirect_resolver
+    import services.spider
+    from models import CollectionRule, Role, User
+    from services.fetch_timing import get_fetch_metrics
+    from services.http_cache import get_http_cache
+    from services.rule_index import bump_rule_version
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    db.session.add(Role(id=1, name='admin'))
+    db.session.add(Role(id=2, name='user'))
+    db.session.add(User(username='benchmark', password='benchmark', role_id=1))
+    for rule in rules:
+        db.session.add(CollectionRule(
+            site_name=rule['site_name'], site_url=rule['site_url'], title_xpath=rule['title_xpath'],
+            content_xpath=rule['content_xpath'], request_headers=rule.get('request_headers') or '{}'
+        ))
+    # 重建后的规则ID可能与上一轮相同，更新版本戳使进程内的规则索引重新载入
+    bump_rule_version()
+    db.session.commit()
+
+    services.spider._list_cache = None
+    services.redirect_resolver._resolver = None
+    get_http_cache().clear()
+    get_fetch_metrics().reset()
+
+
+def post(client, path, data):
+    response = client.post(path, data=data)
+    payload = response.get_json(silent=True) or {}
+    if response.status_code != 200 or payload.get('code') != 0:
+        raise RuntimeError(f"{path} 失败：{payload.get('msg') or response.status_code}")
+    return payload
+
+
+def query_ids(app, model):
+    with app.app_context():
+        return [str(row[0]) for row in model.query.with_entities(model.id)]
+
+
+def run_pipeline(app, args):
+    """
+    执行一次完整流程，返回各阶段耗时（毫秒）和各阶段的处理条数
+
+    各个请求在自己的应用上下文中处理，不能在外层保持应用上下文，否则登录用户等状态会跨轮次残留。
+    """
+    from models import CollectionTemp, DataWarehouse
+
+    timings = {}
+    counts = {}
+    client = app.test_client()
+    client.post('/login', data={'username': 'benchmark', 'password': 'benchmark'})
+
+    started = time.perf_counter()
+    post(client, '/data/collection', {'spider_type': args.spider, 'keyword': args.keyword,
+                                      'page': 1, 'page_end': args.pages})
+    timings['collect'] = (time.perf_counter() - started) * 1000
+    collection_ids = query_ids(app, CollectionTemp)
+    counts['collect'] = len(collection_ids)
+
+    started = time.perf_counter()
+    if collection_ids:
+        post(client, '/data/warehouse/batch-save', {'collection_ids[]': collection_ids})
+    timings['warehouse'] = (time.perf_counter() - started) * 1000
+    warehouse_ids = query_ids(app, DataWarehouse)
+    counts['warehouse'] = len(warehouse_ids)
+
+    started = time.perf_counter()
+    if warehouse_ids:
+        payload = post(client, '/data/warehouse/batch-detailed-collect', {'ids[]': warehouse_ids})
+        counts['detail'] = payload['data']['message']
+    timings['detail'] = (time.perf_counter() - started) * 1000
+    return timings, counts
+
+
+def print_fetch_summary():
+    """按用途输出抓取次数、字节数和各阶段平均耗时"""
+    from services.fetch_timing import get_fetch_metrics
+
+    labels = get_fetch_metrics().stats(recent=0)['labels']
+    for label, stats in sorted(labels.items()):
+        phases = ' '.join(f'{phase}={ms:.1f}' for phase, ms in stats['avg_phases_ms'].items())
+        print(f"    {label:<16} {stats['count']:>5} 次  {stats['bytes']:>10} 字节  失败 {stats['errors']:>3}  "
+              f"平均 {stats['avg_total_ms']:.1f}ms  p95 {stats['p95_total_ms']:.1f}ms  [{phases}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='采集流水线离线基准测试')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--record', metavar='PATH', help='联网运行并把所有抓取写入该归档')
+    mode.add_argument('--replay', metavar='PATH', help='从该归档回放，不访问网络')
+    parser.add_argument('--spider', default='baidu', help='爬虫类型，默认baidu')
+    parser.add_argument('--keyword', default='宜宾', help='搜索关键词')
+    parser.add_argument('--pages', type=int, default=1, help='采集页数')
+    parser.add_argument('--rounds', type=int, default=1, help='运行轮数，录制时固定为1轮')
+    parser.add_argument('--rules', help='采集规则JSON文件，默认从开发数据库复制')
+    parser.add_argument('--profile', metavar='PATH', help='用cProfile剖析并把结果保存到该文件')
+    args = parser.parse_args()
+
+    if args.record:
+        # 追加写入的归档中同一请求以最后一次为准，重新录制时先清空
+        if os.path.exists(args.record):
+            os.remove(args.record)
+        archive = set_http_archive(HttpArchive(args.record, 'record'))
+        rounds = 1
+    else:
+        archive = set_http_archive(HttpArchive(args.replay, 'replay'))
+        rounds = args.rounds
+
+    rules = load_rules(args.rules)
+    from __init__ import db
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_benchmark_app(workdir)
+        profiler = cProfile.Profile() if args.profile else None
+        totals = {}
+        for index in range(rounds):
+            with app.app_context():
+                reset_state(db, rules)
+            if profiler is not None:
+                profiler.enable()
+            timings, counts = run_pipeline(app, args)
+            if profiler is not None:
+                profiler.disable()
+            for stage, ms in timings.items():
+                totals.setdefault(stage, []).append(ms)
+            print(f"第{index + 1}轮：" + '  '.join(f'{stage} {ms:.1f}ms' for stage, ms in timings.items())
+                  + f"  （采集{counts['collect']}条，入库{counts['warehouse']}条，{counts.get('detail', '未执行详细采集')}）")
+            print_fetch_summary()
+
+        print(f"\n{archive.mode}模式，{rounds}轮平均：")
+        for stage, values in totals.items():
+            print(f"    {stage:<10} {sum(values) / len(values):.1f}ms（最快 {min(values):.1f}ms）")
+        print(f"    归档：{archive.stats()}")
+
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+            print(f"\n性能剖析已保存：{args.profile}，累计耗时前20项：")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
 from __init__ import create_app, db
 from models.models import User, Role
+from services.scheduler import get_scheduler, run_crawl_task
+from services.jobs import get_job_runner
 import os
 import logging
+import click
+import time
 
 # 从环境变量获取配置名称，默认使用开发环境
 config_name = os.getenv('FLASK_CONFIG', 'development')
@@ -9,6 +13,11 @@ config_name = os.getenv('FLASK_CONFIG', 'development')
 # 创建应用实例
 app = create_app(config_name=config_name)
 
+# 配置了消息队列时供celery命令加载：celery -A run.celery worker -B
+# 作业执行器需要在加载时创建，worker进程才会注册后台作业任务
+job_runner = get_job_runner(app)
+celery = get_scheduler(app).celery or job_runner.celery
+
 # 命令行上下文处理器
 @app.shell_context_processor
 def make_shell_context():
@@ -68,6 +77,128 @@ def initdb():
             logging.info("管理员用户已存在")
             print("管理员用户已存在")
 
+# 深度采集队列
+@app.cli.group()
+def frontier():
+    """深度采集队列管理"""
+
+
+@frontier.command('enqueue')
+@click.option('--all', 'include_collected', is_flag=True, help='包含已有详细内容的数据')
+@click.option('--priority', default=0, help='优先级，数值大的先抓取')
+@click.option('--requeue', is_flag=True, help='已完成或已失败的URL重新入队')
+def frontier_enqueue(include_collected, priority, requeue):
+    """将数据仓库中的数据加入深度采集队列"""
+    from services.frontier import get_frontier
+    added = get_frontier().enqueue_warehouse(include_collected=include_collected, priority=priority,
+                                             requeue=requeue)
+    db.session.commit()
+    print(f'已入队{added}条')
+
+
+@frontier.command('work')
+@click.option('--batch-size', default=None, type=int, help='每批领取的URL数量')
+@click.option('--drain', is_flag=True, help='队列中没有到期的URL时退出')
+def frontier_work(batch_size, drain):
+    """启动深度采集工作进程，中断后重新启动即可从中断处继续"""
+    from services.frontier import FrontierWorker
+    worker = FrontierWorker(
+        batch_size=batch_size or app.config['FRONTIER_BATCH_SIZE'],
+        poll_interval=app.config['FRONTIER_POLL_INTERVAL']
+    )
+    logging.info(f"深度采集工作进程{worker.owner}启动")
+    try:
+        total = worker.run(drain=drain)
+    except KeyboardInterrupt:
+        # 未完成的记录在租约到期后由其他工作进程重新领取
+        total = None
+    print(f'深度采集工作进程已退出，处理{total}条' if total is not None else '深度采集工作进程已中断')
+
+
+@frontier.command('stats')
+def frontier_stats():
+    """查看深度采集队列状态"""
+    from services.frontier import get_frontier
+    for key, value in get_frontier().stats().items():
+        print(f'{key}: {value}')
+
+# 原始HTML压缩
+@app.cli.group('raw-html')
+def raw_html():
+    """详细内容原始HTML的压缩存储"""
+
+
+@raw_html.command('stats')
+@click.option('--batch-size', default=500, help='每批读取的行数')
+def raw_html_stats(batch_size):
+    """统计原始HTML的压缩率"""
+    from services.raw_html import compression_stats
+    stats = compression_stats(db.session, batch_size)
+    codecs = '，'.join(f'{codec} {count}行' for codec, count in stats['codecs'].items())
+    print(f"共{stats['rows']}行（{codecs}）")
+    print(f"原始大小{stats['original_bytes']}字节，保存大小{stats['stored_bytes']}字节，"
+          f"压缩率{stats['ratio'] if stats['ratio'] is not None else '-'}倍，节省{stats['saved_bytes']}字节")
+
+
+@raw_html.command('compress')
+@click.option('--batch-size', default=500, help='每批压缩并提交的行数')
+@click.option('--recompress', is_flag=True, help='已用其他格式压缩的行按当前配置重新压缩')
+def raw_html_compress(batch_size, recompress):
+    """按当前配置压缩尚未压缩的原始HTML，每批提交一次，中断后重新运行即可继续"""
+    from services.raw_html import compress_rows
+    scanned = rewritten = before = after = 0
+    for batch in compress_rows(db.session, batch_size, app.config['RAW_HTML_COMPRESSION'],
+                               app.config['RAW_HTML_COMPRESSION_LEVEL'] or None, recompress=recompress):
+        db.session.commit()
+        scanned += batch['scanned']
+        rewritten += batch['rewritten']
+        before += batch['before_bytes']
+        after += batch['after_bytes']
+    print(f'扫描{scanned}行，压缩{rewritten}行，{before}字节 -> {after}字节')
+
+# 定时采集
+@app.cli.group()
+def scheduler():
+    """定时采集调度"""
+
+
+@scheduler.command('run')
+def scheduler_run():
+    """在前台持续调度到期的采集任务"""
+    crawl_scheduler = get_scheduler(app)
+    if not crawl_scheduler.start():
+        print('当前为celery调度方式，请使用celery -A run.celery worker -B')
+        return
+    print(f'定时采集调度已启动，执行方式：{crawl_scheduler.backend}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        crawl_scheduler.stop()
+        print('定时采集调度已停止')
+
+
+@scheduler.command('tick')
+def scheduler_tick():
+    """检查一次到期的采集任务并在前台运行"""
+    crawl_scheduler = get_scheduler(app)
+    dispatched = crawl_scheduler.tick()
+    if crawl_scheduler.backend == 'thread':
+        crawl_scheduler.stop()
+    print(f'已派发{dispatched}个采集任务')
+
+
+@scheduler.command('run-task')
+@click.argument('task_id', type=int)
+def scheduler_run_task(task_id):
+    """立即运行指定的采集任务"""
+    run = run_crawl_task(task_id, trigger='manual')
+    if run is None:
+        print('采集任务不存在')
+        return
+    print(f'{run.status}：{run.pages}页，抓取{run.fetched}条，新增{run.saved}条，'
+          f'重复{run.duplicates}条，耗时{run.duration_ms}ms')
+
 def init_database():
     """初始化数据库和默认用户"""
     with app.app_context():
@@ -133,6 +264,10 @@ if __name__ == '__main__':
     # 从环境变量获取是否开启调试模式
     debug = os.getenv('FLASK_DEBUG', 'True').lower() in ['true', '1', 'yes']
     
+    # 调试模式下重载器的父进程不启动调度，避免同一进程组内重复检查
+    if app.config['CRAWL_SCHEDULER_AUTOSTART'] and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        get_scheduler(app).start()
+    
     logging.info(f"应用启动，配置：{config_name}，端口：{port}，调试模式：{debug}")
     print(f"应用启动，配置：{config_name}，端口：{port}，调试模式：{debug}")
     
@@ -0,0 +1,504 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import aiohttp
+from multidict import CIMultiDict
+from requests.compat import chardet
+
+from services.encoding import IncrementalHtmlParser, get_encoding_resolver
+from services.http_archive import get_http_archive
+from services.fetch_timing import FetchTiming, bind_collector, current_collector, elapsed_ms, get_fetch_metrics
+from services.http_client import check_content_type
+from services.rate_limiter import get_rate_limiter
+from services.retry import get_retry_policy
+from utils.config_helper import get_config_value
+
+
+class CrawlResponse:
+    """异步抓取结果，字段命名与requests.Response保持一致，便于解析代码复用"""
+
+    def __init__(self, url, status_code, headers, content, encoding=None, tree=None, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.tree = tree
+        self.truncated = truncated
+        self.timing = None
+
+    @property
+    def apparent_encoding(self):
+        """根据响应内容推测的字符编码"""
+        return chardet.detect(self.content)['encoding'] or 'utf-8'
+
+    @property
+    def text(self):
+        """按encoding解码后的响应文本"""
+        encoding = self.encoding or 'utf-8'
+        try:
+            return self.content.decode(encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+# 连接失败和超时属于临时故障，可以重试
+_RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+def _timing_trace_config():
+    """通过aiohttp的请求跟踪回调记录DNS、建立连接（含TLS握手）和首字节耗时"""
+    trace_config = aiohttp.TraceConfig()
+
+    def _timing(ctx):
+        return ctx.trace_request_ctx if isinstance(ctx.trace_request_ctx, FetchTiming) else None
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = ctx.sent = time.perf_counter()
+        ctx.dns = 0.0
+
+    async def on_queued_start(session, ctx, params):
+        ctx.queued = time.perf_counter()
+
+    async def on_queued_end(session, ctx, params):
+        timing = _timing(ctx)
+        if timing is not None:
+            timing.add('wait', elapsed_ms(ctx.queued))
+
+    async def on_dns_start(session, ctx, params):
+        ctx.dns_started = time.perf_counter()
+
+    async def on_dns_end(session, ctx, params):
+        ms = elapsed_ms(ctx.dns_started)
+        ctx.dns += ms
+        timing = _timing(ctx)
+        if timing is not None:
+            timing.add('dns', ms)
+
+    async def on_connection_start(session, ctx, params):
+        ctx.connect_started = time.perf_counter()
+        ctx.dns = 0.0
+
+    async def on_connection_end(session, ctx, params):
+        timing = _timing(ctx)
+        if timing is not None:
+            # 建立连接的回调包含了DNS解析，这里扣除
+            timing.add('connect', elapsed_ms(ctx.connect_started) - ctx.dns)
+            timing.reused = False
+
+    async def on_connection_reuse(session, ctx, params):
+        timing = _timing(ctx)
+        if timing is not None and timing.reused is None:
+            timing.reused = True
+
+    async def on_headers_sent(session, ctx, params):
+        ctx.sent = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        timing = _timing(ctx)
+        if timing is not None:
+            timing.add('ttfb', elapsed_ms(ctx.sent))
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_queued_start.append(on_queued_start)
+    trace_config.on_connection_queued_end.append(on_queued_end)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connection_start)
+    trace_config.on_connection_create_end.append(on_connection_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuse)
+    trace_config.on_request_headers_sent.append(on_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class AsyncCrawlEngine:
+    """
+    基于asyncio的采集引擎
+
+    引擎在独立的后台线程中运行事件循环，使用非阻塞的aiohttp客户端发起请求，
+    全局信号量限制同时在途的请求数量。同步代码（如Flask视图）通过submit提交协程，
+    得到可取消的concurrent.futures.Future。
+    """
+
+    def __init__(self, max_concurrency=200, per_host_limit=20, retry_policy=None):
+        """
+        初始化采集引擎
+
+        Args:
+            max_concurrency (int): 全局最大在途请求数
+            per_host_limit (int): 单个主机的最大连接数
+            retry_policy (RetryPolicy): 重试及超时策略，为空时使用共享策略
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.retry_policy = retry_policy or get_retry_policy()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._in_flight = 0
+        self._pending = set()
+
+    def _ensure_loop(self):
+        """按需启动后台事件循环线程"""
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name='async-crawl-engine', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit)
+            # 会话在所有采集任务之间共享，不保存服务端下发的Cookie
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(),
+                                                  trace_configs=[_timing_trace_config()])
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def fetch(self, url, method='GET', headers=None, cookies=None, timeout=None, allow_redirects=True,
+                    max_bytes=None, content_types=None, label='other', html=True):
+        """
+        发送请求并读取完整响应（协程），临时故障按重试策略退避后重试
+
+        Args:
+            url (str): 请求地址
+            method (str): 请求方法
+            headers (dict): 请求头
+            cookies (dict): 随本次请求发送的Cookie
+            timeout (float): 单次请求的总超时时间（秒），为空时使用重试策略的连接超时和读取超时
+            allow_redirects (bool): 是否跟随重定向
+            max_bytes (int): 指定时按HTML页面流式读取并增量解析，正文最多读取的字节数，结果带有tree属性，
+                非200响应不读取正文
+            content_types (iterable): 流式读取时允许的MIME类型，不符时读取正文前即中止
+            label (str): 抓取用途，耗时统计按用途汇总
+            html (bool): 指定max_bytes时是否按HTML页面增量解析，为False时只按字节上限读取正文，
+                Content-Length超出上限时不读取正文，结果的truncated为True
+
+        Returns:
+            CrawlResponse: 抓取结果，timing属性为本次抓取的耗时分解，重试用尽仍为可重试状态码时照常返回
+        """
+        archive = get_http_archive()
+        if archive.replaying:
+            return self._replay(archive, url, method, max_bytes, content_types, label, html)
+
+        policy = self.retry_policy
+        if timeout:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=policy.connect_timeout,
+                                                   sock_read=policy.read_timeout)
+        timing = FetchTiming(url, label)
+        attempt = 0
+        while True:
+            timing.attempts = attempt + 1
+            try:
+                response = await self._fetch_once(url, method, headers, cookies, client_timeout, allow_redirects,
+                                                  max_bytes, content_types, timing, html)
+            except _RETRY_EXCEPTIONS as e:
+                delay = policy.retry_delay(attempt, method)
+                if delay is None:
+                    policy.record(attempt + 1, False)
+                    timing.error = e.__class__.__name__
+                    get_fetch_metrics().record(timing)
+                    raise
+            else:
+                delay = policy.retry_delay(attempt, method, response.status_code, response.headers)
+                if delay is None:
+                    policy.record(attempt + 1, not policy.should_retry_status(response.status_code))
+                    timing.status = response.status_code
+                    timing.bytes = len(response.content)
+                    response.timing = timing
+                    get_fetch_metrics().record(timing)
+                    archive.record(method, url, response.url, response.status_code, response.headers, response.content,
+                                   response.truncated)
+                    return response
+            timing.add('backoff', delay * 1000)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _replay(archive, url, method, max_bytes, content_types, label, html=True):
+        """从归档中返回录制的响应，不访问网络"""
+        timing = FetchTiming(url, label)
+        timing.attempts = 1
+        try:
+            entry = archive.lookup(method, url)
+            headers = CIMultiDict(entry.headers)
+            if max_bytes and entry.status_code == 200 and not html:
+                check_content_type(headers, content_types)
+                response = CrawlResponse(entry.final_url, entry.status_code, headers, entry.content[:max_bytes],
+                                         truncated=entry.truncated or len(entry.content) > max_bytes)
+            elif max_bytes and entry.status_code == 200:
+                check_content_type(headers, content_types)
+                started = time.perf_counter()
+                parser = IncrementalHtmlParser(headers, entry.final_url)
+                content = entry.content[:max_bytes]
+                if content:
+                    parser.feed(content)
+                response = CrawlResponse(entry.final_url, entry.status_code, headers, content, tree=parser.close(),
+                                         truncated=entry.truncated or len(entry.content) > max_bytes)
+                response.encoding = parser.encoding
+                timing.add('parse', elapsed_ms(started))
+            elif max_bytes:
+                response = CrawlResponse(entry.final_url, entry.status_code, headers, b'')
+            else:
+                response = CrawlResponse(entry.final_url, entry.status_code, headers, entry.content,
+                                         encoding=get_encoding_resolver().from_headers(headers))
+        except Exception as e:
+            timing.error = e.__class__.__name__
+            get_fetch_metrics().record(timing)
+            raise
+        timing.status = response.status_code
+        timing.bytes = len(response.content)
+        response.timing = timing
+        get_fetch_metrics().record(timing)
+        return response
+
+    async def _fetch_once(self, url, method, headers, cookies, client_timeout, allow_redirects,
+                          max_bytes=None, content_types=None, timing=None, html=True):
+        session = await self._get_session()
+        waited = time.perf_counter()
+        # 先按主机限流再占用全局名额，避免等待令牌的请求占住全局并发
+        async with get_rate_limiter().limit_async(url):
+            async with self._semaphore:
+                if timing is not None:
+                    timing.add('wait', elapsed_ms(waited))
+                self._in_flight += 1
+                try:
+                    async with session.request(method, url, headers=headers, cookies=cookies,
+                                               timeout=client_timeout, allow_redirects=allow_redirects,
+                                               trace_request_ctx=timing) as resp:
+                        body_started = time.perf_counter()
+                        if max_bytes:
+                            if resp.status != 200:
+                                # 非200响应不读取正文
+                                return CrawlResponse(str(resp.url), resp.status, CIMultiDict(resp.headers), b'')
+                            if not html:
+                                response = await self._read_capped(resp, max_bytes, content_types)
+                                if timing is not None:
+                                    timing.add('download', elapsed_ms(body_started))
+                                return response
+                            response, parse_ms = await self._read_page(resp, max_bytes, content_types)
+                            if timing is not None:
+                                # 增量解析与下载交替进行，解析耗时单独计入
+                                timing.add('download', elapsed_ms(body_started) - parse_ms)
+                                timing.add('parse', parse_ms)
+                            return response
+                        content = await resp.read()
+                        if timing is not None:
+                            timing.add('download', elapsed_ms(body_started))
+                        return CrawlResponse(
+                            url=str(resp.url),
+                            status_code=resp.status,
+                            headers=CIMultiDict(resp.headers),
+                            content=content,
+                            encoding=resp.charset
+                        )
+                finally:
+                    self._in_flight -= 1
+
+    @staticmethod
+    async def _read_capped(resp, max_bytes, content_types):
+        """
+        分块读取正文，超过max_bytes后停止读取并关闭连接，Content-Length已超出上限时不读取正文
+
+        Returns:
+            CrawlResponse: 抓取结果，正文被截断或未读取时truncated为True
+        """
+        headers = CIMultiDict(resp.headers)
+        check_content_type(headers, content_types)
+        if resp.content_length is not None and resp.content_length > max_bytes:
+            resp.close()
+            return CrawlResponse(str(resp.url), resp.status, headers, b'', truncated=True)
+
+        chunks = []
+        received = 0
+        truncated = False
+        async for chunk in resp.content.iter_chunked(65536):
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+                truncated = True
+            chunks.append(chunk)
+            received += len(chunk)
+            if truncated:
+                resp.close()
+                break
+        return CrawlResponse(str(resp.url), resp.status, headers, b''.join(chunks), truncated=truncated)
+
+    @staticmethod
+    async def _read_page(resp, max_bytes, content_types):
+        """
+        分块读取HTML页面并增量解析，超过max_bytes后停止读取并关闭连接
+
+        Returns:
+            tuple: (抓取结果, 解析耗时毫秒数)
+        """
+        headers = CIMultiDict(resp.headers)
+        check_content_type(headers, content_types)
+
+        parser = IncrementalHtmlParser(headers, str(resp.url))
+        chunks = []
+        received = 0
+        truncated = False
+        parse_ms = 0.0
+        async for chunk in resp.content.iter_chunked(65536):
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+                truncated = True
+            chunks.append(chunk)
+            received += len(chunk)
+            started = time.perf_counter()
+            parser.feed(chunk)
+            parse_ms += elapsed_ms(started)
+            if truncated:
+                resp.close()
+                break
+        started = time.perf_counter()
+        tree = parser.close()
+        parse_ms += elapsed_ms(started)
+        return CrawlResponse(
+            url=str(resp.url),
+            status_code=resp.status,
+            headers=headers,
+            content=b''.join(chunks),
+            encoding=parser.encoding,
+            tree=tree,
+            truncated=truncated
+        ), parse_ms
+
+    async def fetch_all(self, requests_list):
+        """
+        并发抓取多个请求（协程）
+
+        Args:
+            requests_list (list): 每个元素为传给fetch的关键字参数字典
+
+        Returns:
+            list: 与输入顺序一致的结果列表，失败的请求对应异常对象
+        """
+        tasks = [self.fetch(**kwargs) for kwargs in requests_list]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, coro):
+        """
+        向引擎提交协程
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            concurrent.futures.Future: 可在任意线程等待或取消的Future
+        """
+        loop = self._ensure_loop()
+        collector = current_collector()
+        if collector is not None:
+            # 事件循环线程不继承提交方的上下文，抓取耗时需要显式归入当前请求
+            coro = bind_collector(coro, collector)
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard_pending)
+        return future
+
+    def _discard_pending(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def run(self, coro, timeout=None):
+        """
+        提交协程并阻塞等待结果，超时后取消任务
+
+        Args:
+            coro: 协程对象
+            timeout (float): 最长等待时间（秒），为空时一直等待
+
+        Returns:
+            协程的返回值
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def cancel_all(self):
+        """取消所有尚未完成的任务"""
+        with self._lock:
+            pending = list(self._pending)
+        cancelled = 0
+        for future in pending:
+            if future.cancel():
+                cancelled += 1
+        return cancelled
+
+    def stats(self):
+        """获取引擎运行状态"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'max_concurrency': self.max_concurrency,
+            'per_host_limit': self.per_host_limit,
+            'in_flight': self._in_flight,
+            'pending_tasks': pending
+        }
+
+    def shutdown(self):
+        """取消未完成任务，关闭会话并停止事件循环"""
+        if self._loop is None:
+            return
+        self.cancel_all()
+
+        async def _close():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=5)
+        except (CancelledError, Exception):
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+        self._session = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_crawl_engine():
+    """
+    获取进程级共享的异步采集引擎
+
+    Returns:
+        AsyncCrawlEngine: 共享引擎实例
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AsyncCrawlEngine(
+                    max_concurrency=int(get_config_value('CRAWL_MAX_CONCURRENCY', 200)),
+                    per_host_limit=int(get_config_value('CRAWL_PER_HOST_CONCURRENCY', 20))
+                )
+    return _engine
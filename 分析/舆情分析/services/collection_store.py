@@ -0,0 +1,87 @@
+from services.redirect_resolver import get_redirect_resolver
+from services.thumbnails import get_thumbnail_store
+
+# 按URL批量查询时每批的数量，避免超出数据库参数个数限制
+URL_QUERY_CHUNK = 500
+
+DIRTY_TEXT_VALUES = {'未知', '无标题', '未知标题', 'none', 'null', '-', 'n/a'}
+
+def is_dirty_text(s):
+    """判断文本是否为空或无意义的占位值"""
+    if s is None:
+        return True
+    t = str(s).strip()
+    if t == '':
+        return True
+    return t.lower() in DIRTY_TEXT_VALUES
+
+def is_dirty_item(r):
+    """判断采集结果是否为脏数据"""
+    return is_dirty_text(r.get('title')) or is_dirty_text(r.get('summary')) or is_dirty_text(r.get('url'))
+
+def _existing_urls(column, urls, *criteria):
+    """分批IN查询已存在的URL"""
+    from __init__ import db
+
+    existing = set()
+    for i in range(0, len(urls), URL_QUERY_CHUNK):
+        chunk = urls[i:i + URL_QUERY_CHUNK]
+        rows = db.session.query(column).filter(column.in_(chunk), *criteria).all()
+        existing.update(row[0] for row in rows)
+    return existing
+
+def insert_collection_results(results, user_id, skip_warehouse=False):
+    """
+    过滤脏数据并将采集结果加入临时表，只刷新到数据库不提交，由调用方提交
+
+    百度跳转链接先批量解析为文章的真实地址。同一批结果内以及与用户已有临时数据之间均按URL去重，
+    已有URL通过分批IN查询一次取出，不再逐条查询数据库。
+
+    Args:
+        results (list): 采集结果列表
+        user_id (int): 采集者ID
+        skip_warehouse (bool): 是否同时跳过已保存到数据仓库的URL，定时采集只收录新数据时使用
+
+    Returns:
+        tuple: (新增记录列表, 过滤脏数据数量, 重复数量)
+    """
+    from __init__ import db
+    from models import CollectionTemp, DataWarehouse
+
+    clean_results = [r for r in results if not is_dirty_item(r)]
+    filtered_count = len(results) - len(clean_results)
+
+    # 跳转链接每次抓取都不同，替换为真实地址后再去重
+    get_redirect_resolver().rewrite(clean_results)
+
+    urls = list({r.get('url') for r in clean_results})
+    existing_urls = _existing_urls(CollectionTemp.url, urls, CollectionTemp.collected_by == user_id)
+    if skip_warehouse:
+        existing_urls |= _existing_urls(DataWarehouse.url, [url for url in urls if url not in existing_urls])
+
+    saved = []
+    duplicate_count = 0
+    for result in clean_results:
+        url = result.get('url')
+        if url in existing_urls:
+            duplicate_count += 1
+            continue
+        existing_urls.add(url)
+        # 创建新的临时记录
+        item = CollectionTemp(
+            title=result.get('title', ''),
+            content=result.get('summary', ''),
+            summary=result.get('summary', ''),
+            source=result.get('source', ''),
+            url=url,
+            cover=result.get('cover', ''),
+            collected_by=user_id
+        )
+        db.session.add(item)
+        saved.append(item)
+
+    # 刷新后即可取得新记录的ID和采集时间
+    db.session.flush()
+    # 封面在后台下载并生成本地缩略图，列表不再直接引用第三方图片
+    get_thumbnail_store().enqueue(item.cover for item in saved)
+    return saved, filtered_count, duplicate_count
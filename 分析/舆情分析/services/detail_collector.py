@@ -0,0 +1,396 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime
+
+from lxml import etree
+
+from services.async_engine import get_crawl_engine
+from services.fetch_timing import timed_parse
+from services.rule_index import bump_rule_version, get_rule_index
+from services.xpath_cache import TEXT_OF, compile_list, get_xpath_cache
+from utils.config_helper import get_config_value
+
+# 采集规则中提取用的XPath，id和updated_at用于按规则版本缓存编译结果，自动生成的规则为None
+RuleXPaths = namedtuple('RuleXPaths', ['title_xpath', 'content_xpath', 'id', 'updated_at'], defaults=(None, None))
+# 一个详情页采集任务，key由调用方用于对应结果
+DetailJob = namedtuple('DetailJob', ['key', 'url', 'headers', 'rule', 'source'])
+
+# 规则未提取到内容时依次尝试的常见内容XPath
+COMMON_CONTENT_XPATHS = compile_list([
+    '//*[@id="detailContent"]',  # 常用的内容ID
+    '//div[@id="detail"]//span[@id="detailContent"]',  # 针对当前页面的内容XPath
+    '//article',
+    '//div[contains(@class, "content")]',
+    '//div[contains(@class, "article")]',
+    '//div[contains(@id, "content")]'
+], 'fallback')
+
+# 自动更新规则时依次尝试的常见标题和内容XPath
+AUTO_TITLE_XPATHS = compile_list([
+    '//h1', '//h2', '//header//h1', '//header//h2', '//div[contains(@class, "title")]',
+    '//div[contains(@class, "headline")]'
+], 'auto:title')
+AUTO_CONTENT_XPATHS = compile_list([
+    '//article', '//div[contains(@class, "content")]', '//div[contains(@class, "article")]',
+    '//div[contains(@id, "content")]', '//section[contains(@class, "main")]', '//div[contains(@class, "post")]'
+], 'auto:content')
+
+DEFAULT_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def parse_rule_headers(rule):
+    """解析采集规则中保存的请求头"""
+    request_headers = {}
+    try:
+        if rule.request_headers:
+            # 解析JSON格式的请求头
+            raw_headers = json.loads(rule.request_headers)
+            # 清理和验证请求头
+            for key, value in raw_headers.items():
+                # 确保键名不包含冒号、空格等非法字符
+                clean_key = key.strip()
+                if ':' in clean_key or not clean_key:
+                    continue
+                request_headers[clean_key] = str(value).strip()
+    except (json.JSONDecodeError, AttributeError):
+        # 如果解析失败，使用默认请求头
+        request_headers = dict(DEFAULT_REQUEST_HEADERS)
+    return request_headers
+
+def detail_download_limits():
+    """
+    详情页下载限制
+    
+    Returns:
+        tuple: (正文最大字节数, 允许的内容类型)
+    """
+    content_types = get_config_value('DETAIL_CONTENT_TYPES', 'text/html,application/xhtml+xml')
+    if isinstance(content_types, str):
+        content_types = [t.strip().lower() for t in content_types.split(',') if t.strip()]
+    return int(get_config_value('DETAIL_MAX_BYTES', 5 * 1024 * 1024)), frozenset(content_types)
+
+def detail_parse_key(rule):
+    """详细内容提取结果的缓存键，规则的XPath变化后缓存的提取结果随之失效"""
+    xpaths = f"{rule.title_xpath}\n{rule.content_xpath}"
+    return 'detail:' + hashlib.sha1(xpaths.encode('utf-8')).hexdigest()
+
+def extract_detail_fields(tree, rule):
+    """
+    按采集规则从详情页中提取标题和内容
+    
+    Args:
+        tree (lxml.etree._Element): 详情页文档树
+        rule (CollectionRule): 采集规则
+    
+    Returns:
+        dict: 包含title和content
+    """
+    if tree is None:
+        return {'title': '', 'content': ''}
+    
+    # 规则的XPath按规则版本编译一次，之后直接求值
+    compiled = get_xpath_cache().for_rule(rule)
+    
+    # 提取标题
+    title = ''
+    if compiled.title is not None:
+        title_elements = compiled.title(tree)
+        if title_elements:
+            # 使用string()来提取元素及其所有子元素的文本
+            title = TEXT_OF(title_elements[0]).strip()
+    
+    # 提取内容
+    content = ''
+    if compiled.content is not None:
+        content_elements = compiled.content(tree)
+        if content_elements:
+            # 使用string()来提取元素及其所有子元素的文本
+            content = ' '.join([TEXT_OF(elem).strip() for elem in content_elements])
+    
+    # 如果内容为空，尝试一些常见的内容XPath
+    if not content:
+        for xpath in COMMON_CONTENT_XPATHS:
+            content_elements = xpath(tree)
+            if content_elements:
+                content = ' '.join([TEXT_OF(elem).strip() for elem in content_elements])
+                if content:  # 如果成功提取到内容，就停止尝试
+                    break
+    
+    return {'title': title, 'content': content}
+
+def auto_update_rules(html, source, tree=None):
+    """
+    自动更新采集规则
+    
+    Args:
+        html (str): 页面HTML
+        source (str): 数据来源，用于日志
+        tree (lxml.etree._Element): 已解析的文档树，为空时解析html
+        
+    Returns:
+        tuple: (新的标题XPath, 新的内容XPath)，未识别出的为None
+    """
+    try:
+        if tree is None:
+            tree = etree.HTML(html)
+        
+        # 尝试自动识别标题元素
+        new_title_xpath = None
+        for xpath in AUTO_TITLE_XPATHS:
+            elements = xpath(tree)
+            if elements:
+                text = TEXT_OF(elements[0]).strip()
+                if len(text) > 0:
+                    new_title_xpath = xpath.expr
+                    break
+        
+        # 尝试自动识别内容元素
+        new_content_xpath = None
+        for xpath in AUTO_CONTENT_XPATHS:
+            elements = xpath(tree)
+            if elements:
+                # 检查是否包含足够的文本内容
+                text = ''.join(elements[0].itertext()).strip()
+                if len(text) > 100:  # 内容长度至少100个字符
+                    new_content_xpath = xpath.expr
+                    break
+        
+        # 如果找到新规则，记录日志
+        if new_title_xpath or new_content_xpath:
+            logging.getLogger(__name__).info(f"自动更新了来源{source}的采集规则: title_xpath={new_title_xpath}, content_xpath={new_content_xpath}")
+        
+        return new_title_xpath, new_content_xpath
+    except Exception as e:
+        logging.getLogger(__name__).error(f"自动分析页面结构失败：{str(e)}", exc_info=True)
+        return None, None
+
+def check_detail_response(response):
+    """
+    检查详情页响应是否可以提取
+    
+    Raises:
+        Exception: 请求失败或页面为空
+    """
+    if response.status_code != 200:
+        raise Exception(f'请求失败，状态码：{response.status_code}')
+    if getattr(response, 'tree', None) is None:
+        raise Exception('页面内容为空')
+
+def extract_detail(response, rule, source=None):
+    """
+    按采集规则提取详情页，提取不到内容时尝试自动生成新的采集规则
+    
+    不访问数据库，也不修改规则对象，可以在线程池中执行；新规则随结果返回，由写库的线程保存。
+    
+    Args:
+        response: 带有tree属性的详情页响应
+        rule (CollectionRule|RuleXPaths): 采集规则，只读取title_xpath和content_xpath
+        source (str): 数据来源，用于日志
+        
+    Returns:
+        dict: title、content、raw_html、collected（是否提取到内容）、error（失败原因）、
+            rule_update（自动生成的新规则RuleXPaths，未更新时为None）
+        
+    Raises:
+        Exception: 请求失败或页面为空
+    """
+    check_detail_response(response)
+    html = response.text
+    tree = response.tree
+    
+    # 按规则提取的耗时计入该页的解析耗时
+    fields = timed_parse(response, extract_detail_fields, tree, rule)
+    result = {
+        'title': fields['title'],
+        'content': fields['content'],
+        'raw_html': html,
+        'collected': bool(fields['title'] or fields['content']),
+        'error': None,
+        'rule_update': None
+    }
+    if result['collected']:
+        return result
+    
+    # 尝试自动更新规则
+    try:
+        # 分析页面结构，尝试自动生成新的XPath规则
+        new_title_xpath, new_content_xpath = auto_update_rules(html, source, tree)
+        if not (new_title_xpath or new_content_xpath):
+            result['error'] = '未提取到标题或内容，且无法自动更新规则'
+            return result
+        
+        updated = RuleXPaths(new_title_xpath or rule.title_xpath, new_content_xpath or rule.content_xpath)
+        result['rule_update'] = updated
+        
+        # 使用新规则再次尝试提取
+        fields = extract_detail_fields(tree, updated)
+        result['title'], result['content'] = fields['title'], fields['content']
+        if fields['title'] or fields['content']:
+            result['collected'] = True
+        else:
+            result['error'] = '规则已自动更新，但仍未提取到内容'
+    except Exception as auto_update_error:
+        logging.getLogger(__name__).error(f"自动更新规则失败：{str(auto_update_error)}", exc_info=True)
+        result['error'] = f'自动更新规则失败：{str(auto_update_error)}'
+    return result
+
+def match_rules(topics):
+    """
+    从进程内的规则索引中查找各条数据的采集规则，先按URL匹配规则的站点地址，再按来源名称查找，
+    规则未变更时不查询采集规则表
+    
+    Args:
+        topics (iterable): 数据仓库记录
+        
+    Returns:
+        dict: {记录ID: RuleSnapshot}，没有匹配规则的记录不包含在内
+    """
+    index = get_rule_index().refresh()
+    rules = {}
+    for topic in topics:
+        rule = index.resolve(topic.source, topic.url)
+        if rule is not None:
+            rules[topic.id] = rule
+    return rules
+
+def detail_job(key, topic, rule, url=None):
+    """
+    创建详情页采集任务，规则只保留XPath的副本，抓取和提取线程不接触数据库会话中的对象
+    
+    Args:
+        key: 调用方用于对应结果的标识
+        topic (DataWarehouse): 数据仓库记录
+        rule (CollectionRule|RuleSnapshot): 采集规则
+        url (str): 抓取地址，为空时使用记录的URL
+    """
+    return DetailJob(key, url or topic.url, parse_rule_headers(rule),
+                     RuleXPaths(rule.title_xpath, rule.content_xpath, rule.id, rule.updated_at), topic.source)
+
+async def _collect_detail(job, max_bytes, content_types):
+    response = await get_crawl_engine().fetch(job.url, headers=job.headers, max_bytes=max_bytes,
+                                              content_types=content_types, label='detail')
+    # 提取在线程池中进行，不阻塞事件循环上的其他抓取
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, extract_detail, response, job.rule, job.source)
+
+def iter_detail_results(jobs, workers=None):
+    """
+    并发抓取并提取详情页，按完成顺序产出结果
+    
+    抓取在采集引擎上进行，各站点的请求速率和并发数受限流器约束；同时处理的页面不超过workers个，
+    完成一个再补充一个，总耗时取决于最慢的站点而不是所有页面耗时之和。结果在调用方线程中产出，
+    写库只在该线程中进行。
+    
+    Args:
+        jobs (iterable): DetailJob序列
+        workers (int): 同时处理的页面数，为空时使用DETAIL_WORKERS配置
+        
+    Yields:
+        tuple: (DetailJob, extract_detail的结果；抓取或提取失败时为异常对象)
+    """
+    engine = get_crawl_engine()
+    workers = max(int(workers or get_config_value('DETAIL_WORKERS', 32)), 1)
+    max_bytes, content_types = detail_download_limits()
+    jobs = iter(jobs)
+    pending = {}
+    try:
+        while True:
+            for job in itertools.islice(jobs, workers - len(pending)):
+                pending[engine.submit(_collect_detail(job, max_bytes, content_types))] = job
+            if not pending:
+                return
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield job, result
+    finally:
+        # 调用方提前结束时取消尚未完成的页面
+        for future in pending:
+            future.cancel()
+
+class DetailWriter:
+    """
+    详细内容的批量写入器，需要在应用上下文中使用
+    
+    提取结果先缓存在内存中，满一批后以一次IN查询取出已有的详细内容记录，批量更新或插入，
+    自动生成的新规则一并保存。只写入数据库会话，由调用方按批提交事务。
+    """
+    
+    def __init__(self, batch_size=None):
+        """
+        初始化写入器
+        
+        Args:
+            batch_size (int): 每批写入的数量，为空时使用DETAIL_WRITE_BATCH配置
+        """
+        self.batch_size = max(int(batch_size or get_config_value('DETAIL_WRITE_BATCH', 100)), 1)
+        self._items = []
+    
+    @property
+    def full(self):
+        return len(self._items) >= self.batch_size
+    
+    def add(self, topic_id, result, rule=None, tag=None):
+        """
+        加入一条提取结果
+        
+        Args:
+            topic_id (int): 数据仓库记录ID
+            result (dict): extract_detail的结果
+            rule (CollectionRule|RuleSnapshot|RuleXPaths): 采集规则，结果中带有新规则时按ID更新
+            tag: 原样返回给调用方的标识
+        """
+        self._items.append((topic_id, result, rule, tag))
+    
+    def flush(self):
+        """
+        写入缓存的结果
+        
+        Returns:
+            list: 本批写入的(tag, result)
+        """
+        from __init__ import db
+        from models import CollectionRule, DetailedContent
+        
+        items, self._items = self._items, []
+        if not items:
+            return []
+        
+        topic_ids = list({topic_id for topic_id, _, _, _ in items})
+        existing = {detail.warehouse_id: detail for detail in
+                    DetailedContent.query.filter(DetailedContent.warehouse_id.in_(topic_ids))}
+        now = datetime.now()
+        rules_updated = False
+        for topic_id, result, rule, _ in items:
+            detailed_content = existing.get(topic_id)
+            if detailed_content is None:
+                detailed_content = existing[topic_id] = DetailedContent(warehouse_id=topic_id)
+                db.session.add(detailed_content)
+            detailed_content.detailed_title = result['title']
+            detailed_content.detailed_content = result['content']
+            detailed_content.raw_html = result['raw_html']
+            detailed_content.is_collected = result['collected']
+            detailed_content.collection_error = result['error']
+            detailed_content.collected_at = now
+            if rule is not None and result['rule_update'] is not None:
+                # 索引中的规则是快照，按ID取出会话中的规则再更新，同一规则在会话中只查询一次
+                stored = CollectionRule.query.get(rule.id)
+                if stored is not None:
+                    stored.title_xpath = result['rule_update'].title_xpath
+                    stored.content_xpath = result['rule_update'].content_xpath
+                    stored.updated_at = now
+                    rules_updated = True
+        if rules_updated:
+            bump_rule_version()
+        db.session.flush()
+        return [(tag, result) for _, result, _, tag in items]
@@ -0,0 +1,314 @@
+import codecs
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from lxml import etree
+from requests.compat import chardet
+
+from utils.config_helper import get_config_value
+
+_CHARSET_HEADER = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+_XML_DECLARATION = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)', re.I)
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# 国内站点常把GBK页面声明为gb2312，统一按其超集gb18030解码，避免生僻字乱码
+_SUPERSETS = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'x-gbk': 'gb18030',
+    'ascii': 'utf-8',
+    'us-ascii': 'utf-8',
+}
+
+
+def normalize_encoding(name):
+    """
+    规范化字符集名称
+
+    Args:
+        name (str): 字符集名称
+
+    Returns:
+        str: Python可识别的字符集名称，无法识别时返回None
+    """
+    if not name:
+        return None
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    name = name.strip().lower()
+    try:
+        name = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return _SUPERSETS.get(name, name)
+
+
+class EncodingResolver:
+    """
+    响应字符集解析器
+
+    依次检查HTTP头中的charset、BOM、页面前几KB内的<meta charset>或XML声明，
+    都没有时才对有限长度的样本做统计检测，检测结果按主机缓存，同一站点后续页面不再重复检测。
+    """
+
+    def __init__(self, head_bytes=4096, sample_bytes=32768, max_hosts=1024):
+        """
+        初始化解析器
+
+        Args:
+            head_bytes (int): 查找meta声明的页面头部长度（字节）
+            sample_bytes (int): 统计检测使用的样本长度（字节）
+            max_hosts (int): 缓存检测结果的主机数量上限
+        """
+        self.head_bytes = head_bytes
+        self.sample_bytes = sample_bytes
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._host_cache = OrderedDict()
+        self._counts = {'header': 0, 'bom': 0, 'meta': 0, 'host_cache': 0, 'detected': 0}
+
+    def _count(self, source):
+        with self._lock:
+            self._counts[source] += 1
+
+    @staticmethod
+    def from_headers(headers):
+        """从Content-Type中获取声明的字符集"""
+        content_type = (headers or {}).get('Content-Type') or ''
+        match = _CHARSET_HEADER.search(content_type)
+        return normalize_encoding(match.group(1)) if match else None
+
+    @staticmethod
+    def from_bom(content):
+        """根据BOM判断字符集"""
+        for bom, encoding in _BOMS:
+            if content.startswith(bom):
+                return encoding
+        return None
+
+    def from_meta(self, content):
+        """从页面头部的meta标签或XML声明中获取字符集"""
+        head = content[:self.head_bytes]
+        match = _META_CHARSET.search(head) or _XML_DECLARATION.search(head)
+        return normalize_encoding(match.group(1)) if match else None
+
+    def detect(self, content):
+        """对有限长度的样本做统计检测"""
+        sample = content[:self.sample_bytes]
+        if len(content) >= self.sample_bytes:
+            # 样本可能截断在多字节字符中间，退回到最后一个标签结束处，避免检测器因末尾残缺字节判定失败
+            cut = sample.rfind(b'>')
+            if cut > 0:
+                sample = sample[:cut + 1]
+        try:
+            sample.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+        return normalize_encoding(chardet.detect(sample)['encoding']) or 'utf-8'
+
+    def declared(self, content, headers=None):
+        """
+        获取响应头、BOM或页面头部声明的字符集，不做统计检测
+
+        Args:
+            content (bytes): 响应体或其开头部分
+            headers (dict): 响应头
+
+        Returns:
+            str: 字符集名称，均未声明时返回None
+        """
+        encoding = self.from_headers(headers)
+        if encoding:
+            self._count('header')
+            return encoding
+
+        encoding = self.from_bom(content)
+        if encoding:
+            self._count('bom')
+            return encoding
+
+        encoding = self.from_meta(content)
+        if encoding:
+            self._count('meta')
+        return encoding
+
+    def resolve(self, content, headers=None, url=None):
+        """
+        解析响应的字符集
+
+        Args:
+            content (bytes): 响应体
+            headers (dict): 响应头
+            url (str): 请求地址，用于按主机缓存检测结果
+
+        Returns:
+            str: 字符集名称
+        """
+        content = content or b''
+        encoding = self.declared(content, headers)
+        if encoding:
+            return encoding
+
+        host = (urlparse(url).hostname or '').lower() if url else ''
+        if host:
+            with self._lock:
+                encoding = self._host_cache.get(host)
+                if encoding:
+                    self._host_cache.move_to_end(host)
+                    self._counts['host_cache'] += 1
+                    return encoding
+
+        encoding = self.detect(content)
+        self._count('detected')
+        if host:
+            with self._lock:
+                self._host_cache[host] = encoding
+                while len(self._host_cache) > self.max_hosts:
+                    self._host_cache.popitem(last=False)
+        return encoding
+
+    def resolve_response(self, response):
+        """解析响应对象的字符集并设置到response.encoding"""
+        response.encoding = self.resolve(response.content, response.headers, response.url)
+        return response.encoding
+
+    def stats(self):
+        """获取各判定方式的次数"""
+        with self._lock:
+            return dict(self._counts, cached_hosts=len(self._host_cache))
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_encoding_resolver():
+    """
+    获取进程级共享的字符集解析器
+
+    Returns:
+        EncodingResolver: 共享解析器实例
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = EncodingResolver(
+                    sample_bytes=int(get_config_value('ENCODING_SAMPLE_BYTES', 32768))
+                )
+    return _resolver
+
+
+def html_tree(content, encoding):
+    """
+    直接用字节构建lxml文档树，省去先解码成字符串再交给lxml的一次复制
+
+    Args:
+        content (bytes): 页面字节
+        encoding (str): 字符集
+
+    Returns:
+        lxml.etree._Element: 文档根节点，内容为空时返回None
+    """
+    if not content:
+        return None
+    if content.startswith(codecs.BOM_UTF8):
+        # 显式指定编码时libxml2不会跳过BOM
+        content = content[len(codecs.BOM_UTF8):]
+    try:
+        parser = etree.HTMLParser(encoding=encoding)
+        return etree.fromstring(content, parser)
+    except (LookupError, ValueError, etree.ParserError):
+        # libxml2不支持的字符集先由Python解码
+        return etree.HTML(content.decode(encoding or 'utf-8', errors='replace'))
+
+
+class IncrementalHtmlParser:
+    """
+    边下载边解析的HTML解析器
+
+    先缓存页面开头部分确定字符集（响应头可直接确定时不缓存），之后收到的数据块直接交给lxml的
+    增量解析器，不需要等整个页面下载完再一次性解析。
+    """
+
+    def __init__(self, headers=None, url=None, resolver=None):
+        """
+        初始化解析器
+
+        Args:
+            headers (dict): 响应头
+            url (str): 请求地址
+            resolver (EncodingResolver): 字符集解析器，为空时使用共享实例
+        """
+        self.headers = headers
+        self.url = url
+        self.resolver = resolver or get_encoding_resolver()
+        self.encoding = None
+        self._pending = b''
+        self._parser = None
+        self._fed = False
+        self._started = False
+
+    def _start(self, encoding):
+        self.encoding = encoding
+        self._parser = etree.HTMLParser(encoding=encoding)
+        pending, self._pending = self._pending, b''
+        if pending.startswith(codecs.BOM_UTF8):
+            pending = pending[len(codecs.BOM_UTF8):]
+        self._feed(pending)
+
+    def _feed(self, data):
+        if data:
+            self._parser.feed(data)
+            self._fed = True
+
+    def feed(self, chunk):
+        """
+        输入一个数据块
+
+        Args:
+            chunk (bytes): 页面数据
+        """
+        if self._parser is not None:
+            self._feed(chunk)
+            return
+
+        self._pending += chunk
+        encoding = None
+        if not self._started:
+            # 响应头中声明的字符集无需等待页面内容
+            encoding = self.resolver.declared(b'', self.headers)
+            self._started = True
+        if encoding is None and len(self._pending) >= self.resolver.head_bytes:
+            encoding = self.resolver.declared(self._pending)
+            if encoding is None and len(self._pending) >= self.resolver.sample_bytes:
+                encoding = self.resolver.resolve(self._pending, None, self.url)
+        if encoding:
+            self._start(encoding)
+
+    def close(self):
+        """
+        结束输入并返回文档树
+
+        Returns:
+            lxml.etree._Element: 文档根节点，页面为空时返回None
+        """
+        if self._parser is None:
+            self._start(self.resolver.resolve(self._pending, self.headers, self.url))
+        if not self._fed:
+            return None
+        try:
+            return self._parser.close()
+        except etree.XMLSyntaxError:
+            return None
@@ -0,0 +1,278 @@
+import contextvars
+import threading
+import time
+from collections import deque
+
+from utils.config_helper import get_config_value
+
+# 耗时分解的各阶段：等待限流和并发名额、DNS解析、建立连接、TLS握手、首字节、下载正文、解析、重试退避
+PHASES = ('wait', 'dns', 'connect', 'tls', 'ttfb', 'download', 'parse', 'backoff')
+
+# 当前请求的抓取耗时收集器，开启调试响应头时由视图层设置
+_collector = contextvars.ContextVar('fetch_timing_collector', default=None)
+# 同步请求进行中的耗时记录，供连接池在建立连接时写入
+_active = contextvars.ContextVar('fetch_timing_active', default=None)
+
+
+def elapsed_ms(started):
+    """距离started（perf_counter）经过的毫秒数"""
+    return (time.perf_counter() - started) * 1000
+
+
+class FetchTiming:
+    """单次抓取的耗时分解（毫秒）、传输字节数和状态"""
+
+    __slots__ = ('url', 'label', 'started', 'phases', 'bytes', 'status', 'attempts', 'reused', 'error', 'total')
+
+    def __init__(self, url, label='other'):
+        self.url = url
+        self.label = label
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.bytes = 0
+        self.status = None
+        self.attempts = 0
+        self.reused = None
+        self.error = None
+        self.total = None
+
+    def add(self, phase, ms):
+        """累加某阶段的耗时"""
+        if ms is not None and ms >= 0:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    def finish(self):
+        """记录总耗时，解析耗时之后单独累加"""
+        self.total = elapsed_ms(self.started)
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'label': self.label,
+            'status': self.status,
+            'bytes': self.bytes,
+            'attempts': self.attempts,
+            'reused_connection': self.reused,
+            'error': self.error,
+            'total_ms': round(self.total or 0.0, 2),
+            'phases_ms': {phase: round(ms, 2) for phase, ms in self.phases.items()}
+        }
+
+
+class TimingCollector:
+    """收集一次Web请求期间发生的全部抓取，用于生成调试响应头"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = []
+
+    def add(self, timing):
+        with self._lock:
+            self.timings.append(timing)
+
+    def summary(self):
+        """
+        汇总各阶段耗时
+
+        Returns:
+            dict: 抓取次数、字节数及各阶段累计耗时（毫秒）
+        """
+        with self._lock:
+            timings = list(self.timings)
+        phases = {}
+        for timing in timings:
+            for phase, ms in timing.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + ms
+        return {
+            'fetches': len(timings),
+            'bytes': sum(timing.bytes for timing in timings),
+            'total': sum(timing.total or 0.0 for timing in timings),
+            'phases': phases
+        }
+
+    def server_timing(self):
+        """生成Server-Timing响应头，浏览器开发者工具可直接展示"""
+        summary = self.summary()
+        parts = [f'{phase};dur={summary["phases"][phase]:.1f}' for phase in PHASES if phase in summary['phases']]
+        parts.append(f'fetch;dur={summary["total"]:.1f};desc="{summary["fetches"]} fetches, {summary["bytes"]} bytes"')
+        return ', '.join(parts)
+
+
+def start_collecting():
+    """为当前上下文开启抓取耗时收集"""
+    collector = TimingCollector()
+    _collector.set(collector)
+    return collector
+
+
+def stop_collecting():
+    """结束当前上下文的抓取耗时收集"""
+    _collector.set(None)
+
+
+def current_collector():
+    """获取当前上下文的收集器"""
+    return _collector.get()
+
+
+async def bind_collector(coro, collector):
+    """
+    在采集引擎的事件循环中运行协程时沿用提交方的收集器
+
+    事件循环在独立线程中运行，不会继承提交线程的上下文变量，需要显式传递。
+    """
+    _collector.set(collector)
+    return await coro
+
+
+def active_timing():
+    """获取当前线程中正在进行的同步请求的耗时记录"""
+    return _active.get()
+
+
+def set_active_timing(timing):
+    """设置当前线程中正在进行的同步请求，返回用于恢复的令牌"""
+    return _active.set(timing)
+
+
+def reset_active_timing(token):
+    _active.reset(token)
+
+
+class FetchMetrics:
+    """
+    抓取耗时统计
+
+    按抓取用途（列表页、详情页、跳转解析等）累计各阶段耗时和传输字节数，
+    另保留最近若干次抓取的明细用于计算分位数和排查慢请求。
+    """
+
+    def __init__(self, sample_size=500):
+        """
+        初始化统计
+
+        Args:
+            sample_size (int): 保留的最近抓取明细数量
+        """
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._labels = {}
+        self._recent = deque(maxlen=sample_size)
+
+    def _label_stats(self, label):
+        stats = self._labels.get(label)
+        if stats is None:
+            stats = self._labels[label] = {'count': 0, 'errors': 0, 'bytes': 0, 'total': 0.0, 'phases': {}}
+        return stats
+
+    def record(self, timing):
+        """记录一次完成的抓取"""
+        timing.finish()
+        with self._lock:
+            stats = self._label_stats(timing.label)
+            stats['count'] += 1
+            stats['bytes'] += timing.bytes
+            stats['total'] += timing.total
+            if timing.error:
+                stats['errors'] += 1
+            for phase, ms in timing.phases.items():
+                stats['phases'][phase] = stats['phases'].get(phase, 0.0) + ms
+            self._recent.append(timing)
+        collector = _collector.get()
+        if collector is not None:
+            collector.add(timing)
+
+    def add_parse(self, timing, ms):
+        """为已记录的抓取追加解析耗时"""
+        timing.add('parse', ms)
+        with self._lock:
+            phases = self._label_stats(timing.label)['phases']
+            phases['parse'] = phases.get('parse', 0.0) + ms
+
+    @staticmethod
+    def _percentile(values, percent):
+        if not values:
+            return 0.0
+        values = sorted(values)
+        index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+        return round(values[index], 2)
+
+    def stats(self, recent=20):
+        """
+        获取统计信息
+
+        Args:
+            recent (int): 返回的最近抓取明细数量
+
+        Returns:
+            dict: 按用途划分的次数、字节数、各阶段平均耗时及总耗时分位数，以及最近的抓取明细
+        """
+        with self._lock:
+            labels = {label: dict(stats, phases=dict(stats['phases'])) for label, stats in self._labels.items()}
+            samples = list(self._recent)
+
+        result = {}
+        for label, stats in labels.items():
+            count = stats['count'] or 1
+            totals = [timing.total or 0.0 for timing in samples if timing.label == label]
+            result[label] = {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'bytes': stats['bytes'],
+                'avg_total_ms': round(stats['total'] / count, 2),
+                'p50_total_ms': self._percentile(totals, 50),
+                'p95_total_ms': self._percentile(totals, 95),
+                'avg_phases_ms': {phase: round(stats['phases'][phase] / count, 2)
+                                  for phase in PHASES if phase in stats['phases']}
+            }
+        return {
+            'labels': result,
+            'recent': [timing.to_dict() for timing in samples[-recent:]] if recent else []
+        }
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._labels.clear()
+            self._recent.clear()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_fetch_metrics():
+    """
+    获取进程级共享的抓取耗时统计
+
+    Returns:
+        FetchMetrics: 共享统计实例
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = FetchMetrics(sample_size=int(get_config_value('FETCH_TIMING_SAMPLES', 500)))
+    return _metrics
+
+
+def record_parse(response, started):
+    """
+    记录响应的解析耗时
+
+    Args:
+        response: 抓取结果，带有timing属性时才记录
+        started (float): 解析开始时的perf_counter
+    """
+    timing = getattr(response, 'timing', None)
+    if timing is not None:
+        get_fetch_metrics().add_parse(timing, elapsed_ms(started))
+
+
+def timed_parse(response, parse, *args):
+    """执行解析函数并记录解析耗时，可直接交给线程池执行"""
+    started = time.perf_counter()
+    try:
+        return parse(*args)
+    finally:
+        record_parse(response, started)
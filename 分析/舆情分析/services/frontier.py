@@ -0,0 +1,359 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from services.detail_collector import DetailWriter, detail_job, iter_detail_results, match_rules
+from services.rate_limiter import load_rule_overrides
+from utils.config_helper import get_config_value
+
+logger = logging.getLogger(__name__)
+
+# 入队去重时每批查询的URL数量
+_QUERY_CHUNK = 500
+
+
+class Frontier:
+    """
+    持久化的深度采集队列
+
+    待抓取的URL保存在crawl_frontier表中，入队时按URL去重。工作进程领取时按主机轮转，
+    每个主机先取优先级最高的一条，再取第二条，避免单个站点占满一批；领取的记录带有租约，
+    进程中断后租约到期即可被重新领取，重启后从中断处继续。失败的记录按指数退避推迟到
+    next_eligible_at之后重试，超过最大尝试次数后标记为失败。
+    """
+
+    def __init__(self, lease_seconds=300, max_attempts=5, retry_base=60, retry_max=3600):
+        """
+        初始化队列
+
+        Args:
+            lease_seconds (int): 领取后的租约时长（秒）
+            max_attempts (int): 最大尝试次数
+            retry_base (float): 失败后首次重试的等待时间（秒），之后每次加倍
+            retry_max (float): 重试等待时间上限（秒）
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+    @staticmethod
+    def key_of(url):
+        """获取URL的去重键"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _eligible(now):
+        from models import CrawlFrontier
+
+        return or_(
+            and_(CrawlFrontier.status == 'pending', CrawlFrontier.next_eligible_at <= now),
+            # 租约到期仍未完成，说明领取它的进程已中断
+            and_(CrawlFrontier.status == 'running', CrawlFrontier.leased_until < now)
+        )
+
+    def enqueue(self, entries, priority=0, requeue=False):
+        """
+        将URL加入队列，需要在应用上下文中调用，由调用方提交事务
+
+        Args:
+            entries (iterable): (URL, 数据仓库记录ID)列表
+            priority (int): 优先级
+            requeue (bool): 已完成或已失败的URL是否重新入队
+
+        Returns:
+            int: 新入队或重新入队的数量
+        """
+        from __init__ import db
+        from models import CrawlFrontier
+
+        unique = {}
+        for url, warehouse_id in entries:
+            if url:
+                unique.setdefault(self.key_of(url), (url, warehouse_id))
+
+        added = 0
+        keys = list(unique)
+        now = datetime.utcnow()
+        for i in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[i:i + _QUERY_CHUNK]
+            existing = dict(db.session.query(CrawlFrontier.url_hash, CrawlFrontier.status).filter(
+                CrawlFrontier.url_hash.in_(chunk)
+            ).all())
+
+            rows = []
+            for key in chunk:
+                if key in existing:
+                    continue
+                url, warehouse_id = unique[key]
+                rows.append({
+                    'url': url,
+                    'url_hash': key,
+                    'host': (urlparse(url).hostname or '').lower(),
+                    'priority': priority,
+                    'warehouse_id': warehouse_id,
+                    'status': 'pending',
+                    'attempts': 0,
+                    'next_eligible_at': now
+                })
+            if rows:
+                db.session.execute(insert(CrawlFrontier), rows)
+                added += len(rows)
+
+            if requeue:
+                finished = [key for key, status in existing.items() if status in ('done', 'failed')]
+                if finished:
+                    added += db.session.execute(
+                        update(CrawlFrontier)
+                        .where(CrawlFrontier.url_hash.in_(finished))
+                        .values(status='pending', attempts=0, priority=priority, next_eligible_at=now,
+                                last_error=None, lease_owner=None, leased_until=None)
+                    ).rowcount
+        return added
+
+    def enqueue_warehouse(self, warehouse_ids=None, include_collected=False, priority=0, requeue=False):
+        """
+        将数据仓库记录加入队列，需要在应用上下文中调用，由调用方提交事务
+
+        Args:
+            warehouse_ids (list): 数据仓库记录ID列表，为空时入队全部记录
+            include_collected (bool): 是否包含已有详细内容的记录
+            priority (int): 优先级
+            requeue (bool): 已完成或已失败的URL是否重新入队
+
+        Returns:
+            int: 新入队或重新入队的数量
+        """
+        from __init__ import db
+        from models import DataWarehouse, DetailedContent
+
+        query = db.session.query(DataWarehouse.url, DataWarehouse.id).filter(DataWarehouse.url.isnot(None))
+        if warehouse_ids is not None:
+            query = query.filter(DataWarehouse.id.in_(warehouse_ids))
+        if not include_collected:
+            query = query.filter(~db.session.query(DetailedContent.id).filter(
+                DetailedContent.warehouse_id == DataWarehouse.id
+            ).exists())
+        # 按批读取，数万条记录入队时不必一次载入全部对象
+        return self.enqueue(query.yield_per(_QUERY_CHUNK), priority=priority, requeue=requeue)
+
+    def claim(self, limit, owner):
+        """
+        领取一批到期的URL并提交
+
+        Args:
+            limit (int): 最多领取的数量
+            owner (str): 工作进程标识
+
+        Returns:
+            list: 领取到的CrawlFrontier记录
+        """
+        from __init__ import db
+        from models import CrawlFrontier
+
+        now = datetime.utcnow()
+        # 按主机分组排名，先取各主机排名第一的记录，再取排名第二的，实现按主机轮转
+        rank = func.row_number().over(
+            partition_by=CrawlFrontier.host,
+            order_by=(CrawlFrontier.priority.desc(), CrawlFrontier.next_eligible_at, CrawlFrontier.id)
+        ).label('host_rank')
+        ranked = select(CrawlFrontier.id, CrawlFrontier.priority, rank).where(self._eligible(now)).subquery()
+        ids = [row[0] for row in db.session.execute(
+            select(ranked.c.id).order_by(ranked.c.host_rank, ranked.c.priority.desc(), ranked.c.id).limit(limit)
+        )]
+        if not ids:
+            return []
+
+        # 条件更新防止多个工作进程领取同一条记录
+        db.session.execute(
+            update(CrawlFrontier)
+            .where(CrawlFrontier.id.in_(ids), self._eligible(now))
+            .values(status='running', lease_owner=owner, attempts=CrawlFrontier.attempts + 1,
+                    leased_until=now + timedelta(seconds=self.lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        claimed = CrawlFrontier.query.filter(
+            CrawlFrontier.id.in_(ids),
+            CrawlFrontier.status == 'running',
+            CrawlFrontier.lease_owner == owner
+        ).all()
+        order = {entry_id: index for index, entry_id in enumerate(ids)}
+        return sorted(claimed, key=lambda entry: order[entry.id])
+
+    def complete(self, entry):
+        """标记为已完成"""
+        entry.status = 'done'
+        entry.last_error = None
+        entry.lease_owner = None
+        entry.leased_until = None
+
+    def fail(self, entry, error, retry=True):
+        """
+        记录失败，未超过最大尝试次数时按指数退避推迟重试
+
+        Args:
+            entry (CrawlFrontier): 队列记录
+            error (str): 失败原因
+            retry (bool): 是否允许重试，页面无法提取等重试无效的失败传入False
+        """
+        entry.last_error = error
+        entry.lease_owner = None
+        entry.leased_until = None
+        if retry and (entry.attempts or 0) < self.max_attempts:
+            delay = min(self.retry_max, self.retry_base * (2 ** max((entry.attempts or 1) - 1, 0)))
+            entry.status = 'pending'
+            entry.next_eligible_at = datetime.utcnow() + timedelta(seconds=delay)
+        else:
+            entry.status = 'failed'
+
+    def stats(self):
+        """
+        获取队列统计信息，需要在应用上下文中调用
+
+        Returns:
+            dict: 各状态数量、待抓取的主机数和已到期的数量
+        """
+        from __init__ import db
+        from models import CrawlFrontier
+
+        counts = dict(db.session.query(CrawlFrontier.status, func.count(CrawlFrontier.id))
+                      .group_by(CrawlFrontier.status).all())
+        pending_hosts = db.session.query(func.count(func.distinct(CrawlFrontier.host))).filter(
+            CrawlFrontier.status.in_(('pending', 'running'))
+        ).scalar()
+        eligible = db.session.query(func.count(CrawlFrontier.id)).filter(self._eligible(datetime.utcnow())).scalar()
+        return {
+            'pending': counts.get('pending', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'pending_hosts': pending_hosts,
+            'eligible': eligible
+        }
+
+
+class FrontierWorker:
+    """从队列中领取URL进行深度采集的工作进程，需要在应用上下文中运行"""
+
+    def __init__(self, frontier=None, batch_size=50, poll_interval=5):
+        """
+        初始化工作进程
+
+        Args:
+            frontier (Frontier): 采集队列，为空时使用共享实例
+            batch_size (int): 每批领取的数量，同一批在采集引擎上并发抓取
+            poll_interval (float): 队列为空时的等待间隔（秒）
+        """
+        self.frontier = frontier or get_frontier()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+
+    def run_once(self):
+        """
+        领取并处理一批URL
+
+        Returns:
+            int: 本批处理的数量，队列中没有到期的URL时返回0
+        """
+        from __init__ import db
+        from models import DataWarehouse
+
+        entries = self.frontier.claim(self.batch_size, self.owner)
+        if not entries:
+            return 0
+
+        topic_ids = {entry.warehouse_id for entry in entries if entry.warehouse_id}
+        topics = {topic.id: topic for topic in DataWarehouse.query.filter(DataWarehouse.id.in_(topic_ids))}
+        rules = match_rules(topics.values())
+
+        jobs = []
+        for entry in entries:
+            topic = topics.get(entry.warehouse_id)
+            rule = rules.get(topic.id) if topic else None
+            if topic is None:
+                self.frontier.fail(entry, '数据仓库记录不存在', retry=False)
+            elif rule is None:
+                self.frontier.fail(entry, f'未找到来源为{topic.source}的采集规则', retry=False)
+            else:
+                jobs.append(detail_job(entry, topic, rule, entry.url))
+
+        # 同一批URL并发抓取和提取，各站点的请求速率和并发数受限流器约束，结果按批写库
+        load_rule_overrides()
+        writer = DetailWriter()
+        for job, result in iter_detail_results(jobs):
+            entry = job.key
+            if isinstance(result, Exception):
+                logger.warning(f"深度采集失败：{entry.url}，{result}")
+                self.frontier.fail(entry, str(result) or result.__class__.__name__)
+                continue
+            writer.add(entry.warehouse_id, result, job.rule, tag=entry)
+            if writer.full:
+                self._finish(writer.flush())
+                db.session.commit()
+        self._finish(writer.flush())
+        db.session.commit()
+        return len(entries)
+
+    def _finish(self, written):
+        for entry, result in written:
+            if result['collected']:
+                self.frontier.complete(entry)
+            else:
+                self.frontier.fail(entry, result['error'], retry=False)
+
+    def run(self, drain=False, stop_event=None):
+        """
+        持续处理队列
+
+        Args:
+            drain (bool): 为True时队列中没有到期的URL即退出
+            stop_event (threading.Event): 设置后在当前批次结束时退出
+
+        Returns:
+            int: 处理的总数量
+        """
+        total = 0
+        while stop_event is None or not stop_event.is_set():
+            processed = self.run_once()
+            total += processed
+            if processed:
+                continue
+            if drain:
+                break
+            if stop_event is not None:
+                stop_event.wait(self.poll_interval)
+            else:
+                time.sleep(self.poll_interval)
+        return total
+
+
+_frontier = None
+_frontier_lock = threading.Lock()
+
+
+def get_frontier():
+    """
+    获取进程级共享的采集队列
+
+    Returns:
+        Frontier: 共享队列实例
+    """
+    global _frontier
+    if _frontier is None:
+        with _frontier_lock:
+            if _frontier is None:
+                _frontier = Frontier(
+                    lease_seconds=int(get_config_value('FRONTIER_LEASE_SECONDS', 300)),
+                    max_attempts=int(get_config_value('FRONTIER_MAX_ATTEMPTS', 5)),
+                    retry_base=float(get_config_value('FRONTIER_RETRY_BASE', 60)),
+                    retry_max=float(get_config_value('FRONTIER_RETRY_MAX', 3600))
+                )
+    return _frontier
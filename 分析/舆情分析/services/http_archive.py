@@ -0,0 +1,176 @@
+import base64
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+
+from utils.config_helper import get_config_value
+
+MODES = ('off', 'record', 'replay')
+
+
+class ArchiveMiss(LookupError):
+    """回放模式下归档中没有该请求的记录"""
+
+
+class ArchivedResponse:
+    """归档中的一条响应"""
+
+    __slots__ = ('method', 'url', 'final_url', 'status_code', 'headers', 'content', 'truncated')
+
+    def __init__(self, method, url, final_url, status_code, headers, content, truncated=False):
+        self.method = method
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.truncated = truncated
+
+
+class HttpArchive:
+    """
+    HTTP录制与回放归档
+
+    录制模式下把每次抓取的请求方法、地址、状态码、响应头和正文追加写入gzip压缩的JSON Lines文件，
+    每次写入为一个独立的gzip成员，进程中断也不会损坏已写入的记录；回放模式下一次性载入归档，
+    按请求方法和地址返回最近一次录制的响应，不访问网络，未录制的请求抛出ArchiveMiss。
+    """
+
+    def __init__(self, path, mode='off'):
+        """
+        初始化归档
+
+        Args:
+            path (str): 归档文件路径
+            mode (str): off、record或replay
+        """
+        if mode not in MODES:
+            raise ValueError(f'不支持的归档模式：{mode}')
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = None
+        self._counts = {'recorded': 0, 'replayed': 0, 'misses': 0}
+
+    @property
+    def recording(self):
+        return self.mode == 'record'
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    @staticmethod
+    def key_of(method, url):
+        """归档中请求的查找键"""
+        return f'{method.upper()} {url}'
+
+    def record(self, method, url, final_url, status_code, headers, content, truncated=False):
+        """
+        追加一条记录，非录制模式时忽略
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求地址
+            final_url (str): 跟随重定向后的最终地址
+            status_code (int): 状态码
+            headers (dict): 响应头
+            content (bytes): 响应正文，流式下载被截断时为已读取的部分
+            truncated (bool): 正文是否因超出大小上限被截断
+        """
+        if not self.recording:
+            return
+        line = json.dumps({
+            'method': method.upper(),
+            'url': url,
+            'final_url': final_url,
+            'status': status_code,
+            'headers': list(headers.items()),
+            'body': base64.b64encode(content or b'').decode('ascii'),
+            'truncated': truncated,
+            'recorded_at': datetime.utcnow().isoformat()
+        }, ensure_ascii=False).encode('utf-8') + b'\n'
+        data = gzip.compress(line)
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self._counts['recorded'] += 1
+
+    def _load(self):
+        entries = {}
+        if os.path.exists(self.path):
+            with gzip.open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    # 同一请求录制多次时使用最后一次
+                    entries[self.key_of(item['method'], item['url'])] = ArchivedResponse(
+                        item['method'], item['url'], item.get('final_url') or item['url'], item['status'],
+                        dict(item['headers']), base64.b64decode(item['body']), item.get('truncated', False)
+                    )
+        return entries
+
+    def lookup(self, method, url):
+        """
+        查找录制的响应
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求地址
+
+        Returns:
+            ArchivedResponse: 录制的响应
+
+        Raises:
+            ArchiveMiss: 归档中没有该请求
+        """
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._load()
+        entry = self._entries.get(self.key_of(method, url))
+        with self._lock:
+            self._counts['replayed' if entry is not None else 'misses'] += 1
+        if entry is None:
+            raise ArchiveMiss(f'归档中没有该请求：{method.upper()} {url}')
+        return entry
+
+    def stats(self):
+        """获取录制和回放统计"""
+        with self._lock:
+            return dict(self._counts, mode=self.mode, path=self.path,
+                        entries=len(self._entries) if self._entries is not None else None)
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_http_archive():
+    """
+    获取进程级共享的HTTP归档
+
+    Returns:
+        HttpArchive: 共享归档实例
+    """
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = HttpArchive(
+                    path=get_config_value('HTTP_ARCHIVE_PATH'),
+                    mode=get_config_value('HTTP_ARCHIVE_MODE', 'off')
+                )
+    return _archive
+
+
+def set_http_archive(archive):
+    """替换共享归档，供基准测试脚本在录制和回放之间切换"""
+    global _archive
+    with _archive_lock:
+        _archive = archive
+    return archive
@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from services.async_engine import CrawlResponse, get_crawl_engine
+from services.fetch_timing import timed_parse
+from services.http_archive import get_http_archive
+from services.http_client import get_http_pool
+from utils.config_helper import get_config_value
+
+
+class CacheResult:
+    """条件请求的结果"""
+
+    def __init__(self, status_code, response, parsed=None, from_cache=False):
+        self.status_code = status_code
+        self.response = response
+        self.parsed = parsed
+        self.from_cache = from_cache
+
+
+class HttpCache:
+    """
+    基于磁盘的HTTP条件请求缓存
+
+    保存页面的ETag/Last-Modified、响应体及解析结果，再次抓取时发送If-None-Match/If-Modified-Since，
+    服务端返回304时直接使用缓存的解析结果，不再下载和解析页面。缓存总大小超过上限时按最近最少使用淘汰。
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            directory (str): 缓存目录
+            max_bytes (int): 缓存文件总大小上限（字节）
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        self._lookups = 0
+        self._hits = 0
+        self._stores = 0
+        self._evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key_of(url):
+        """获取URL对应的缓存键"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def _load_index(self):
+        """扫描缓存目录重建LRU索引，按文件修改时间由旧到新排列"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                key = name[:-5]
+                meta_path, body_path = self._paths(key)
+                try:
+                    size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+                    entries.append((os.path.getmtime(meta_path), key, size))
+                except OSError:
+                    continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _read(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    @staticmethod
+    def _write_atomic(path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write(self, key, meta, body=None):
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        if body is not None:
+            self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+
+        evicted = []
+        with self._lock:
+            self._total_bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self._total_bytes -= old_size
+                self._evictions += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def _remove_files(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _touch(self, key):
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(self._paths(key)[0])
+        except OSError:
+            pass
+
+    def _discard(self, key):
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        self._remove_files(key)
+
+    def fetch(self, url, parse, parse_key, headers=None, max_bytes=None, content_types=None, **kwargs):
+        """
+        发送条件请求，返回页面的解析结果
+
+        Args:
+            url (str): 请求地址
+            parse (callable): 解析函数，参数为响应对象，可在其中设置response.encoding，返回值需可JSON序列化
+            parse_key (str): 解析结果的缓存键，解析规则变化时应使用新的键
+            headers (dict): 请求头
+            max_bytes (int): 指定时流式下载并增量解析，正文最多读取的字节数，响应对象带有tree属性
+            content_types (iterable): 流式下载时允许的MIME类型
+            **kwargs: 传给HTTP会话池的其他请求参数
+
+        Returns:
+            CacheResult: 状态码、响应对象和解析结果，请求失败时解析结果为None
+        """
+        key, meta, body, request_headers = self._prepare(url, headers)
+        if max_bytes:
+            response = get_http_pool().get_page(url, max_bytes, content_types, headers=request_headers, **kwargs)
+        else:
+            response = get_http_pool().get(url, headers=request_headers, **kwargs)
+        return self._complete(url, key, meta, body, response, parse, parse_key)
+
+    async def fetch_async(self, url, parse, parse_key, headers=None, label='other'):
+        """
+        发送条件请求，返回页面的解析结果（协程版本，在采集引擎的事件循环中执行）
+
+        请求经采集引擎发送，不占用线程；读写缓存文件和解析页面放到线程池中执行，避免阻塞事件循环。
+
+        Args:
+            url (str): 请求地址
+            parse (callable): 解析函数，同fetch
+            parse_key (str): 解析结果的缓存键
+            headers (dict): 请求头
+            label (str): 抓取用途，耗时统计按用途汇总
+
+        Returns:
+            CacheResult: 状态码、响应对象和解析结果，请求失败时解析结果为None
+        """
+        loop = asyncio.get_running_loop()
+        key, meta, body, request_headers = await loop.run_in_executor(None, self._prepare, url, headers)
+        response = await get_crawl_engine().fetch(url, headers=request_headers, label=label)
+        return await loop.run_in_executor(None, self._complete, url, key, meta, body, response, parse, parse_key)
+
+    def _prepare(self, url, headers):
+        """读取缓存条目，返回(缓存键, 元数据, 响应体, 带条件请求头的请求头)"""
+        key = self.key_of(url)
+        meta, body = self._read(key) if key in self._index else (None, None)
+        if meta is not None and meta.get('url') != url:
+            meta, body = None, None
+
+        request_headers = dict(headers or {})
+        # 录制时不发送条件请求，保证归档中保存的是完整页面，离线回放不依赖本地缓存
+        if meta is not None and not get_http_archive().recording:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+        return key, meta, body, request_headers
+
+    def _complete(self, url, key, meta, body, response, parse, parse_key):
+        """按响应状态使用缓存的解析结果或解析新页面并写入缓存"""
+        with self._lock:
+            self._lookups += 1
+
+        if response.status_code == 304 and meta is not None:
+            with self._lock:
+                self._hits += 1
+            cached = CrawlResponse(url, 200, meta.get('headers', {}), body, meta.get('encoding'))
+            parsed_results = meta.setdefault('parsed', {})
+            if parse_key in parsed_results:
+                self._touch(key)
+            else:
+                parsed_results[parse_key] = parse(cached)
+                meta['encoding'] = cached.encoding
+                self._write(key, meta)
+            return CacheResult(200, cached, parsed_results[parse_key], from_cache=True)
+
+        if response.status_code != 200:
+            return CacheResult(response.status_code, response)
+
+        parsed = timed_parse(response, parse, response)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        storable = not getattr(response, 'truncated', False) and len(response.content) <= self.max_bytes
+        if (etag or last_modified) and 'no-store' not in cache_control and storable:
+            self._write(key, {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'encoding': response.encoding,
+                'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                'parsed': {parse_key: parsed}
+            }, response.content)
+            with self._lock:
+                self._stores += 1
+        elif key in self._index:
+            # 页面不再提供校验字段，旧缓存无法再验证
+            self._discard(key)
+        return CacheResult(200, response, parsed)
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 条目数、占用空间、命中率等
+        """
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'lookups': self._lookups,
+                'hits': self._hits,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'hit_ratio': round(self._hits / self._lookups, 4) if self._lookups else 0.0
+            }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            self._remove_files(key)
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """
+    获取进程级共享的HTTP缓存
+
+    Returns:
+        HttpCache: 共享缓存实例
+    """
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache(
+                    directory=get_config_value('HTTP_CACHE_DIR'),
+                    max_bytes=int(get_config_value('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+                )
+    return _http_cache
@@ -0,0 +1,497 @@
+import threading
+from contextlib import ExitStack
+from datetime import timedelta
+from http.cookiejar import DefaultCookiePolicy
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from services.encoding import IncrementalHtmlParser
+from services.http_archive import get_http_archive
+from services.fetch_timing import (FetchTiming, active_timing, elapsed_ms, get_fetch_metrics, reset_active_timing,
+                                   set_active_timing)
+from services.rate_limiter import get_rate_limiter
+from services.retry import get_retry_policy
+from utils.config_helper import get_config_value
+
+
+class _PoolCounter:
+    """单个主机的连接复用计数器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests_count = self.requests
+            new_connections = self.new_connections
+        # 每次新建连接都记为一次未命中，其余请求复用了已有的keep-alive连接
+        misses = min(new_connections, requests_count)
+        return {
+            'requests': requests_count,
+            'pool_hits': requests_count - misses,
+            'pool_misses': misses,
+        }
+
+
+class _TimedConnectionMixin:
+    """记录建立连接（含DNS解析）和TLS握手耗时，写入当前线程正在进行的请求"""
+
+    _socket_ms = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._socket_ms = elapsed_ms(started)
+            timing = active_timing()
+            if timing is not None:
+                timing.add('connect', self._socket_ms)
+                timing.reused = False
+
+    def connect(self):
+        started = time.perf_counter()
+        self._socket_ms = 0.0
+        super().connect()
+        timing = active_timing()
+        if timing is not None and isinstance(self, HTTPSConnection):
+            timing.add('tls', elapsed_ms(started) - self._socket_ms)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    counter = None
+    ConnectionCls = _TimedHTTPConnection
+
+    def _new_conn(self):
+        if self.counter is not None:
+            self.counter.add_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    counter = None
+    ConnectionCls = _TimedHTTPSConnection
+
+    def _new_conn(self):
+        if self.counter is not None:
+            self.counter.add_connection()
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """记录新建连接数量的HTTPAdapter，用于统计连接池命中情况"""
+
+    def __init__(self, counter, **kwargs):
+        self.counter = counter
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # 为每个适配器生成绑定了计数器的连接池类
+        http_pool = type('CountingHTTPConnectionPool', (_CountingHTTPConnectionPool,), {'counter': self.counter})
+        https_pool = type('CountingHTTPSConnectionPool', (_CountingHTTPSConnectionPool,), {'counter': self.counter})
+        self.poolmanager.pool_classes_by_scheme = {'http': http_pool, 'https': https_pool}
+
+    def send(self, request, **kwargs):
+        self.counter.add_request()
+        return super().send(request, **kwargs)
+
+
+class DownloadRejected(requests.RequestException):
+    """响应的内容类型不在允许范围内，已放弃下载"""
+
+
+def check_content_type(headers, content_types):
+    """
+    检查响应的内容类型
+
+    Args:
+        headers (dict): 响应头
+        content_types (iterable): 允许的MIME类型，为空时不限制；未返回Content-Type的响应视为允许
+
+    Raises:
+        DownloadRejected: 内容类型不在允许范围内
+    """
+    if not content_types:
+        return
+    content_type = (headers.get('Content-Type') or '').split(';')[0].strip().lower()
+    if content_type and content_type not in content_types:
+        raise DownloadRejected(f'不支持的内容类型：{content_type}')
+
+
+class PageResponse:
+    """流式下载的页面，正文最多保留max_bytes字节，tree为边下载边解析得到的文档树"""
+
+    def __init__(self, url, status_code, headers, content=b'', encoding=None, tree=None, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.tree = tree
+        self.truncated = truncated
+        self.timing = None
+
+    @property
+    def text(self):
+        """按encoding解码后的页面文本"""
+        try:
+            return self.content.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+# 连接失败、超时和响应体中断属于临时故障，可以重试
+_RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def _release_on_close(response, slot):
+    """流式响应在关闭时释放主机的并发名额，重复关闭只释放一次"""
+    close = response.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            slot.close()
+
+    response.close = close_and_release
+
+
+class HttpSessionPool:
+    """
+    线程安全的HTTP会话池
+
+    按主机（scheme + netloc）维护独立的requests.Session，每个会话挂载带连接池的适配器，
+    同一主机的请求复用keep-alive连接，避免每次抓取都重新进行TCP和TLS握手。
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, pool_block=False):
+        """
+        初始化会话池
+
+        Args:
+            pool_connections (int): 每个会话缓存的连接池数量
+            pool_maxsize (int): 每个主机连接池保持的最大连接数
+            pool_block (bool): 连接池耗尽时是否阻塞等待空闲连接
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._counters = {}
+
+    @staticmethod
+    def host_key(url):
+        """获取URL对应的主机键"""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def _create_session(self, counter):
+        session = requests.Session()
+        # 会话在不同用户、不同请求之间共享，不保存服务端下发的Cookie，
+        # 每次请求显式传入的cookies参数不受影响
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _CountingAdapter(
+            counter,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get_session(self, url):
+        """
+        获取URL所属主机的共享会话
+
+        Args:
+            url (str): 请求地址
+
+        Returns:
+            requests.Session: 该主机的共享会话
+        """
+        key = self.host_key(url)
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                counter = _PoolCounter()
+                session = self._create_session(counter)
+                self._sessions[key] = session
+                self._counters[key] = counter
+            return session
+
+    def request(self, method, url, retry_policy=None, label='other', **kwargs):
+        """
+        通过共享会话发送请求，参数与requests.request一致
+
+        请求受主机限流器约束；连接失败、超时和可重试的状态码按重试策略退避后重试，
+        未指定timeout时使用策略中的连接超时和读取超时。stream=True时主机的并发名额一直占用到
+        调用方关闭响应，正文下载同样受并发上限约束，调用方必须关闭响应。
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求地址
+            retry_policy (RetryPolicy): 重试策略，为空时使用共享策略
+            label (str): 抓取用途，耗时统计按用途汇总
+
+        Returns:
+            requests.Response: 最后一次请求的响应，重试用尽仍为可重试状态码时照常返回；timing属性为耗时分解，
+                stream=True时正文下载耗时由调用方计入并记录
+        """
+        archive = get_http_archive()
+        if archive.replaying:
+            return self._replay(archive, method, url, label, kwargs.get('stream', False))
+
+        policy = retry_policy or get_retry_policy()
+        kwargs.setdefault('timeout', policy.timeout)
+        session = self.get_session(url)
+        timing = FetchTiming(url, label)
+        token = set_active_timing(timing)
+        attempt = 0
+        try:
+            while True:
+                timing.attempts = attempt + 1
+                slot = ExitStack()
+                try:
+                    waited = time.perf_counter()
+                    slot.enter_context(get_rate_limiter().limit(url))
+                    timing.add('wait', elapsed_ms(waited))
+                    connect_ms = timing.phases.get('connect', 0.0) + timing.phases.get('tls', 0.0)
+                    sent = time.perf_counter()
+                    response = session.request(method, url, **kwargs)
+                    request_ms = elapsed_ms(sent)
+                except _RETRY_EXCEPTIONS as e:
+                    slot.close()
+                    delay = policy.retry_delay(attempt, method)
+                    if delay is None:
+                        policy.record(attempt + 1, False)
+                        timing.error = e.__class__.__name__
+                        get_fetch_metrics().record(timing)
+                        raise
+                except BaseException:
+                    slot.close()
+                    raise
+                else:
+                    delay = policy.retry_delay(attempt, method, response.status_code, response.headers)
+                    if delay is None:
+                        policy.record(attempt + 1, not policy.should_retry_status(response.status_code))
+                        # elapsed为发出请求到解析完响应头的时间，其中包含本次新建连接的耗时
+                        headers_ms = response.elapsed.total_seconds() * 1000
+                        new_connect_ms = timing.phases.get('connect', 0.0) + timing.phases.get('tls', 0.0) - connect_ms
+                        timing.add('ttfb', headers_ms - new_connect_ms)
+                        if timing.reused is None:
+                            timing.reused = True
+                        timing.status = response.status_code
+                        response.timing = timing
+                        if kwargs.get('stream'):
+                            _release_on_close(response, slot)
+                        else:
+                            slot.close()
+                            timing.add('download', request_ms - headers_ms)
+                            timing.bytes = len(response.content)
+                            get_fetch_metrics().record(timing)
+                            archive.record(method, url, response.url, response.status_code, response.headers,
+                                           response.content)
+                        return response
+                    response.close()
+                    slot.close()
+                # 退避等待不占用主机的并发名额
+                timing.add('backoff', delay * 1000)
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            reset_active_timing(token)
+
+    @staticmethod
+    def _replay(archive, method, url, label, stream):
+        """从归档中构造录制的响应，不访问网络"""
+        timing = FetchTiming(url, label)
+        timing.attempts = 1
+        try:
+            entry = archive.lookup(method, url)
+        except Exception as e:
+            timing.error = e.__class__.__name__
+            get_fetch_metrics().record(timing)
+            raise
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.url = entry.final_url
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(0)
+        response._content = entry.content
+        response._content_consumed = True
+        # 录制时被截断的页面，回放时同样标记为截断
+        response.truncated = entry.truncated
+        timing.status = entry.status_code
+        timing.reused = True
+        response.timing = timing
+        if not stream:
+            timing.bytes = len(entry.content)
+            get_fetch_metrics().record(timing)
+        return response
+
+    def get(self, url, **kwargs):
+        """通过共享会话发送GET请求"""
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('GET', url, **kwargs)
+
+    def get_page(self, url, max_bytes, content_types=None, chunk_size=65536, **kwargs):
+        """
+        流式下载HTML页面，下载的同时增量解析
+
+        内容类型不符时读取正文前即中止；正文超过max_bytes时停止读取并丢弃连接，
+        已收到的部分照常解析，因此无论上游返回什么，单个页面占用的内存都有上限。
+
+        Args:
+            url (str): 请求地址
+            max_bytes (int): 最多读取的正文字节数
+            content_types (iterable): 允许的MIME类型，为空时不限制
+            chunk_size (int): 每次读取的字节数
+            **kwargs: 其他请求参数
+
+        Returns:
+            PageResponse: 下载结果，非200响应不读取正文
+
+        Raises:
+            DownloadRejected: 内容类型不在允许范围内
+        """
+        response = self.get(url, stream=True, **kwargs)
+        timing = response.timing
+        body_started = time.perf_counter()
+        parse_ms = 0.0
+        chunks = []
+        truncated = False
+        try:
+            if response.status_code != 200:
+                return PageResponse(response.url, response.status_code, response.headers)
+            check_content_type(response.headers, content_types)
+
+            parser = IncrementalHtmlParser(response.headers, response.url)
+            received = 0
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if received + len(chunk) > max_bytes:
+                    chunk = chunk[:max_bytes - received]
+                    truncated = True
+                chunks.append(chunk)
+                received += len(chunk)
+                started = time.perf_counter()
+                parser.feed(chunk)
+                parse_ms += elapsed_ms(started)
+                if truncated:
+                    break
+            started = time.perf_counter()
+            tree = parser.close()
+            parse_ms += elapsed_ms(started)
+            truncated = truncated or getattr(response, 'truncated', False)
+            timing.bytes = received
+            page = PageResponse(response.url, response.status_code, response.headers,
+                                b''.join(chunks), parser.encoding, tree, truncated)
+            page.timing = timing
+            return page
+        except Exception as e:
+            timing.error = e.__class__.__name__
+            raise
+        finally:
+            response.close()
+            # 增量解析与下载交替进行，解析耗时单独计入
+            timing.add('download', elapsed_ms(body_started) - parse_ms)
+            timing.add('parse', parse_ms)
+            get_fetch_metrics().record(timing)
+            # 录制的是实际读取的部分，回放时得到与本次相同的截断结果
+            get_http_archive().record('GET', url, response.url, response.status_code, response.headers,
+                                      b''.join(chunks), truncated)
+
+    def head(self, url, **kwargs):
+        """通过共享会话发送HEAD请求"""
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def stats(self):
+        """
+        获取连接池统计信息
+
+        Returns:
+            dict: 汇总及按主机划分的请求数、连接池命中数和未命中数
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        hosts = {key: counter.snapshot() for key, counter in counters.items()}
+        total = {'requests': 0, 'pool_hits': 0, 'pool_misses': 0}
+        for item in hosts.values():
+            for field in total:
+                total[field] += item[field]
+        total['hit_ratio'] = round(total['pool_hits'] / total['requests'], 4) if total['requests'] else 0.0
+
+        return {
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'pool_block': self.pool_block,
+            'total': total,
+            'hosts': hosts
+        }
+
+    def close(self):
+        """关闭所有会话并释放连接"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._counters.clear()
+        for session in sessions:
+            session.close()
+
+
+_http_pool = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool():
+    """
+    获取进程级共享的HTTP会话池
+
+    Returns:
+        HttpSessionPool: 共享会话池实例
+    """
+    global _http_pool
+    if _http_pool is None:
+        with _http_pool_lock:
+            if _http_pool is None:
+                _http_pool = HttpSessionPool(
+                    pool_connections=int(get_config_value('HTTP_POOL_CONNECTIONS', 10)),
+                    pool_maxsize=int(get_config_value('HTTP_POOL_MAXSIZE', 20)),
+                    pool_block=bool(get_config_value('HTTP_POOL_BLOCK', False))
+                )
+    return _http_pool
@@ -0,0 +1,336 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import update
+
+from services.detail_collector import DetailWriter, detail_job, iter_detail_results, match_rules
+from services.rate_limiter import load_rule_overrides
+from services.scheduler import create_celery, get_scheduler
+from utils.config_helper import get_config_value
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('celery', 'thread', 'eager')
+FINISHED_STATUSES = ('success', 'failed', 'cancelled')
+
+# 作业类型 -> 处理函数
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """注册作业处理函数，处理函数接收(作业, 参数, 进度)，返回结果说明"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobCancelled(Exception):
+    """作业已被请求取消"""
+
+
+class JobProgress:
+    """
+    作业进度
+
+    处理函数每处理一条调用advance，距上次保存超过interval秒时把已完成和失败的条数写入作业记录并提交，
+    同时检查是否已请求取消，已请求时抛出JobCancelled，处理函数在当前位置停止。
+    """
+
+    def __init__(self, job, interval=1.0):
+        self.job = job
+        self.interval = interval
+        self._saved_at = time.monotonic()
+
+    def advance(self, done=0, failed=0):
+        """记录处理结果"""
+        self.job.done = (self.job.done or 0) + done
+        self.job.failed = (self.job.failed or 0) + failed
+        if time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self, check_cancel=True):
+        """
+        提交进度，处理函数写库后调用，保证进度与已写入的数据一致
+
+        Raises:
+            JobCancelled: check_cancel为True且已请求取消
+        """
+        from __init__ import db
+        from models import CrawlJob
+
+        db.session.commit()
+        self._saved_at = time.monotonic()
+        if check_cancel and db.session.query(CrawlJob.cancel_requested).filter(CrawlJob.id == self.job.id).scalar():
+            raise JobCancelled()
+
+
+@job_handler('detail')
+def run_detail_job(job, params, progress):
+    """批量详细内容采集"""
+    from models import DataWarehouse
+
+    topics = DataWarehouse.query.filter(DataWarehouse.id.in_(params.get('ids') or [])).all()
+    rules = match_rules(topics)
+    jobs = []
+    for topic in topics:
+        rule = rules.get(topic.id)
+        if topic.url and rule:
+            jobs.append(detail_job(topic.id, topic, rule))
+    # 不存在、缺少URL或没有采集规则的记录直接计为失败
+    progress.advance(failed=job.total - len(jobs))
+
+    load_rule_overrides()
+    writer = DetailWriter()
+
+    def write_batch(check_cancel=True):
+        for _, result in writer.flush():
+            if result['collected']:
+                job.done += 1
+            else:
+                job.failed += 1
+        progress.save(check_cancel)
+
+    with closing(iter_detail_results(jobs)) as results:
+        try:
+            for item, result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"详细内容采集失败：{item.url}，{result}")
+                    progress.advance(failed=1)
+                    continue
+                writer.add(item.key, result, item.rule)
+                if writer.full:
+                    write_batch()
+                else:
+                    # 写入前也按间隔检查取消请求，慢站点不会拖长取消的等待时间
+                    progress.advance()
+        except JobCancelled:
+            # 已提取完成的结果照常保存，尚未完成的页面随生成器关闭而取消
+            write_batch(check_cancel=False)
+            raise
+    write_batch(check_cancel=False)
+    return f'批量采集完成，成功{job.done}条，失败{job.failed}条'
+
+
+def run_job(job_id):
+    """
+    执行后台作业并记录结果，需要在应用上下文中调用
+
+    作业以条件更新从pending改为running，同一作业被重复投递时只执行一次。
+
+    Args:
+        job_id (int): 作业ID
+
+    Returns:
+        CrawlJob: 作业记录，不存在或已被执行时返回None
+    """
+    from __init__ import db
+    from models import CrawlJob
+
+    claimed = db.session.execute(
+        update(CrawlJob)
+        .where(CrawlJob.id == job_id, CrawlJob.status == 'pending')
+        .values(status='running', started_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return None
+
+    job = CrawlJob.query.get(job_id)
+    progress = JobProgress(job, float(get_config_value('JOB_PROGRESS_INTERVAL', 1.0)))
+    try:
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            raise ValueError(f'不支持的作业类型：{job.kind}')
+        job.message = handler(job, json.loads(job.params or '{}'), progress)
+        job.status = 'success'
+    except JobCancelled:
+        job.status = 'cancelled'
+        job.message = f'已取消，成功{job.done}条，失败{job.failed}条'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"后台作业{job_id}运行失败：{str(e)}", exc_info=True)
+        job.status = 'failed'
+        job.message = str(e)
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"后台作业{job_id}（{job.kind}）完成：{job.status}，{job.message}")
+    return job
+
+
+class JobRunner:
+    """
+    后台作业执行器
+
+    提交时先写入作业记录再派发执行，接口立即返回作业ID，客户端轮询进度。配置为celery且消息队列可以
+    连接时投递到Celery，否则在进程内线程池中执行；eager在提交的线程中直接执行，用于测试和基准脚本。
+    """
+
+    def __init__(self, app, backend='thread', max_workers=2):
+        """
+        初始化执行器
+
+        Args:
+            app (Flask): 应用实例，线程池在其应用上下文中运行作业
+            backend (str): 执行方式，celery、thread或eager
+            max_workers (int): thread方式同时运行的作业数
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f'不支持的作业执行方式：{backend}')
+        self.app = app
+        self.celery = None
+        if backend == 'celery':
+            self.celery = self._connect_celery(app)
+            if self.celery is None:
+                backend = 'thread'
+        self.backend = backend
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+        self._counts = {'submitted': 0, 'cancelled': 0}
+
+    @staticmethod
+    def _connect_celery(app):
+        """优先复用定时采集的Celery实例注册作业任务，消息队列无法连接时返回None"""
+        celery = get_scheduler(app).celery or create_celery(app)
+        if celery is None:
+            logger.warning("未安装Celery，后台作业改为进程内执行")
+            return None
+        try:
+            with celery.connection_for_write() as conn:
+                conn.ensure_connection(max_retries=1, timeout=2)
+        except Exception as e:
+            logger.warning(f"无法连接Celery消息队列（{e}），后台作业改为进程内执行")
+            return None
+
+        if 'jobs.run' not in celery.tasks:
+            @celery.task(name='jobs.run')
+            def run_task(job_id):
+                with app.app_context():
+                    job = run_job(job_id)
+                    return job.status if job is not None else None
+        return celery
+
+    def _run_in_context(self, job_id):
+        from __init__ import db
+
+        try:
+            with self.app.app_context():
+                try:
+                    run_job(job_id)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error(f"后台作业{job_id}执行异常：{str(e)}", exc_info=True)
+
+    def dispatch(self, job_id):
+        """按配置的方式执行作业"""
+        if self.backend == 'celery':
+            self.celery.tasks['jobs.run'].delay(job_id)
+        elif self.backend == 'thread':
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crawl-job')
+            self._executor.submit(self._run_in_context, job_id)
+        else:
+            run_job(job_id)
+
+    def submit(self, kind, owner_id, params, total):
+        """
+        创建并派发作业，需要在应用上下文中调用
+
+        Args:
+            kind (str): 作业类型
+            owner_id (int): 提交者ID
+            params (dict): 作业参数
+            total (int): 需要处理的条数
+
+        Returns:
+            CrawlJob: 作业记录
+        """
+        from __init__ import db
+        from models import CrawlJob
+
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f'不支持的作业类型：{kind}')
+        job = CrawlJob(kind=kind, status='pending', params=json.dumps(params), total=total, done=0, failed=0,
+                       cancel_requested=False, owner_id=owner_id)
+        db.session.add(job)
+        db.session.commit()
+        with self._lock:
+            self._counts['submitted'] += 1
+        self.dispatch(job.id)
+        return job
+
+    def cancel(self, job):
+        """
+        请求取消作业，需要在应用上下文中调用；尚未开始的作业直接取消，运行中的作业在处理下一批前停止
+
+        Returns:
+            bool: 作业已结束时返回False
+        """
+        from __init__ import db
+        from models import CrawlJob
+
+        if job.status in FINISHED_STATUSES:
+            return False
+        if job.cancel_requested:
+            return True
+        job.cancel_requested = True
+        db.session.commit()
+        db.session.execute(
+            update(CrawlJob)
+            .where(CrawlJob.id == job.id, CrawlJob.status == 'pending')
+            .values(status='cancelled', message='已取消', finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        db.session.refresh(job)
+        with self._lock:
+            self._counts['cancelled'] += 1
+        return True
+
+    def stats(self):
+        """获取执行统计信息"""
+        with self._lock:
+            return dict(self._counts, backend=self.backend)
+
+    def shutdown(self):
+        """等待进程内正在运行的作业结束"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner(app=None):
+    """
+    获取进程级共享的作业执行器
+
+    Args:
+        app (Flask): 应用实例，为空时使用当前应用
+
+    Returns:
+        JobRunner: 共享执行器实例
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                app = app or current_app._get_current_object()
+                _runner = JobRunner(
+                    app,
+                    backend=app.config['JOB_BACKEND'],
+                    max_workers=int(app.config['JOB_WORKERS'])
+                )
+    return _runner
@@ -0,0 +1,256 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from utils.config_helper import get_config_value
+
+
+class Bs4Backend:
+    """基于BeautifulSoup(html.parser)的解析后端，兼容性最好但速度最慢"""
+
+    name = 'bs4'
+
+    def parse_baidu(self, html):
+        """
+        解析百度搜索结果页
+
+        Args:
+            html (str): 搜索结果页HTML
+
+        Returns:
+            list: 搜索结果列表
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        results = []
+
+        # 查找搜索结果列表
+        search_results = soup.find_all('div', class_='result')
+
+        for item in search_results:
+            try:
+                # 提取标题
+                title_tag = item.find('h3', class_='t')
+                if not title_tag:
+                    continue
+
+                title = title_tag.text.strip()
+
+                # 提取原始URL
+                link_tag = title_tag.find('a')
+                if not link_tag or not link_tag.get('href'):
+                    continue
+
+                original_url = link_tag.get('href')
+
+                # 提取摘要（尝试多种可能的CSS类）
+                abstract = ""
+                abstract_tags = [
+                    item.find('span', class_='summary-text_560AW'),  # 新的摘要class
+                    item.find('div', class_='c-abstract'),
+                    item.find('div', class_='content-right_8Zs40'),
+                    item.find('div', class_='c-summary-160s'),
+                    item.find('div', class_='c-summary')
+                ]
+                for tag in abstract_tags:
+                    if tag:
+                        abstract = tag.text.strip()
+                        break
+
+                # 提取来源（尝试多种可能的CSS类）
+                source = ""
+                source_tags = [
+                    item.find('span', class_='cosc-source-text'),  # 新的来源class
+                    item.find('span', class_='cosc-source'),  # 新的来源class
+                    item.find('div', class_='cosc-source'),  # 新的来源class
+                    item.find('a', class_='c-showurl'),
+                    item.find('span', class_='c-showurl'),
+                    item.find('div', class_='c-showurl'),
+                    item.find('span', class_='site-host')
+                ]
+                for tag in source_tags:
+                    if tag:
+                        source = tag.text.strip()
+                        break
+
+                # 如果没有找到来源，尝试从URL中提取
+                if not source and original_url:
+                    source = urlparse(original_url).netloc
+
+                # 提取封面图片
+                img_tag = item.find('img', class_='general_image_pic')
+                cover = img_tag.get('src') if img_tag else ""
+
+                # 如果没有找到图片，尝试从其他地方提取
+                if not cover:
+                    img_match = re.search(r'<img[^>]+src="([^"]+)"[^>]*>', str(item))
+                    if img_match:
+                        cover = img_match.group(1)
+
+                results.append({
+                    "title": title,
+                    "summary": abstract,
+                    "cover": cover,
+                    "url": original_url,
+                    "source": source
+                })
+
+            except Exception as e:
+                print(f"解析单个结果失败：{e}")
+                continue
+
+        return results
+
+
+class LxmlBackend:
+    """
+    基于lxml的解析后端
+
+    结果节点用预编译的XPath定位，每个结果节点只遍历一次子树，按(标签, class)记录
+    第一个匹配的元素，再按原有的优先级选取摘要、来源和封面，不再对同一子树反复查找和序列化。
+    """
+
+    name = 'lxml'
+
+    # 摘要、来源候选按优先级排列，与Bs4Backend保持一致
+    BAIDU_ABSTRACT = (
+        ('span', 'summary-text_560AW'),
+        ('div', 'c-abstract'),
+        ('div', 'content-right_8Zs40'),
+        ('div', 'c-summary-160s'),
+        ('div', 'c-summary'),
+    )
+    BAIDU_SOURCE = (
+        ('span', 'cosc-source-text'),
+        ('span', 'cosc-source'),
+        ('div', 'cosc-source'),
+        ('a', 'c-showurl'),
+        ('span', 'c-showurl'),
+        ('div', 'c-showurl'),
+        ('span', 'site-host'),
+    )
+    BAIDU_TITLE = ('h3', 't')
+    BAIDU_COVER = ('img', 'general_image_pic')
+
+    _baidu_results = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' result ')]")
+
+    def __init__(self):
+        # lxml解析器不能在多个线程中同时使用，每个线程各持有一个
+        self._local = threading.local()
+        self._baidu_wanted = {}
+        for key in self.BAIDU_ABSTRACT + self.BAIDU_SOURCE + (self.BAIDU_TITLE, self.BAIDU_COVER):
+            self._baidu_wanted.setdefault(key[0], set()).add(key[1])
+
+    def _tree(self, html):
+        if not html:
+            return None
+        if isinstance(html, str):
+            # 已解码的文本去掉XML声明，避免lxml拒绝带编码声明的Unicode字符串
+            html = re.sub(r'^\s*<\?xml[^>]*\?>', '', html)
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            parser = self._local.parser = etree.HTMLParser(remove_comments=True, remove_pis=True)
+        tree = etree.fromstring(html, parser)
+        if tree is not None:
+            # 与BeautifulSoup的get_text一致，脚本和样式不计入文本
+            etree.strip_elements(tree, 'script', 'style', with_tail=False)
+        return tree
+
+    @staticmethod
+    def _text(el):
+        return ''.join(el.itertext()).strip()
+
+    def parse_baidu(self, html):
+        """
+        解析百度搜索结果页
+
+        Args:
+            html (str|bytes): 搜索结果页HTML
+
+        Returns:
+            list: 搜索结果列表
+        """
+        tree = self._tree(html)
+        if tree is None:
+            return []
+
+        wanted = self._baidu_wanted
+        results = []
+        for item in self._baidu_results(tree):
+            try:
+                # 单次遍历子树，记录每种(标签, class)第一个出现的元素及第一个带src的图片
+                found = {}
+                first_img_src = None
+                for el in item.iterdescendants():
+                    tag = el.tag
+                    if not isinstance(tag, str):
+                        continue
+                    if tag == 'img' and first_img_src is None and el.get('src'):
+                        first_img_src = el.get('src')
+                    names = wanted.get(tag)
+                    if names is None:
+                        continue
+                    for cls in el.get('class', '').split():
+                        if cls in names and (tag, cls) not in found:
+                            found[(tag, cls)] = el
+
+                title_tag = found.get(self.BAIDU_TITLE)
+                if title_tag is None:
+                    continue
+                link_tag = next(title_tag.iterdescendants('a'), None)
+                if link_tag is None or not link_tag.get('href'):
+                    continue
+                original_url = link_tag.get('href')
+
+                abstract = next((self._text(found[key]) for key in self.BAIDU_ABSTRACT if key in found), "")
+                source = next((self._text(found[key]) for key in self.BAIDU_SOURCE if key in found), "")
+                if not source and original_url:
+                    source = urlparse(original_url).netloc
+
+                cover_tag = found.get(self.BAIDU_COVER)
+                cover = (cover_tag.get('src') or "") if cover_tag is not None else ""
+                if not cover:
+                    cover = first_img_src or ""
+
+                results.append({
+                    "title": self._text(title_tag),
+                    "summary": abstract,
+                    "cover": cover,
+                    "url": original_url,
+                    "source": source
+                })
+
+            except Exception as e:
+                print(f"解析单个结果失败：{e}")
+                continue
+
+        return results
+
+
+PARSER_BACKENDS = {
+    LxmlBackend.name: LxmlBackend,
+    Bs4Backend.name: Bs4Backend,
+}
+
+_backends = {}
+
+
+def get_parser_backend(name=None):
+    """
+    获取HTML解析后端
+
+    Args:
+        name (str): 后端名称（lxml或bs4），为空时使用HTML_PARSER_BACKEND配置
+
+    Returns:
+        解析后端实例
+    """
+    name = (name or get_config_value('HTML_PARSER_BACKEND', 'lxml')).lower()
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f'不支持的解析后端：{name}')
+    backend = _backends.get(name)
+    if backend is None:
+        backend = _backends.setdefault(name, PARSER_BACKENDS[name]())
+    return backend
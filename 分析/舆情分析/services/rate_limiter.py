@@ -0,0 +1,293 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+from services.rule_index import normalize_host
+from utils.config_helper import get_config_value
+
+# 异步请求等待并发名额时轮询同步信号量的最长间隔（秒）
+_ASYNC_POLL_MAX = 0.05
+
+
+class _HostBucket:
+    """单个主机的令牌桶、并发上限和等待统计"""
+
+    def __init__(self, rps, max_in_flight, burst):
+        self.lock = threading.Lock()
+        self.configure(rps, max_in_flight, burst)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def configure(self, rps, max_in_flight, burst):
+        self.rps = float(rps)
+        self.burst = max(1.0, float(burst))
+        self.max_in_flight = int(max_in_flight)
+        # 限额变更时重新创建信号量，已持有旧信号量的请求结束后照常释放旧信号量；
+        # 同步请求和异步请求共用这一个信号量，单主机的在途请求总数不超过上限
+        self.semaphore = threading.BoundedSemaphore(self.max_in_flight)
+
+    def reserve(self):
+        """
+        预约一个令牌
+
+        令牌数允许为负，表示已被后续请求预约，返回值为调用方需要等待的秒数。
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.rps > 0:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rps)
+            self.updated_at = now
+            if self.rps <= 0:
+                return 0.0
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rps
+
+    def record(self, waited):
+        with self.lock:
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'rps': self.rps,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self.in_flight,
+                'acquired': self.acquired,
+                'total_wait': round(self.total_wait, 3),
+                'avg_wait': round(self.total_wait / self.acquired, 4) if self.acquired else 0.0,
+                'max_wait': round(self.max_wait, 3)
+            }
+
+
+class HostRateLimiter:
+    """
+    按主机名限速的进程级限流器
+
+    每个主机一个令牌桶（每秒请求数）和一个并发上限，同步请求与异步采集引擎共用同一组令牌和并发名额，
+    可按主机覆盖默认限额。主机名按normalize_host统一写法，www.前缀与否共用同一组限额。
+    """
+
+    def __init__(self, default_rps=5.0, default_max_in_flight=10, burst=10):
+        """
+        初始化限流器
+
+        Args:
+            default_rps (float): 默认每秒请求数，小于等于0表示不限速
+            default_max_in_flight (int): 默认单主机最大在途请求数
+            burst (int): 令牌桶容量，即空闲后允许瞬时发出的请求数
+        """
+        self.default_rps = default_rps
+        self.default_max_in_flight = default_max_in_flight
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._overrides = {}
+
+    @staticmethod
+    def host_of(url):
+        """
+        获取URL的主机名，统一写法后作为限额的键
+
+        Args:
+            url (str): 请求地址，或采集规则中可能没有写协议的站点地址
+
+        Returns:
+            str: 主机名，无法解析时返回空字符串
+        """
+        url = url or ''
+        try:
+            return normalize_host(urlsplit(url if '//' in url else f'//{url}').hostname)
+        except ValueError:
+            return ''
+
+    def _limits_for(self, host):
+        rps, max_in_flight = self._overrides.get(host, (None, None))
+        rps = self.default_rps if rps is None else rps
+        max_in_flight = self.default_max_in_flight if not max_in_flight else max_in_flight
+        # 令牌桶容量不超过并发上限，单独调低速率的站点不会被瞬时突发打满
+        return rps, max_in_flight, min(self.burst, max_in_flight) if rps > 0 else 1
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            return bucket
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = _HostBucket(*self._limits_for(host))
+                self._buckets[host] = bucket
+            return bucket
+
+    def set_host_limits(self, host, rps=None, max_in_flight=None):
+        """
+        设置主机的限额覆盖
+
+        Args:
+            host (str): 主机名
+            rps (float): 每秒请求数，为空时使用默认值
+            max_in_flight (int): 最大在途请求数，为空时使用默认值
+        """
+        host = normalize_host(host)
+        with self._lock:
+            if rps is None and max_in_flight is None:
+                self._overrides.pop(host, None)
+            else:
+                self._overrides[host] = (rps, max_in_flight)
+            bucket = self._buckets.get(host)
+        if bucket is not None:
+            limits = self._limits_for(host)
+            if limits != (bucket.rps, bucket.max_in_flight, bucket.burst):
+                with bucket.lock:
+                    bucket.configure(*limits)
+
+    def replace_overrides(self, overrides):
+        """
+        以新的覆盖配置整体替换现有覆盖
+
+        Args:
+            overrides (dict): 主机名到(rps, max_in_flight)的映射
+        """
+        with self._lock:
+            hosts = set(self._overrides) | set(overrides)
+        for host in hosts:
+            rps, max_in_flight = overrides.get(host, (None, None))
+            self.set_host_limits(host, rps, max_in_flight)
+
+    @contextmanager
+    def limit(self, url):
+        """
+        同步请求的限流上下文，进入时等待并发名额和令牌
+
+        Args:
+            url (str): 请求地址
+        """
+        bucket = self._bucket(self.host_of(url))
+        semaphore = bucket.semaphore
+        started = time.monotonic()
+        semaphore.acquire()
+        try:
+            delay = bucket.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            bucket.record(time.monotonic() - started)
+            with bucket.lock:
+                bucket.in_flight += 1
+            try:
+                yield
+            finally:
+                with bucket.lock:
+                    bucket.in_flight -= 1
+        finally:
+            semaphore.release()
+
+    @asynccontextmanager
+    async def limit_async(self, url):
+        """
+        异步请求的限流上下文，只在采集引擎的事件循环中使用
+
+        与同步请求共用同一个并发信号量：名额已满时不阻塞事件循环，而是非阻塞地轮询，轮询间隔逐步加长。
+
+        Args:
+            url (str): 请求地址
+        """
+        bucket = self._bucket(self.host_of(url))
+        semaphore = bucket.semaphore
+        started = time.monotonic()
+        poll = 0.001
+        while not semaphore.acquire(blocking=False):
+            await asyncio.sleep(poll)
+            poll = min(poll * 2, _ASYNC_POLL_MAX)
+        try:
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            bucket.record(time.monotonic() - started)
+            with bucket.lock:
+                bucket.in_flight += 1
+            try:
+                yield
+            finally:
+                with bucket.lock:
+                    bucket.in_flight -= 1
+        finally:
+            semaphore.release()
+
+    def stats(self):
+        """
+        获取限流统计信息
+
+        Returns:
+            dict: 默认限额及各主机的限额、在途请求数和等待时间
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            'default_rps': self.default_rps,
+            'default_max_in_flight': self.default_max_in_flight,
+            'burst': self.burst,
+            'hosts': {host: bucket.snapshot() for host, bucket in buckets.items()}
+        }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+_overrides_loaded_at = None
+
+
+def get_rate_limiter():
+    """
+    获取进程级共享的限流器
+
+    Returns:
+        HostRateLimiter: 共享限流器实例
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = HostRateLimiter(
+                    default_rps=float(get_config_value('CRAWL_HOST_RPS', 5.0)),
+                    default_max_in_flight=int(get_config_value('CRAWL_HOST_MAX_IN_FLIGHT', 10)),
+                    burst=int(get_config_value('CRAWL_HOST_BURST', 10))
+                )
+    return _limiter
+
+
+def load_rule_overrides(force=False):
+    """
+    从采集规则表加载按主机的限额覆盖，需要在应用上下文中调用
+
+    加载结果在CRAWL_LIMIT_RELOAD_SECONDS内复用，规则变更时传入force=True立即刷新。
+
+    Args:
+        force (bool): 是否忽略缓存时间强制重新加载
+    """
+    global _overrides_loaded_at
+    reload_seconds = int(get_config_value('CRAWL_LIMIT_RELOAD_SECONDS', 60))
+    now = time.monotonic()
+    if not force and _overrides_loaded_at is not None and now - _overrides_loaded_at < reload_seconds:
+        return
+
+    from models import CollectionRule
+    rules = CollectionRule.query.filter(
+        (CollectionRule.rate_limit_rps.isnot(None)) | (CollectionRule.max_concurrency.isnot(None))
+    ).all()
+
+    overrides = {}
+    limiter = get_rate_limiter()
+    for rule in rules:
+        host = limiter.host_of(rule.site_url or '')
+        if host:
+            overrides[host] = (rule.rate_limit_rps, rule.max_concurrency)
+    limiter.replace_overrides(overrides)
+    _overrides_loaded_at = now
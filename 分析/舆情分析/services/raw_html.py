@@ -0,0 +1,102 @@
+from sqlalchemy import text
+
+from utils.compression import codec_of, compress_text, decompress_text, resolve_codec
+
+# 按主键分批读取，每批只在内存中保留这一批页面
+_SELECT_BATCH = text(
+    'SELECT id, raw_html FROM detailed_content WHERE id > :last_id AND raw_html IS NOT NULL ORDER BY id LIMIT :limit'
+)
+_UPDATE = text('UPDATE detailed_content SET raw_html = :raw_html WHERE id = :row_id')
+
+
+def stored_bytes(value):
+    """数据库驱动返回的原始值统一为bytes，压缩之前写入的行可能是str"""
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return bytes(value)
+
+
+def iter_batches(conn, batch_size=500):
+    """
+    按主键分批读取原始HTML列，不经过模型的解压
+
+    Args:
+        conn: 数据库连接或会话
+        batch_size (int): 每批行数
+
+    Yields:
+        list: [(ID, 原始值)]
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(_SELECT_BATCH, {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            return
+        yield [(row[0], row[1]) for row in rows]
+        last_id = rows[-1][0]
+
+
+def compress_rows(conn, batch_size=500, codec='zstd', level=None, recompress=False):
+    """
+    分批压缩已有的原始HTML
+
+    每处理完一批即执行该批的更新并产出统计，本函数不提交事务；调用方在每次产出后提交，
+    单个事务只包含一批，中断后重新运行会跳过已压缩的行。
+
+    Args:
+        conn: 数据库连接或会话
+        batch_size (int): 每批行数
+        codec (str): 压缩格式，未安装zstandard时使用zlib
+        level (int): 压缩级别
+        recompress (bool): 已用其他格式压缩的行是否按codec重新压缩
+
+    Yields:
+        dict: 本批的扫描行数、改写行数和改写前后的字节数
+    """
+    codec = resolve_codec(codec)
+    for batch in iter_batches(conn, batch_size):
+        updates = []
+        before = after = 0
+        for row_id, value in batch:
+            data = stored_bytes(value)
+            current = codec_of(data)
+            if current == codec or (current is not None and not recompress):
+                continue
+            compressed = compress_text(decompress_text(data), codec, level)
+            updates.append({'row_id': row_id, 'raw_html': compressed})
+            before += len(data)
+            after += len(compressed)
+        if updates:
+            conn.execute(_UPDATE, updates)
+        yield {'scanned': len(batch), 'rewritten': len(updates), 'before_bytes': before, 'after_bytes': after}
+
+
+def compression_stats(conn, batch_size=500):
+    """
+    统计原始HTML的压缩情况，逐行解压计算原始大小
+
+    Args:
+        conn: 数据库连接或会话
+        batch_size (int): 每批行数
+
+    Returns:
+        dict: 行数、各压缩格式的行数、保存的字节数、解压后的字节数和压缩率
+    """
+    rows = 0
+    codecs = {'zstd': 0, 'zlib': 0, 'none': 0}
+    stored = original = 0
+    for batch in iter_batches(conn, batch_size):
+        for _, value in batch:
+            data = stored_bytes(value)
+            rows += 1
+            codecs[codec_of(data) or 'none'] += 1
+            stored += len(data)
+            original += len(decompress_text(data).encode('utf-8'))
+    return {
+        'rows': rows,
+        'codecs': codecs,
+        'stored_bytes': stored,
+        'original_bytes': original,
+        'ratio': round(original / stored, 2) if stored else None,
+        'saved_bytes': original - stored
+    }
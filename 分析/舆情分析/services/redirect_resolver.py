@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+
+from sqlalchemy.exc import IntegrityError
+
+from services.async_engine import get_crawl_engine
+from utils.config_helper import get_config_value
+
+# 跳转页不返回Location时，从meta refresh或脚本跳转中取目标地址
+_META_REFRESH = re.compile(r'<meta[^>]+http-equiv=["\']?refresh["\']?[^>]*url=([^"\'>]+)', re.I)
+_SCRIPT_LOCATION = re.compile(r'(?:window\.)?location(?:\.href)?(?:\.replace\()?\s*=?\s*\(?["\']([^"\']+)["\']', re.I)
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+# 数据库IN查询每批的URL数量
+_QUERY_CHUNK = 500
+
+
+class RedirectResolver:
+    """
+    跳转链接解析器
+
+    百度搜索结果中的链接是每次抓取都不同的跳转地址，入库前解析为文章的真实地址。
+    解析时不跟随重定向，先发HEAD请求读取Location，服务端不支持时再用GET读取跳转页；
+    所有待解析链接在采集引擎上并发请求，结果先查进程内缓存，再查持久化的跳转缓存表，
+    都未命中才发请求，解析成功的结果写回缓存表。
+    """
+
+    def __init__(self, prefixes, max_workers=16, max_hops=3, timeout=10, memory_size=10000):
+        """
+        初始化解析器
+
+        Args:
+            prefixes (iterable): 需要解析的跳转链接前缀（主机加路径，如www.baidu.com/link）
+            max_workers (int): 同时在途的解析请求数
+            max_hops (int): 最多连续跟随的跳转次数
+            timeout (float): 单次请求超时时间（秒）
+            memory_size (int): 进程内缓存的链接数量上限
+        """
+        self.prefixes = tuple(prefix.strip().lower() for prefix in prefixes if prefix.strip())
+        self.max_workers = max_workers
+        self.max_hops = max_hops
+        self.timeout = timeout
+        self.memory_size = memory_size
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._counts = {'memory_hits': 0, 'db_hits': 0, 'resolved': 0, 'failed': 0}
+
+    def needs_resolution(self, url):
+        """判断URL是否为需要解析的跳转链接"""
+        if not url:
+            return False
+        parsed = urlparse(url)
+        target = (parsed.hostname or '') + parsed.path
+        return target.lower().startswith(self.prefixes)
+
+    def is_redirector(self, url):
+        """判断URL是否为跳转链接或位于跳转服务的主机上，这类地址不能代表文章所在的站点"""
+        if self.needs_resolution(url):
+            return True
+        host = (urlparse(url or '').hostname or '').lower()
+        return bool(host) and any(prefix.split('/', 1)[0] == host for prefix in self.prefixes)
+
+    @staticmethod
+    def key_of(url):
+        """获取跳转链接在缓存表中的键"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _remember(self, mapping):
+        with self._lock:
+            for source, target in mapping.items():
+                self._memory.pop(source, None)
+                self._memory[source] = target
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _location_in_body(content, base_url):
+        text = content.decode('utf-8', errors='ignore')
+        match = _META_REFRESH.search(text) or _SCRIPT_LOCATION.search(text)
+        if not match:
+            return None
+        return urljoin(base_url, html.unescape(match.group(1).strip()))
+
+    async def _resolve_one(self, url, semaphore):
+        engine = get_crawl_engine()
+        current = url
+        async with semaphore:
+            for _ in range(self.max_hops):
+                response = await engine.fetch(current, method='HEAD', headers=_HEADERS,
+                                              timeout=self.timeout, allow_redirects=False, label='redirect')
+                if response.status_code in (403, 405, 501):
+                    # 不支持HEAD时改用GET，同样不跟随重定向
+                    response = await engine.fetch(current, headers=_HEADERS,
+                                                  timeout=self.timeout, allow_redirects=False,
+                                                  label='redirect')
+                location = response.headers.get('Location')
+                if response.status_code in (301, 302, 303, 307, 308) and location:
+                    current = urljoin(current, location)
+                elif response.status_code == 200:
+                    # 跳转页直接返回200时，目标地址在页面的meta refresh或脚本中
+                    if not response.content:
+                        response = await engine.fetch(current, headers=_HEADERS,
+                                                      timeout=self.timeout, allow_redirects=False,
+                                                      label='redirect')
+                    current = self._location_in_body(response.content, current)
+                    if not current:
+                        return None
+                else:
+                    return None
+                if not self.needs_resolution(current):
+                    # 已离开跳转服务，目标站点自身的跳转不再跟随
+                    return current
+        return None
+
+    async def _resolve_all(self, urls):
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results = await asyncio.gather(*[self._resolve_one(url, semaphore) for url in urls],
+                                       return_exceptions=True)
+        return {url: target for url, target in zip(urls, results)
+                if target and not isinstance(target, BaseException)}
+
+    def _load_cached(self, urls):
+        from models import RedirectCache
+
+        keys = {self.key_of(url): url for url in urls}
+        found = {}
+        key_list = list(keys)
+        for i in range(0, len(key_list), _QUERY_CHUNK):
+            rows = RedirectCache.query.filter(RedirectCache.source_hash.in_(key_list[i:i + _QUERY_CHUNK])).all()
+            for row in rows:
+                if keys.get(row.source_hash) == row.source_url:
+                    found[row.source_url] = row.target_url
+        return found
+
+    def _store(self, mapping):
+        from __init__ import db
+        from models import RedirectCache
+
+        if not mapping:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add_all([
+                    RedirectCache(source_hash=self.key_of(source), source_url=source, target_url=target,
+                                  resolved_at=datetime.utcnow())
+                    for source, target in mapping.items()
+                ])
+        except IntegrityError:
+            # 其他进程同时写入了相同的链接，结果一致，忽略即可
+            pass
+
+    def resolve_many(self, urls):
+        """
+        批量解析跳转链接，需要在应用上下文中调用
+
+        新的解析结果加入当前数据库会话，随调用方的提交一起写入。
+
+        Args:
+            urls (iterable): 链接列表，不需要解析的链接会被忽略
+
+        Returns:
+            dict: 跳转链接到真实地址的映射，解析失败的链接不在其中
+        """
+        pending = []
+        resolved = {}
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                if not self.needs_resolution(url):
+                    continue
+                target = self._memory.get(url)
+                if target:
+                    self._memory.move_to_end(url)
+                    self._counts['memory_hits'] += 1
+                    resolved[url] = target
+                else:
+                    pending.append(url)
+        if not pending:
+            return resolved
+
+        cached = self._load_cached(pending)
+        with self._lock:
+            self._counts['db_hits'] += len(cached)
+        pending = [url for url in pending if url not in cached]
+
+        fetched = {}
+        if pending:
+            fetched = get_crawl_engine().run(self._resolve_all(pending))
+            with self._lock:
+                self._counts['resolved'] += len(fetched)
+                self._counts['failed'] += len(pending) - len(fetched)
+            self._store(fetched)
+
+        self._remember({**cached, **fetched})
+        resolved.update(cached)
+        resolved.update(fetched)
+        return resolved
+
+    def rewrite(self, results):
+        """
+        将采集结果中的跳转链接替换为真实地址，来源为跳转服务域名时一并改为目标站点域名
+
+        Args:
+            results (list): 采集结果列表，原地修改
+
+        Returns:
+            int: 被替换的链接数量
+        """
+        mapping = self.resolve_many(item.get('url') for item in results)
+        rewritten = 0
+        for item in results:
+            target = mapping.get(item.get('url'))
+            if not target:
+                continue
+            if item.get('source') == urlparse(item['url']).netloc:
+                item['source'] = urlparse(target).netloc
+            item['url'] = target
+            rewritten += 1
+        return rewritten
+
+    def stats(self):
+        """获取缓存命中和解析统计"""
+        with self._lock:
+            return dict(self._counts, memory_entries=len(self._memory))
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_redirect_resolver():
+    """
+    获取进程级共享的跳转链接解析器
+
+    Returns:
+        RedirectResolver: 共享解析器实例
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = RedirectResolver(
+                    prefixes=get_config_value('REDIRECT_RESOLVE_PREFIXES', 'www.baidu.com/link,baidu.com/link').split(','),
+                    max_workers=int(get_config_value('REDIRECT_RESOLVE_WORKERS', 16)),
+                    timeout=float(get_config_value('REDIRECT_RESOLVE_TIMEOUT', 10)),
+                    memory_size=int(get_config_value('REDIRECT_MEMORY_SIZE', 10000))
+                )
+    return _resolver
@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from utils.config_helper import get_config_value
+
+
+class RetryPolicy:
+    """
+    采集请求的重试策略
+
+    对连接失败、超时以及可重试的状态码（默认429和5xx）按指数退避加随机抖动重试，
+    服务端返回Retry-After时按其要求等待；连接超时和读取超时分别设置。
+    """
+
+    # 只重试幂等的请求方法，避免重复提交
+    RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+    def __init__(self, retries=3, backoff_base=0.5, backoff_max=30.0, retry_after_max=60.0,
+                 retry_statuses=(429, 500, 502, 503, 504), connect_timeout=5.0, read_timeout=30.0):
+        """
+        初始化重试策略
+
+        Args:
+            retries (int): 首次请求失败后的最大重试次数
+            backoff_base (float): 退避基数（秒），第n次重试的等待上限为backoff_base * 2^n
+            backoff_max (float): 单次退避的最长等待时间（秒）
+            retry_after_max (float): 允许遵循的最长Retry-After（秒），超过时不再重试
+            retry_statuses (iterable): 需要重试的HTTP状态码
+            connect_timeout (float): 连接超时时间（秒）
+            read_timeout (float): 读取超时时间（秒）
+        """
+        self.retries = max(0, int(retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._lock = threading.Lock()
+        self._retries_done = 0
+        self._recovered = 0
+        self._exhausted = 0
+
+    @property
+    def timeout(self):
+        """requests使用的(连接超时, 读取超时)元组"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def allows(self, method):
+        """判断请求方法是否允许重试"""
+        return self.retries > 0 and method.upper() in self.RETRY_METHODS
+
+    def should_retry_status(self, status_code):
+        """判断状态码是否需要重试"""
+        return status_code in self.retry_statuses
+
+    @staticmethod
+    def parse_retry_after(value):
+        """
+        解析Retry-After响应头
+
+        Args:
+            value (str): 秒数或HTTP日期
+
+        Returns:
+            float: 需要等待的秒数，无法解析时返回None
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        计算第attempt次重试前的等待时间
+
+        采用full jitter：在[0, min(backoff_max, backoff_base * 2^attempt)]内随机取值，
+        避免大量请求在同一时刻集中重试。
+
+        Args:
+            attempt (int): 已失败的次数，从0开始
+            retry_after (float): 服务端要求的等待秒数
+
+        Returns:
+            float: 等待秒数，服务端要求的等待超过retry_after_max时返回None表示放弃重试
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            if retry_after > self.retry_after_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    def retry_delay(self, attempt, method, status_code=None, headers=None):
+        """
+        根据本次结果判断是否重试
+
+        Args:
+            attempt (int): 已失败的次数，从0开始
+            method (str): 请求方法
+            status_code (int): 响应状态码，请求异常时为空
+            headers (dict): 响应头
+
+        Returns:
+            float: 重试前的等待秒数，不需要或不允许重试时返回None
+        """
+        if attempt >= self.retries or not self.allows(method):
+            return None
+        if status_code is not None and not self.should_retry_status(status_code):
+            return None
+        retry_after = None
+        if status_code is not None and headers:
+            retry_after = self.parse_retry_after(headers.get('Retry-After'))
+        return self.backoff(attempt, retry_after)
+
+    def record(self, attempts, succeeded):
+        """
+        记录一次请求的重试情况
+
+        Args:
+            attempts (int): 实际发送的次数
+            succeeded (bool): 最终是否得到可用响应
+        """
+        if attempts <= 1:
+            return
+        with self._lock:
+            self._retries_done += attempts - 1
+            if succeeded:
+                self._recovered += 1
+            else:
+                self._exhausted += 1
+
+    def stats(self):
+        """获取重试统计信息"""
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'connect_timeout': self.connect_timeout,
+                'read_timeout': self.read_timeout,
+                'retry_statuses': sorted(self.retry_statuses),
+                'retries_done': self._retries_done,
+                'recovered': self._recovered,
+                'exhausted': self._exhausted
+            }
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy():
+    """
+    获取进程级共享的重试策略
+
+    Returns:
+        RetryPolicy: 共享重试策略实例
+    """
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                statuses = get_config_value('CRAWL_RETRY_STATUSES', '429,500,502,503,504')
+                if isinstance(statuses, str):
+                    statuses = [int(s) for s in statuses.split(',') if s.strip()]
+                _policy = RetryPolicy(
+                    retries=int(get_config_value('CRAWL_RETRY_TIMES', 3)),
+                    backoff_base=float(get_config_value('CRAWL_RETRY_BACKOFF', 0.5)),
+                    backoff_max=float(get_config_value('CRAWL_RETRY_BACKOFF_MAX', 30)),
+                    retry_after_max=float(get_config_value('CRAWL_RETRY_AFTER_MAX', 60)),
+                    retry_statuses=statuses,
+                    connect_timeout=float(get_config_value('CRAWL_CONNECT_TIMEOUT', 5)),
+                    read_timeout=float(get_config_value('CRAWL_TIMEOUT', 30))
+                )
+    return _policy
@@ -0,0 +1,287 @@
+import threading
+import uuid
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# 保存采集规则版本戳的系统设置键
+RULE_VERSION_KEY = 'collection_rules_version'
+
+# 索引中的采集规则快照，不绑定数据库会话，可在抓取和提取线程中使用
+RuleSnapshot = namedtuple('RuleSnapshot', ['id', 'site_name', 'site_url', 'title_xpath', 'content_xpath',
+                                           'request_headers', 'updated_at'])
+
+
+def normalize_host(host):
+    """统一主机名写法：小写，去掉末尾的点和开头的www."""
+    host = (host or '').lower().rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+def rule_path_prefix(path):
+    """
+    采集规则site_url对应的路径前缀
+
+    以/结尾的路径原样使用；最后一段带扩展名时视为具体页面，取其所在目录；否则视为栏目目录并补上/。
+
+    Args:
+        path (str): site_url的路径部分
+
+    Returns:
+        str: 以/结尾的路径前缀
+    """
+    if not path or path.endswith('/'):
+        return path or '/'
+    head, _, last = path.rpartition('/')
+    if '.' in last:
+        return head + '/'
+    return path + '/'
+
+
+def site_root(url):
+    """URL所在站点的首页地址，无法解析时返回空字符串"""
+    parts = urlsplit(url or '')
+    if not parts.scheme or not parts.netloc:
+        return ''
+    return f'{parts.scheme}://{parts.netloc}/'
+
+
+class HostTrie:
+    """
+    按反转主机名逐级保存采集规则的前缀树
+
+    news.xinhuanet.com按com、xinhuanet、news逐级保存，规则挂在其site_url主机对应的节点上，
+    同一节点的规则按路径前缀从长到短排列。匹配时沿URL的主机名向下走到最深处，再从最深的节点往回
+    找第一条路径前缀匹配的规则，即主机最具体、路径前缀最长的规则；上级域名的规则同样覆盖其子域名，
+    匹配结果标明是否为同一主机，由调用方决定上级域名的匹配是否优先。
+    """
+
+    __slots__ = ('_root', 'size')
+
+    def __init__(self):
+        self._root = {}
+        self.size = 0
+
+    def insert(self, site_url, rule):
+        """
+        加入一条规则
+
+        Args:
+            site_url (str): 规则的站点地址
+            rule: 匹配时返回的对象
+
+        Returns:
+            bool: site_url中没有主机名，或同一主机同一路径前缀已有规则时不加入，返回False
+        """
+        # 没有写协议的地址按主机名处理
+        try:
+            parts = urlsplit(site_url if '//' in (site_url or '') else f'//{site_url or ""}')
+            host = normalize_host(parts.hostname)
+        except ValueError:
+            return False
+        if not host:
+            return False
+        node = self._root
+        for label in reversed(host.split('.')):
+            node = node.setdefault(label, {})
+        # 节点上的规则保存在键None下，同一前缀保留先加入的规则
+        entries = node.setdefault(None, [])
+        prefix = rule_path_prefix(parts.path)
+        if any(existing == prefix for existing, _ in entries):
+            return False
+        entries.append((prefix, rule))
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self.size += 1
+        return True
+
+    def match(self, url):
+        """
+        查找与URL匹配的规则
+
+        Args:
+            url (str): 页面地址
+
+        Returns:
+            tuple: (匹配的规则, 是否为同一主机的规则)，没有匹配时为(None, False)
+        """
+        try:
+            parts = urlsplit(url or '')
+            host = normalize_host(parts.hostname)
+        except ValueError:
+            return None, False
+        if not host:
+            return None, False
+        path = parts.path or '/'
+        if not path.endswith('/'):
+            path += '/'
+
+        labels = host.split('.')
+        nodes = []
+        node = self._root
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                break
+            if None in node:
+                nodes.append((depth, node[None]))
+        for depth, entries in reversed(nodes):
+            for prefix, rule in entries:
+                if path.startswith(prefix):
+                    return rule, depth == len(labels)
+        return None, False
+
+
+class RuleIndex:
+    """
+    采集规则的进程内索引
+
+    保存所有采集规则的快照，按site_url建立主机名前缀树，同时按站点名称索引，同一站点或同一地址前缀
+    有多条规则时使用ID最小的一条。数据的来源可能是站点名称也可能是主机名，查找时依次使用同一主机的
+    URL匹配、来源名称、上级域名的URL匹配。规则的新增、修改、删除以及自动更新在同一事务中更新系统设置中的版本戳，
+    各进程每批处理前以一次按键查询核对版本戳，一致时直接使用内存中的索引，不一致时重新载入，
+    批内查找规则不再访问数据库。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_site = {}
+        self._hosts = HostTrie()
+        self._counts = {'checks': 0, 'loads': 0, 'lookups': 0, 'url_hits': 0, 'parent_url_hits': 0, 'name_hits': 0,
+                        'misses': 0}
+
+    @staticmethod
+    def current_version():
+        """读取数据库中的版本戳，需要在应用上下文中调用，未记录时为空字符串"""
+        from __init__ import db
+        from models import Setting
+
+        return db.session.query(Setting.value).filter(Setting.key == RULE_VERSION_KEY).scalar() or ''
+
+    def refresh(self):
+        """
+        核对版本戳，变化时重新载入，需要在应用上下文中调用
+
+        Returns:
+            RuleIndex: 当前索引，便于链式调用
+        """
+        from __init__ import db
+        from models import CollectionRule
+
+        version = self.current_version()
+        with self._lock:
+            self._counts['checks'] += 1
+            if version == self._version:
+                return self
+
+        # 先读版本戳再读规则，载入期间有新的写入时下次核对会再次载入
+        rules = {}
+        hosts = HostTrie()
+        for row in db.session.query(
+            CollectionRule.id, CollectionRule.site_name, CollectionRule.site_url, CollectionRule.title_xpath,
+            CollectionRule.content_xpath, CollectionRule.request_headers, CollectionRule.updated_at
+        ).order_by(CollectionRule.id):
+            snapshot = RuleSnapshot(*row)
+            rules.setdefault(row.site_name, snapshot)
+            hosts.insert(row.site_url, snapshot)
+        with self._lock:
+            self._by_site = rules
+            self._hosts = hosts
+            self._version = version
+            self._counts['loads'] += 1
+        return self
+
+    def get(self, site_name):
+        """
+        按站点名称查找规则
+
+        Args:
+            site_name (str): 站点名称，即数据来源
+
+        Returns:
+            RuleSnapshot: 规则快照，不存在时返回None
+        """
+        rule = self._by_site.get(site_name) if site_name else None
+        self._count('name_hits' if rule is not None else 'misses')
+        return rule
+
+    def resolve(self, source, url, parent_domains=True):
+        """
+        查找数据对应的规则
+
+        先找site_url与URL同一主机且路径前缀匹配的规则，再按来源名称查找，最后才使用上级域名的规则，
+        避免某个站点首页的规则抢走同一上级域名下其他来源的数据。
+
+        Args:
+            source (str): 数据来源
+            url (str): 数据的URL
+            parent_domains (bool): 是否使用上级域名的规则
+
+        Returns:
+            RuleSnapshot: 规则快照，不存在时返回None
+        """
+        rule, same_host = self._hosts.match(url)
+        if rule is not None and same_host:
+            self._count('url_hits')
+            return rule
+        named = self._by_site.get(source) if source else None
+        if named is not None:
+            self._count('name_hits')
+            return named
+        if not parent_domains:
+            rule = None
+        self._count('parent_url_hits' if rule is not None else 'misses')
+        return rule
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts['lookups'] += 1
+            self._counts[outcome] += 1
+
+    def invalidate(self):
+        """丢弃内存中的索引，下次核对时重新载入"""
+        with self._lock:
+            self._version = None
+
+    def stats(self):
+        """获取索引统计信息"""
+        with self._lock:
+            return dict(self._counts, rules=len(self._by_site), url_rules=self._hosts.size, version=self._version)
+
+
+def bump_rule_version():
+    """
+    更新采集规则版本戳，写入采集规则后调用，随调用方的事务一起提交，需要在应用上下文中调用
+
+    Returns:
+        str: 新的版本戳
+    """
+    from __init__ import db
+    from models import Setting
+
+    version = uuid.uuid4().hex
+    setting = Setting.query.filter_by(key=RULE_VERSION_KEY).first()
+    if setting is None:
+        setting = Setting(key=RULE_VERSION_KEY, value=version, description='采集规则版本戳，规则变更时更新')
+        db.session.add(setting)
+    else:
+        setting.value = version
+    return version
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_rule_index():
+    """
+    获取进程级共享的采集规则索引
+
+    Returns:
+        RuleIndex: 共享索引实例
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RuleIndex()
+    return _index
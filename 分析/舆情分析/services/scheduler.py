@@ -0,0 +1,335 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from services.collection_store import insert_collection_results
+from services.spider_registry import get_spider_registry
+from utils.config_helper import get_config_value
+
+try:
+    from celery import Celery
+except ImportError:  # 未安装Celery时使用进程内调度
+    Celery = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('celery', 'thread', 'eager')
+
+
+def task_interval(task):
+    """获取任务的采集间隔（秒）"""
+    return task.interval or int(get_config_value('CRAWL_INTERVAL', 3600))
+
+
+def _iter_task_pages(spider, task, max_results):
+    keyword = task.keyword or None
+    pages = max(task.pages or 1, 1)
+    if not task.incremental:
+        yield from spider.iter_pages(keyword, pages, max_results)
+        return
+    # 增量采集按页码顺序逐页抓取，调用方遇到没有新数据的页即停止，不再请求后续页
+    for page in range(1, pages + 1):
+        yield from spider.iter_pages(keyword, [page], max_results)
+
+
+def run_crawl_task(task_id, trigger='schedule'):
+    """
+    执行一次采集任务并记录运行情况，需要在应用上下文中调用
+
+    结果写入任务所属用户的临时表，临时表和数据仓库中已有的URL不再收录；每页结果单独提交，
+    增量任务遇到没有新数据的页即停止翻页。
+
+    Args:
+        task_id (int): 采集任务ID
+        trigger (str): 触发方式，schedule或manual
+
+    Returns:
+        CrawlRun: 运行记录，任务不存在时返回None
+    """
+    from __init__ import db
+    from models import CrawlRun, CrawlTask
+
+    task = CrawlTask.query.get(task_id)
+    if task is None:
+        return None
+
+    run = CrawlRun(task_id=task.id, trigger=trigger, status='running', started_at=datetime.utcnow(),
+                   pages=0, fetched=0, saved=0, duplicates=0, filtered=0)
+    db.session.add(run)
+    db.session.commit()
+    started = time.perf_counter()
+
+    try:
+        spider = get_spider_registry().create(task.spider)
+        if spider is None:
+            raise ValueError(f'不支持的爬虫：{task.spider}')
+        if getattr(spider, 'requires_keyword', False) and not task.keyword:
+            raise ValueError('该爬虫需要搜索关键词')
+
+        max_results = task.max_results or int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        pages = _iter_task_pages(spider, task, max_results)
+        try:
+            for results in pages:
+                saved, filtered, duplicates = insert_collection_results(results, task.owner_id, skip_warehouse=True)
+                run.pages += 1
+                run.fetched += len(results)
+                run.saved += len(saved)
+                run.filtered += filtered
+                run.duplicates += duplicates
+                db.session.commit()
+                if (task.incremental and not saved) or run.fetched >= max_results:
+                    break
+        finally:
+            # 提前结束时取消尚未完成的页面请求
+            pages.close()
+        run.status = 'success'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"定时采集任务{task_id}运行失败：{str(e)}", exc_info=True)
+        run.status = 'failed'
+        run.error = str(e)
+
+    run.finished_at = datetime.utcnow()
+    run.duration_ms = int((time.perf_counter() - started) * 1000)
+    task.last_run_at = run.started_at
+    db.session.commit()
+    logger.info(f"定时采集任务{task.name}完成：{run.status}，{run.pages}页，抓取{run.fetched}条，"
+                f"新增{run.saved}条，耗时{run.duration_ms}ms")
+    return run
+
+
+def create_celery(app):
+    """
+    创建绑定应用的Celery实例，注册采集任务和定时检查任务
+
+    Args:
+        app (Flask): 应用实例
+
+    Returns:
+        Celery: Celery实例，未安装Celery时返回None
+    """
+    if Celery is None:
+        return None
+
+    celery = Celery(app.import_name, broker=app.config['CELERY_BROKER_URL'],
+                    backend=app.config['CELERY_RESULT_BACKEND'])
+    celery.conf.update(
+        accept_content=app.config['CELERY_ACCEPT_CONTENT'],
+        task_serializer=app.config['CELERY_TASK_SERIALIZER'],
+        result_serializer=app.config['CELERY_RESULT_SERIALIZER'],
+        # celery beat按该间隔检查到期的任务
+        beat_schedule={
+            'crawl-scheduler-tick': {
+                'task': 'crawl.tick',
+                'schedule': float(app.config['CRAWL_SCHEDULER_TICK'])
+            }
+        }
+    )
+
+    @celery.task(name='crawl.run_task')
+    def run_task(task_id, trigger='schedule'):
+        with app.app_context():
+            run = run_crawl_task(task_id, trigger)
+            return run.id if run is not None else None
+
+    @celery.task(name='crawl.tick')
+    def tick():
+        return get_scheduler(app).tick()
+
+    return celery
+
+
+class CrawlScheduler:
+    """
+    定时采集调度器
+
+    定期检查到期的采集任务，先以条件更新把任务的下次运行时间推后一个间隔，更新成功的进程才负责
+    本次运行，多个进程同时调度时同一任务不会重复执行。任务按配置的方式执行：celery投递到任务队列，
+    thread在进程内线程池中运行，eager在调度线程中直接运行。
+    """
+
+    def __init__(self, app, backend='thread', tick_seconds=30, max_workers=2):
+        """
+        初始化调度器
+
+        Args:
+            app (Flask): 应用实例，后台线程在其应用上下文中运行任务
+            backend (str): 执行方式，celery、thread或eager
+            tick_seconds (float): 检查到期任务的间隔（秒）
+            max_workers (int): thread方式同时运行的任务数
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f'不支持的调度方式：{backend}')
+        self.app = app
+        self.celery = None
+        if backend == 'celery':
+            self.celery = create_celery(app)
+            if self.celery is None:
+                logger.warning("未安装Celery，定时采集改为进程内执行")
+                backend = 'thread'
+        self.backend = backend
+        self.tick_seconds = tick_seconds
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._active = set()
+        self._counts = {'ticks': 0, 'dispatched': 0, 'skipped': 0}
+
+    def claim_due(self):
+        """
+        领取到期的任务并推后其下次运行时间，需要在应用上下文中调用
+
+        Returns:
+            list: 由本进程负责运行的任务ID列表
+        """
+        from __init__ import db
+        from models import CrawlTask
+
+        now = datetime.utcnow()
+        due = CrawlTask.query.filter(CrawlTask.enabled.is_(True), CrawlTask.next_run_at <= now).all()
+        claimed = []
+        for task in due:
+            next_run_at = now + timedelta(seconds=task_interval(task))
+            updated = db.session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id == task.id, CrawlTask.next_run_at == task.next_run_at)
+                .values(next_run_at=next_run_at)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated:
+                claimed.append(task.id)
+        db.session.commit()
+        return claimed
+
+    def _run_in_context(self, task_id, trigger):
+        from __init__ import db
+
+        try:
+            with self.app.app_context():
+                try:
+                    run_crawl_task(task_id, trigger)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error(f"定时采集任务{task_id}执行异常：{str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                self._active.discard(task_id)
+
+    def dispatch(self, task_id, trigger='schedule'):
+        """
+        按配置的方式执行任务
+
+        Args:
+            task_id (int): 采集任务ID
+            trigger (str): 触发方式
+
+        Returns:
+            bool: 是否已派发，同一任务上次运行尚未结束时返回False
+        """
+        if self.backend == 'celery':
+            self.celery.tasks['crawl.run_task'].delay(task_id, trigger)
+            with self._lock:
+                self._counts['dispatched'] += 1
+            return True
+
+        with self._lock:
+            if task_id in self._active:
+                self._counts['skipped'] += 1
+                return False
+            self._active.add(task_id)
+            self._counts['dispatched'] += 1
+            if self.backend == 'thread' and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='crawl-scheduler')
+        if self.backend == 'thread':
+            self._executor.submit(self._run_in_context, task_id, trigger)
+        else:
+            self._run_in_context(task_id, trigger)
+        return True
+
+    def tick(self):
+        """
+        检查并派发到期的任务
+
+        Returns:
+            int: 本次派发的任务数
+        """
+        with self.app.app_context():
+            task_ids = self.claim_due()
+        with self._lock:
+            self._counts['ticks'] += 1
+        return sum(1 for task_id in task_ids if self.dispatch(task_id))
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"定时采集调度失败：{str(e)}", exc_info=True)
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        """在后台线程中启动调度，celery方式由celery beat调度，不启动线程"""
+        if self.backend == 'celery':
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='crawl-scheduler-tick', daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """停止调度线程，正在运行的任务会执行完毕"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """获取调度统计信息"""
+        with self._lock:
+            return dict(
+                self._counts,
+                backend=self.backend,
+                running=self._thread is not None and self._thread.is_alive(),
+                active_tasks=len(self._active)
+            )
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(app=None):
+    """
+    获取进程级共享的调度器
+
+    Args:
+        app (Flask): 应用实例，为空时使用当前应用
+
+    Returns:
+        CrawlScheduler: 共享调度器实例
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                app = app or current_app._get_current_object()
+                _scheduler = CrawlScheduler(
+                    app,
+                    backend=app.config['CRAWL_SCHEDULER_BACKEND'],
+                    tick_seconds=float(app.config['CRAWL_SCHEDULER_TICK']),
+                    max_workers=int(app.config['CRAWL_SCHEDULER_WORKERS'])
+                )
+    return _scheduler
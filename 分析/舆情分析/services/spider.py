@@ -1,16 +1,97 @@
-import requests
 import re
-from bs4 import BeautifulSoup
 from urllib.parse import quote_plus, urljoin
 import json
+import asyncio
+import concurrent.futures
+import hashlib
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+
+from services.http_client import get_http_pool
+from services.http_cache import get_http_cache
+from services.async_engine import get_crawl_engine
+from services.parsers import get_parser_backend
+from services.encoding import get_encoding_resolver, html_tree
+from services.fetch_timing import timed_parse
+from services.thumbnails import get_thumbnail_store
+from utils.config_helper import get_config_value
+from utils.ttl_cache import TTLCache
+
+_list_cache = None
+_list_cache_lock = threading.Lock()
+
+# 事件循环中正在加载的列表页，键为URL，值为加载任务；只在采集引擎的事件循环线程中读写
+_list_flights = {}
+
+def get_list_cache():
+    """
+    获取列表页解析结果的共享缓存
+    
+    Returns:
+        TTLCache: 按列表页URL缓存完整解析结果
+    """
+    global _list_cache
+    if _list_cache is None:
+        with _list_cache_lock:
+            if _list_cache is None:
+                _list_cache = TTLCache(ttl=float(get_config_value('LIST_PAGE_CACHE_TTL', 60)))
+    return _list_cache
+
+def iter_unique_pages(page_results, max_results):
+    """
+    逐页产出结果，跨页按URL去重
+    
+    Args:
+        page_results (iterable): 按产出顺序排列的各页结果列表
+        max_results (int): 最大结果数，达到后不再读取后续页面
+        
+    Yields:
+        list: 每页中新出现的结果，空页不产出
+    """
+    seen_urls = set()
+    for items in page_results:
+        page_items = []
+        for item in items:
+            url = item.get('url')
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            page_items.append(item)
+            if len(seen_urls) >= max_results:
+                break
+        if page_items:
+            yield page_items
+        if len(seen_urls) >= max_results:
+            return
+
+def iter_completed_pages(futures, max_results):
+    """
+    按完成顺序逐页产出各抓取任务的结果，跨页按URL去重
+    
+    Args:
+        futures (list): 各页抓取任务的Future，结果为该页的结果列表
+        max_results (int): 最大结果数，达到后取消其余任务
+        
+    Yields:
+        list: 每页中新出现的结果
+    """
+    def _completed():
+        for future in concurrent.futures.as_completed(futures):
+            if not future.cancelled():
+                yield future.result()
+    
+    try:
+        yield from iter_unique_pages(_completed(), max_results)
+    finally:
+        # 提前结束或调用方关闭生成器（如客户端断开）时，不再等待其余页面
+        for future in futures:
+            future.cancel()
 
 class BaiduSpider:
     """百度搜索数据抓取模块"""
     
-    # 类级别的线程池，用于异步执行采集任务
-    _executor = ThreadPoolExecutor(max_workers=4)
+    # 按关键词搜索，采集时必须提供关键词
+    requires_keyword = True
     
     def __init__(self):
         """初始化抓取模块"""
@@ -47,17 +128,14 @@ class BaiduSpider:
         """
         try:
             # 构建搜索URL
-            encoded_keyword = quote_plus(keyword)
-            url = self.base_url.format(encoded_keyword)
-            if page > 1:
-                url += f"&pn={((page-1)*10)}"
+            url = self.build_url(keyword, page)
             
             # 发送请求
-            response = requests.get(
+            response = get_http_pool().get(
                 url,
                 headers=self.headers,
                 cookies=self.cookies,
-                timeout=10
+                label='list:baidu'
             )
             response.encoding = 'utf-8'
             
@@ -65,90 +143,75 @@ class BaiduSpider:
                 print(f"请求失败，状态码：{response.status_code}")
                 return []
             
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # 查找搜索结果列表
-            search_results = soup.find_all('div', class_='result')
-            
-            for item in search_results:
-                try:
-                    # 提取标题
-                    title_tag = item.find('h3', class_='t')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.text.strip()
-                    
-                    # 提取原始URL
-                    link_tag = title_tag.find('a')
-                    if not link_tag or not link_tag.get('href'):
-                        continue
-                    
-                    original_url = link_tag.get('href')
-                    
-                    # 提取摘要（尝试多种可能的CSS类）
-                    abstract = ""
-                    abstract_tags = [
-                        item.find('span', class_='summary-text_560AW'),  # 新的摘要class
-                        item.find('div', class_='c-abstract'),
-                        item.find('div', class_='content-right_8Zs40'),
-                        item.find('div', class_='c-summary-160s'),
-                        item.find('div', class_='c-summary')
-                    ]
-                    for tag in abstract_tags:
-                        if tag:
-                            abstract = tag.text.strip()
-                            break
-                    
-                    # 提取来源（尝试多种可能的CSS类）
-                    source = ""
-                    source_tags = [
-                        item.find('span', class_='cosc-source-text'),  # 新的来源class
-                        item.find('span', class_='cosc-source'),  # 新的来源class
-                        item.find('div', class_='cosc-source'),  # 新的来源class
-                        item.find('a', class_='c-showurl'),
-                        item.find('span', class_='c-showurl'),
-                        item.find('div', class_='c-showurl'),
-                        item.find('span', class_='site-host')
-                    ]
-                    for tag in source_tags:
-                        if tag:
-                            source = tag.text.strip()
-                            break
-                    
-                    # 如果没有找到来源，尝试从URL中提取
-                    if not source and original_url:
-                        from urllib.parse import urlparse
-                        parsed_url = urlparse(original_url)
-                        source = parsed_url.netloc
-                    
-                    # 提取封面图片
-                    img_tag = item.find('img', class_='general_image_pic')
-                    cover = img_tag.get('src') if img_tag else ""
-                    
-                    # 如果没有找到图片，尝试从其他地方提取
-                    if not cover:
-                        img_match = re.search(r'<img[^>]+src="([^"]+)"[^>]*>', str(item))
-                        if img_match:
-                            cover = img_match.group(1)
-                    
-                    # 添加到结果列表
-                    results.append({
-                        "title": title,
-                        "summary": abstract,  # 将abstract改为summary
-                        "cover": cover,
-                        "url": original_url,  # 将original_url改为url
-                        "source": source
-                    })
-                    
-                except Exception as e:
-                    print(f"解析单个结果失败：{e}")
-                    continue
+            return timed_parse(response, self.parse_results, response.text)
+            
+        except Exception as e:
+            print(f"抓取数据失败：{e}")
+            return []
+    
+    def build_url(self, keyword, page=1):
+        """
+        构建百度搜索结果页URL
+        
+        Args:
+            keyword (str): 搜索关键词
+            page (int): 页码
             
-            return results
+        Returns:
+            str: 搜索结果页URL
+        """
+        url = self.base_url.format(quote_plus(keyword))
+        if page > 1:
+            url += f"&pn={((page-1)*10)}"
+        return url
+    
+    def parse_results(self, html):
+        """
+        解析百度搜索结果页
+        
+        Args:
+            html (str): 搜索结果页HTML
+            
+        Returns:
+            list: 搜索结果列表
+        """
+        try:
+            return get_parser_backend().parse_baidu(html)
             
+        except Exception as e:
+            print(f"解析搜索结果失败：{e}")
+            return []
+    
+    async def fetch_data_coro(self, keyword, page=1):
+        """
+        抓取百度搜索结果数据（协程版本，在采集引擎的事件循环中执行）
+        
+        Args:
+            keyword (str): 搜索关键词
+            page (int): 页码
+            
+        Returns:
+            list: 搜索结果列表
+        """
+        try:
+            response = await get_crawl_engine().fetch(
+                self.build_url(keyword, page),
+                headers=self.headers,
+                cookies=self.cookies,
+                label='list:baidu'
+            )
+            response.encoding = 'utf-8'
+            
+            if response.status_code != 200:
+                print(f"请求失败，状态码：{response.status_code}")
+                return []
+            
+            # 解析属于CPU密集操作，放到线程池中执行，避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, timed_parse, response, self.parse_results, response.text)
+            
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             print(f"抓取数据失败：{e}")
             return []
@@ -162,9 +225,166 @@ class BaiduSpider:
             page (int): 页码
             
         Returns:
-            Future: 异步执行的Future对象，结果为搜索结果列表
+            Future: 异步执行的Future对象，结果为搜索结果列表，可调用cancel()取消
+        """
+        return get_crawl_engine().submit(self.fetch_data_coro(keyword, page))
+    
+    def fetch_pages(self, keyword, pages=1, max_results=None):
+        """
+        并发抓取多个百度搜索结果页并合并
+        
+        Args:
+            keyword (str): 搜索关键词
+            pages (int|iterable): 页数或页码序列，为整数时抓取第1页至第pages页
+            max_results (int): 最大结果数，为空时使用MAX_CRAWL_RESULTS配置
+            
+        Returns:
+            list: 按页码顺序合并并按URL去重后的搜索结果列表
+        """
+        try:
+            return get_crawl_engine().run(self.fetch_pages_coro(keyword, pages, max_results))
+        except Exception as e:
+            print(f"多页抓取数据失败：{e}")
+            return []
+    
+    def iter_pages(self, keyword, pages=1, max_results=None):
+        """
+        并发抓取多个百度搜索结果页，每解析完一页即产出该页结果
+        
+        Args:
+            keyword (str): 搜索关键词
+            pages (int|iterable): 页数或页码序列，为整数时抓取第1页至第pages页
+            max_results (int): 最大结果数，为空时使用MAX_CRAWL_RESULTS配置
+            
+        Yields:
+            list: 按完成顺序产出的每页结果，跨页按URL去重
+        """
+        if isinstance(pages, int):
+            pages = range(1, pages + 1)
+        if max_results is None:
+            max_results = int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        futures = [self.fetch_data_async(keyword, page) for page in sorted(set(pages))]
+        yield from iter_completed_pages(futures, max_results)
+    
+    async def fetch_pages_coro(self, keyword, pages=1, max_results=None):
+        """
+        并发抓取多个百度搜索结果页（协程版本）
+        
+        所有页面同时发出请求，已完成页面的去重结果达到max_results后取消其余请求。
+        
+        Args:
+            keyword (str): 搜索关键词
+            pages (int|iterable): 页数或页码序列
+            max_results (int): 最大结果数
+            
+        Returns:
+            list: 合并去重后的搜索结果列表
+        """
+        if isinstance(pages, int):
+            pages = range(1, pages + 1)
+        pages = sorted(set(pages))
+        if max_results is None:
+            max_results = int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        
+        # 任务列表与页码顺序一致，合并时据此保持页码顺序
+        tasks = [asyncio.ensure_future(self.fetch_data_coro(keyword, page)) for page in pages]
+        seen_urls = set()
+        try:
+            for done in asyncio.as_completed(tasks):
+                items = await done
+                seen_urls.update(item.get('url') for item in items if item.get('url'))
+                if len(seen_urls) >= max_results:
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        return self.merge_results(
+            [task.result() for task in tasks if task.done() and not task.cancelled()],
+            max_results
+        )
+    
+    def fetch_keywords(self, keywords, pages=1, max_workers=None, max_results=None):
+        """
+        批量抓取多个关键词的搜索结果
+        
+        Args:
+            keywords (list): 关键词列表
+            pages (int|iterable): 每个关键词抓取的页数或页码序列
+            max_workers (int): 同时在途的请求数上限，为空时使用CRAWL_BATCH_WORKERS配置
+            max_results (int): 每个关键词的最大结果数，为空时使用MAX_CRAWL_RESULTS配置
+            
+        Returns:
+            dict: 关键词到搜索结果列表的映射
         """
-        return self._executor.submit(self.fetch_data, keyword, page)
+        try:
+            return get_crawl_engine().run(self.fetch_keywords_coro(keywords, pages, max_workers, max_results))
+        except Exception as e:
+            print(f"批量抓取数据失败：{e}")
+            return {}
+    
+    async def fetch_keywords_coro(self, keywords, pages=1, max_workers=None, max_results=None):
+        """
+        批量抓取多个关键词的搜索结果（协程版本）
+        
+        所有（关键词，页码）组合一次性调度，由信号量限制同时在途的请求数。
+        
+        Args:
+            keywords (list): 关键词列表
+            pages (int|iterable): 每个关键词抓取的页数或页码序列
+            max_workers (int): 同时在途的请求数上限
+            max_results (int): 每个关键词的最大结果数
+            
+        Returns:
+            dict: 关键词到搜索结果列表的映射
+        """
+        if isinstance(pages, int):
+            pages = range(1, pages + 1)
+        pages = sorted(set(pages))
+        if max_workers is None:
+            max_workers = int(get_config_value('CRAWL_BATCH_WORKERS', 16))
+        if max_results is None:
+            max_results = int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        
+        semaphore = asyncio.Semaphore(max_workers)
+        
+        async def _fetch(keyword, page):
+            async with semaphore:
+                return await self.fetch_data_coro(keyword, page)
+        
+        jobs = [(keyword, page) for keyword in keywords for page in pages]
+        page_results = await asyncio.gather(*[_fetch(keyword, page) for keyword, page in jobs])
+        
+        grouped = {keyword: [] for keyword in keywords}
+        for (keyword, page), items in zip(jobs, page_results):
+            grouped[keyword].append(items)
+        return {keyword: self.merge_results(lists, max_results) for keyword, lists in grouped.items()}
+    
+    @staticmethod
+    def merge_results(result_lists, max_results=None):
+        """
+        合并多页结果并按URL去重
+        
+        Args:
+            result_lists (list): 按页码排列的结果列表
+            max_results (int): 最大结果数
+            
+        Returns:
+            list: 合并后的结果
+        """
+        merged = []
+        seen_urls = set()
+        for results in result_lists:
+            for item in results:
+                url = item.get('url')
+                if not url or url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                merged.append(item)
+                if max_results and len(merged) >= max_results:
+                    return merged
+        return merged
     
     def fetch_images(self, keyword, page=1):
         """
@@ -182,11 +402,11 @@ class BaiduSpider:
             if page > 1:
                 url += f"&pn={((page-1)*30)}"
             
-            response = requests.get(
+            response = get_http_pool().get(
                 url,
                 headers=self.headers,
                 cookies=self.cookies,
-                timeout=10
+                label='images:baidu'
             )
             response.encoding = 'utf-8'
             
@@ -206,144 +426,392 @@ class BaiduSpider:
                     "keyword": keyword
                 })
             
+            # 图片在后台下载并保存为本地缩略图
+            get_thumbnail_store().enqueue(item["url"] for item in img_results)
+            
             return img_results
             
         except Exception as e:
             print(f"抓取图片失败：{e}")
             return []
 
-class XinhuaSpider:
-    """新华网数据抓取模块"""
+class SpiderDefinition:
+    """
+    声明式列表页爬虫定义
     
-    # 类级别的线程池，用于异步执行采集任务
-    _executor = ThreadPoolExecutor(max_workers=4)
+    定义来自配置文件，加载时即把条目和字段的XPath编译成可复用的选择器对象，
+    同一定义的所有抓取共享这些选择器。
+    """
     
-    def __init__(self):
-        """初始化抓取模块"""
-        self.base_url = "http://sc.news.cn/scyw.htm"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Referer": "http://sc.news.cn/",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache"
-        }
+    PAGING_TYPES = ('slice', 'url')
+    FIELDS = ('title', 'summary', 'cover', 'url', 'source')
+    
+    def __init__(self, name, data):
+        """
+        编译爬虫定义
+        
+        Args:
+            name (str): 爬虫名称
+            data (dict): 定义内容，包括label、url、page_url、headers、encoding、item、fields、
+                required、absolute、source、paging
+            
+        Raises:
+            ValueError: 定义不完整或选择器无效
+        """
+        self.name = name
+        self.label = data.get('label') or name
+        self.url = data.get('url')
+        self.page_url = data.get('page_url')
+        self.headers = dict(data.get('headers') or {})
+        self.encoding = data.get('encoding')
+        self.required = tuple(data.get('required') or ('title', 'url'))
+        self.absolute = tuple(data.get('absolute') or ('url', 'cover'))
+        self.source = data.get('source', '')
+        
+        paging = data.get('paging') or {}
+        self.paging = paging.get('type', 'slice')
+        self.page_size = int(paging.get('page_size', 10))
+        self.page_step = int(paging.get('step', 1))
+        
+        if not self.url or not data.get('item') or not data.get('fields'):
+            raise ValueError(f'爬虫{name}缺少url、item或fields')
+        if self.paging not in self.PAGING_TYPES:
+            raise ValueError(f'爬虫{name}不支持的翻页方式：{self.paging}')
+        
+        try:
+            self.item = etree.XPath(data['item'])
+            self.fields = {field: etree.XPath(expr) for field, expr in data['fields'].items()}
+        except etree.XPathSyntaxError as e:
+            raise ValueError(f'爬虫{name}的选择器无效：{e}')
+        
+        # 定义内容变化后，HTTP缓存中按旧定义解析的结果随之失效
+        self.version = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+    
+    @property
+    def requires_keyword(self):
+        """是否为按关键词搜索的爬虫"""
+        return '{keyword}' in self.url or '{keyword}' in (self.page_url or '')
+    
+    def build_url(self, keyword=None, page=1):
+        """
+        构建页码对应的列表页地址
+        
+        Args:
+            keyword (str): 搜索关键词
+            page (int): 页码
+            
+        Returns:
+            str: 列表页地址，slice翻页方式下所有页码共用同一地址
+        """
+        template = self.url
+        if self.paging == 'url' and page > 1 and self.page_url:
+            template = self.page_url
+        if self.paging == 'slice':
+            page = 1
+        return template.format(
+            keyword=quote_plus(keyword or ''),
+            page=page,
+            offset=(page - 1) * self.page_step
+        )
+    
+    @staticmethod
+    def _value(selector, node):
+        found = selector(node)
+        if isinstance(found, list):
+            if not found:
+                return ''
+            found = found[0]
+        if isinstance(found, str):
+            return found.strip()
+        if isinstance(found, etree._Element):
+            return ''.join(found.itertext()).strip()
+        return str(found).strip()
+    
+    def parse(self, tree, base_url):
+        """
+        用编译好的选择器解析列表页
+        
+        Args:
+            tree (lxml.etree._Element): 列表页文档树
+            base_url (str): 列表页地址，用于补全相对URL
+            
+        Returns:
+            list: 列表页中的全部条目
+        """
+        if tree is None:
+            return []
+        
+        results = []
+        for node in self.item(tree):
+            item = {field: '' for field in self.FIELDS}
+            item['source'] = self.source
+            for field, selector in self.fields.items():
+                item[field] = self._value(selector, node)
+            if not all(item.get(field) for field in self.required):
+                continue
+            for field in self.absolute:
+                value = item.get(field)
+                if value and not value.startswith(('http://', 'https://')):
+                    item[field] = urljoin(base_url, value)
+            results.append(item)
+        return results
+
+class ListPageSpider:
+    """按SpiderDefinition抓取列表页的通用爬虫，抓取统一走共享的连接池、HTTP缓存和采集引擎"""
+    
+    def __init__(self, definition):
+        """
+        初始化爬虫
+        
+        Args:
+            definition (SpiderDefinition): 编译好的爬虫定义
+        """
+        self.definition = definition
+        self.base_url = definition.url
+        self.headers = definition.headers
+    
+    @property
+    def requires_keyword(self):
+        return self.definition.requires_keyword
     
     def fetch_data(self, keyword=None, page=1):
         """
-        抓取新华网四川要闻数据
+        抓取列表页数据
         
         Args:
-            keyword (str): 搜索关键词（暂不支持搜索，仅抓取四川要闻）
+            keyword (str): 搜索关键词，定义中的地址不含关键词时忽略
             page (int): 页码
             
         Returns:
-            list: 搜索结果列表，每个元素包含标题、概要、封面、原始URL和来源
+            list: 结果列表，每个元素包含标题、概要、封面、原始URL和来源
         """
         try:
-            # 构建URL（目前仅支持四川要闻首页，页码暂不支持）
-            url = self.base_url
-            
-            # 发送请求
-            response = requests.get(
-                url,
-                headers=self.headers,
-                timeout=10
-            )
-            response.encoding = 'utf-8'
+            url = self.definition.build_url(keyword, page)
             
-            if response.status_code != 200:
-                print(f"请求失败，状态码：{response.status_code}")
+            # 列表页解析结果在内存中短时缓存，翻页和并发请求共享同一次抓取
+            results = get_list_cache().get_or_load(url, lambda: self.load_list(url))
+            if results is None:
                 return []
             
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # 查找新闻列表
-            news_list = soup.find('div', class_='scpd_page_box')
-            if not news_list:
-                print("未找到新闻列表")
-                return []
+            return self.paginate(results, page)
             
-            # 查找所有新闻条目
-            news_items = news_list.find_all('a', href=True)
-            
-            for item in news_items:
-                try:
-                    # 提取标题
-                    title_tag = item.find('dt')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.text.strip()
-                    
-                    # 提取原文URL
-                    original_url = item.get('href')
-                    # 处理相对URL
-                    if original_url and not original_url.startswith(('http://', 'https://')):
-                        original_url = urljoin(self.base_url, original_url)
-                    
-                    # 提取摘要
-                    abstract_tag = item.find('dd')
-                    abstract = abstract_tag.text.strip() if abstract_tag else ""
-                    
-                    # 提取来源（新华网四川频道）
-                    source = "新华网"
-                    
-                    # 提取封面图片
-                    img_tag = item.find('img', class_='scpd_auto_pic')
-                    cover = ""
-                    if img_tag:
-                        img_src = img_tag.get('src')
-                        if img_src:
-                            # 处理相对图片URL
-                            if img_src.startswith('http://') or img_src.startswith('https://'):
-                                cover = img_src
-                            else:
-                                cover = urljoin(self.base_url, img_src)
-                    
-                    # 添加到结果列表
-                    results.append({
-                        "title": title,
-                        "summary": abstract,  # 保持与百度新闻一致的字段名
-                        "cover": cover,
-                        "url": original_url,  # 保持与百度新闻一致的字段名
-                        "source": source
-                    })
-                    
-                except Exception as e:
-                    print(f"解析单个新闻失败：{e}")
-                    continue
+        except Exception as e:
+            print(f"抓取{self.definition.label}数据失败：{e}")
+            return []
+    
+    def fetch_pages(self, keyword=None, pages=1, max_results=None):
+        """
+        抓取多页数据并按URL去重合并
+        
+        Args:
+            keyword (str): 搜索关键词
+            pages (int|iterable): 页数或页码序列，为整数时抓取第1页至第pages页
+            max_results (int): 最大结果数，为空时使用MAX_CRAWL_RESULTS配置
             
-            # 如果需要支持分页，可以在这里根据page参数截取结果
-            # 由于当前页面结构不支持页码，暂时返回全部结果
-            if page > 1:
-                start = (page - 1) * 10
-                end = start + 10
-                results = results[start:end]
+        Returns:
+            list: 按页码顺序合并并按URL去重后的结果列表
+        """
+        if isinstance(pages, int):
+            pages = range(1, pages + 1)
+        pages = sorted(set(pages))
+        if max_results is None:
+            max_results = int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        
+        try:
+            if self.definition.paging == 'slice':
+                # 所有页码来自同一个列表页，只需抓取一次
+                result_lists = [self.fetch_data(keyword, page) for page in pages]
             else:
-                results = results[:10]  # 每页返回10条数据
+                result_lists = get_crawl_engine().run(self.fetch_pages_coro(keyword, pages))
+        except Exception as e:
+            print(f"多页抓取数据失败：{e}")
+            return []
+        return BaiduSpider.merge_results(result_lists, max_results)
+    
+    def iter_pages(self, keyword=None, pages=1, max_results=None):
+        """
+        抓取多页数据，每解析完一页即产出该页结果
+        
+        Args:
+            keyword (str): 搜索关键词
+            pages (int|iterable): 页数或页码序列，为整数时抓取第1页至第pages页
+            max_results (int): 最大结果数，为空时使用MAX_CRAWL_RESULTS配置
+            
+        Yields:
+            list: 每页结果，跨页按URL去重；slice翻页按页码顺序产出，其他方式按完成顺序产出
+        """
+        if isinstance(pages, int):
+            pages = range(1, pages + 1)
+        pages = sorted(set(pages))
+        if max_results is None:
+            max_results = int(get_config_value('MAX_CRAWL_RESULTS', 100))
+        
+        if self.definition.paging == 'slice':
+            # 同一个列表页只抓取一次，逐页截取
+            yield from iter_unique_pages((self.fetch_data(keyword, page) for page in pages), max_results)
+            return
+        futures = [self.fetch_data_async(keyword, page) for page in pages]
+        yield from iter_completed_pages(futures, max_results)
+    
+    async def fetch_pages_coro(self, keyword, pages):
+        """并发抓取多个列表页（协程版本），返回按页码排列的结果列表"""
+        return await asyncio.gather(*[self.fetch_data_coro(keyword, page) for page in pages])
+    
+    def load_list(self, url):
+        """
+        抓取并解析完整的列表页
+        
+        Args:
+            url (str): 列表页地址
+            
+        Returns:
+            list: 列表页中的全部条目，请求失败时返回None
+        """
+        # 发送条件请求，页面未变化时直接使用缓存的解析结果
+        result = get_http_cache().fetch(
+            url,
+            parse=self.parse_response,
+            parse_key=self.parse_key,
+            headers=self.headers,
+            label=f'list:{self.definition.name}'
+        )
+        
+        if result.parsed is None:
+            print(f"请求失败，状态码：{result.status_code}")
+        return result.parsed
+    
+    async def load_list_coro(self, url):
+        """
+        抓取并解析完整的列表页（协程版本），成功时写入列表页缓存
+        
+        Args:
+            url (str): 列表页地址
             
-            return results
+        Returns:
+            list: 列表页中的全部条目，请求失败时返回None
+        """
+        result = await get_http_cache().fetch_async(
+            url,
+            parse=self.parse_response,
+            parse_key=self.parse_key,
+            headers=self.headers,
+            label=f'list:{self.definition.name}'
+        )
+        
+        if result.parsed is None:
+            print(f"请求失败，状态码：{result.status_code}")
+        else:
+            get_list_cache().set(url, result.parsed)
+        return result.parsed
+    
+    @property
+    def parse_key(self):
+        """列表页解析结果在HTTP缓存中的键，定义变化时随版本号变化"""
+        return f'spider:{self.definition.name}:{self.definition.version}'
+    
+    def parse_response(self, response):
+        """
+        解析列表页响应
+        
+        Args:
+            response: 列表页响应
+            
+        Returns:
+            list: 列表页中的全部条目
+        """
+        response.encoding = self.definition.encoding or get_encoding_resolver().resolve_response(response)
+        return self.parse_results(response.content, response.encoding, response.url)
+    
+    def parse_results(self, html, encoding=None, base_url=None):
+        """
+        解析列表页
+        
+        Args:
+            html (str|bytes): 列表页HTML，传入字节时由lxml按encoding直接解析
+            encoding (str): 字符集
+            base_url (str): 列表页地址，为空时使用定义中的地址
+            
+        Returns:
+            list: 列表页中的全部条目
+        """
+        try:
+            tree = html_tree(html, encoding) if isinstance(html, bytes) else etree.HTML(html)
+            return self.definition.parse(tree, base_url or self.base_url)
             
         except Exception as e:
-            print(f"抓取新华网数据失败：{e}")
+            print(f"解析{self.definition.label}数据失败：{e}")
+            return []
+    
+    def paginate(self, results, page=1):
+        """
+        按页码截取结果
+        
+        slice翻页方式下按page_size从完整列表中截取，其他方式返回整页。
+        完整列表可能来自共享缓存，返回的条目为副本，调用方修改不会影响缓存。
+        """
+        if self.definition.paging == 'slice':
+            start = (max(page, 1) - 1) * self.definition.page_size
+            results = results[start:start + self.definition.page_size]
+        return [dict(item) for item in results]
+    
+    async def fetch_data_coro(self, keyword=None, page=1):
+        """
+        抓取列表页数据（协程版本，在采集引擎的事件循环中执行）
+        
+        与fetch_data共用列表页缓存和HTTP缓存的条件请求，页面未变化时直接复用缓存的解析结果。
+        缓存未命中时由采集引擎发送请求，不占用线程；同一列表页的并发请求在事件循环中共享同一个加载任务。
+        
+        Args:
+            keyword (str): 搜索关键词
+            page (int): 页码
+            
+        Returns:
+            list: 结果列表
+        """
+        try:
+            url = self.definition.build_url(keyword, page)
+            results = get_list_cache().get(url)
+            if results is None:
+                flight = _list_flights.get(url)
+                if flight is None:
+                    flight = asyncio.ensure_future(self.load_list_coro(url))
+                    _list_flights[url] = flight
+                    flight.add_done_callback(lambda _: _list_flights.pop(url, None))
+                # 单个等待者被取消时不取消共享的加载任务
+                results = await asyncio.shield(flight)
+            if results is None:
+                return []
+            return self.paginate(results, page)
+            
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"抓取{self.definition.label}数据失败：{e}")
             return []
     
     def fetch_data_async(self, keyword=None, page=1):
         """
-        异步抓取新华网数据
+        异步抓取列表页数据
         
         Args:
             keyword (str): 搜索关键词
             page (int): 页码
             
         Returns:
-            Future: 异步执行的Future对象
+            Future: 异步执行的Future对象，可调用cancel()取消
         """
-        return self._executor.submit(self.fetch_data, keyword, page)
+        return get_crawl_engine().submit(self.fetch_data_coro(keyword, page))
+
+class XinhuaSpider(ListPageSpider):
+    """新华网四川要闻抓取模块，选择器等定义见爬虫定义文件中的xinhua"""
+    
+    def __init__(self):
+        """初始化抓取模块"""
+        from services.spider_registry import get_spider_registry
+        definition = get_spider_registry().definition('xinhua')
+        if definition is None:
+            raise ValueError('未找到新华网爬虫定义')
+        super().__init__(definition)
 
 # 测试代码
 if __name__ == "__main__":
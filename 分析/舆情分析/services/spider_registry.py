@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+
+from services.spider import BaiduSpider, ListPageSpider, SpiderDefinition
+from utils.config_helper import get_config_value
+
+logger = logging.getLogger(__name__)
+
+
+class SpiderRegistry:
+    """
+    列表页爬虫注册表
+
+    声明式爬虫从定义文件加载并编译一次，之后按名称创建爬虫实例；百度搜索结果页结构复杂，
+    仍使用代码实现的BaiduSpider，作为内置爬虫注册。
+    """
+
+    BUILTIN = {
+        'baidu': ('百度新闻爬虫', BaiduSpider),
+    }
+
+    def __init__(self, path=None):
+        """
+        初始化注册表
+
+        Args:
+            path (str): 爬虫定义文件路径，为空时使用SPIDER_DEFINITIONS配置
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._definitions = None
+
+    def _load(self):
+        path = self.path or get_config_value('SPIDER_DEFINITIONS')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取爬虫定义文件失败：{path}，{e}")
+            return {}
+
+        definitions = {}
+        for name, spec in data.items():
+            if name in self.BUILTIN:
+                logger.warning(f"爬虫定义{name}与内置爬虫重名，已忽略")
+                continue
+            try:
+                definitions[name] = SpiderDefinition(name, spec)
+            except (ValueError, TypeError) as e:
+                # 单个定义有误不影响其他爬虫
+                logger.error(f"加载爬虫定义失败：{e}")
+        return definitions
+
+    def _loaded(self):
+        if self._definitions is None:
+            with self._lock:
+                if self._definitions is None:
+                    self._definitions = self._load()
+        return self._definitions
+
+    def reload(self):
+        """重新读取定义文件"""
+        with self._lock:
+            self._definitions = self._load()
+
+    def definition(self, name):
+        """
+        获取编译好的爬虫定义
+
+        Args:
+            name (str): 爬虫名称
+
+        Returns:
+            SpiderDefinition: 爬虫定义，不存在时返回None
+        """
+        return self._loaded().get(name)
+
+    def create(self, name):
+        """
+        创建爬虫实例
+
+        Args:
+            name (str): 爬虫名称
+
+        Returns:
+            爬虫实例，不支持的名称返回None
+        """
+        if name in self.BUILTIN:
+            return self.BUILTIN[name][1]()
+        definition = self.definition(name)
+        return ListPageSpider(definition) if definition is not None else None
+
+    def choices(self):
+        """
+        获取可选的爬虫列表
+
+        Returns:
+            list: (名称, 显示名称)列表，内置爬虫在前
+        """
+        choices = [(name, label) for name, (label, _) in self.BUILTIN.items()]
+        choices.extend((name, definition.label) for name, definition in self._loaded().items())
+        return choices
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_spider_registry():
+    """
+    获取进程级共享的爬虫注册表
+
+    Returns:
+        SpiderRegistry: 共享注册表实例
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SpiderRegistry()
+    return _registry
@@ -0,0 +1,335 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from services.async_engine import get_crawl_engine
+from utils.config_helper import get_config_value
+
+try:
+    from PIL import Image
+except ImportError:  # 未安装Pillow时不生成缩略图，列表退回不显示封面
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_DIGEST = re.compile(r'^[0-9a-f]{40}$')
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+}
+
+
+class ThumbnailStore:
+    """
+    封面缩略图缓存
+
+    封面图片在采集引擎上后台并发下载，缩放为固定尺寸的JPEG后按内容的SHA1保存，
+    相同图片只保存一份；另按封面URL的SHA1保存指向缩略图的引用。总大小超过上限时按最近
+    最少使用淘汰，超过保存期限的缩略图在写入时定期清理。
+    """
+
+    def __init__(self, directory, size=(160, 120), max_bytes=128 * 1024 * 1024, max_age=30 * 86400,
+                 max_image_bytes=5 * 1024 * 1024, max_workers=8, quality=80):
+        """
+        初始化缩略图缓存
+
+        Args:
+            directory (str): 缓存目录
+            size (tuple): 缩略图最大宽高（像素）
+            max_bytes (int): 缩略图总大小上限（字节）
+            max_age (int): 缩略图保存期限（秒）
+            max_image_bytes (int): 原图大小上限（字节），超出的图片不处理
+            max_workers (int): 同时下载的图片数量
+            quality (int): JPEG质量
+        """
+        self.directory = directory
+        self.size = size
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_image_bytes = max_image_bytes
+        self.max_workers = max_workers
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._index = OrderedDict()
+        self._refs = {}
+        self._pending = set()
+        self._total_bytes = 0
+        self._semaphore = None
+        self._last_sweep = None
+        self._counts = {'queued': 0, 'stored': 0, 'deduplicated': 0, 'failed': 0, 'evicted': 0, 'expired': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @property
+    def enabled(self):
+        """是否可以生成缩略图"""
+        return Image is not None
+
+    @staticmethod
+    def _sha1(data):
+        return hashlib.sha1(data).hexdigest()
+
+    @staticmethod
+    def is_digest(value):
+        """检查缩略图摘要格式，防止路径穿越"""
+        return bool(_DIGEST.match(value or ''))
+
+    def blob_path(self, digest):
+        """缩略图文件路径"""
+        return os.path.join(self.directory, 'blobs', digest[:2], digest + '.jpg')
+
+    def _ref_path(self, url):
+        key = self._sha1(url.encode('utf-8'))
+        return os.path.join(self.directory, 'refs', key[:2], key)
+
+    def _load_index(self):
+        """扫描缓存目录重建LRU索引，按文件修改时间由旧到新排列"""
+        entries = []
+        for root, _, files in os.walk(os.path.join(self.directory, 'blobs')):
+            for name in files:
+                if not name.endswith('.jpg'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    entries.append((os.path.getmtime(path), name[:-4], os.path.getsize(path)))
+                except OSError:
+                    continue
+        for _, digest, size in sorted(entries):
+            self._index[digest] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def lookup(self, url):
+        """
+        获取封面URL对应的缩略图摘要
+
+        Args:
+            url (str): 封面URL
+
+        Returns:
+            str: 缩略图摘要，尚未缓存或已被淘汰时返回None
+        """
+        if not url:
+            return None
+        with self._lock:
+            digest = self._refs.get(url)
+        if digest is None:
+            try:
+                with open(self._ref_path(url), 'r', encoding='ascii') as f:
+                    digest = f.read().strip()
+            except OSError:
+                return None
+        with self._lock:
+            if digest not in self._index:
+                self._refs.pop(url, None)
+                return None
+            self._refs[url] = digest
+            return digest
+
+    def url_for(self, url):
+        """
+        获取封面的本地缩略图地址
+
+        Args:
+            url (str): 封面URL
+
+        Returns:
+            str: 缩略图访问路径，尚未缓存时返回空字符串
+        """
+        digest = self.lookup(url)
+        return f'/thumbnails/{digest}.jpg' if digest else ''
+
+    def touch(self, digest):
+        """记录缩略图被访问，用于按最近最少使用淘汰"""
+        with self._lock:
+            if digest not in self._index:
+                return False
+            self._index.move_to_end(digest)
+        try:
+            os.utime(self.blob_path(digest))
+        except OSError:
+            pass
+        return True
+
+    def _make_thumbnail(self, content):
+        with Image.open(io.BytesIO(content)) as image:
+            # JPEG在解码时即按目标尺寸降采样，大图不必完整解码
+            image.draft('RGB', self.size)
+            image.thumbnail(self.size)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=self.quality, optimize=True)
+            return output.getvalue()
+
+    def _store(self, url, content):
+        digest = self._sha1(content)
+        with self._lock:
+            exists = digest in self._index
+            if exists:
+                self._counts['deduplicated'] += 1
+        if exists:
+            self.touch(digest)
+        else:
+            thumbnail = self._make_thumbnail(content)
+            self._write_atomic(self.blob_path(digest), thumbnail)
+            with self._lock:
+                self._index[digest] = len(thumbnail)
+                self._total_bytes += len(thumbnail)
+                self._counts['stored'] += 1
+            self._evict()
+        self._write_atomic(self._ref_path(url), digest.encode('ascii'))
+        with self._lock:
+            self._refs[url] = digest
+        return digest
+
+    def _evict(self):
+        expired = []
+        evicted = []
+        now = time.monotonic()
+        with self._lock:
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                digest, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                evicted.append(digest)
+            # 过期清理需要逐个检查文件时间，每小时最多执行一次
+            sweep = self._last_sweep is None or now - self._last_sweep > 3600
+            if sweep:
+                self._last_sweep = now
+        if sweep:
+            cutoff = time.time() - self.max_age
+            with self._lock:
+                candidates = list(self._index)
+            for digest in candidates:
+                try:
+                    if os.path.getmtime(self.blob_path(digest)) < cutoff:
+                        expired.append(digest)
+                except OSError:
+                    expired.append(digest)
+            with self._lock:
+                for digest in expired:
+                    self._total_bytes -= self._index.pop(digest, 0)
+        for digest in evicted + expired:
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+        with self._lock:
+            self._counts['evicted'] += len(evicted)
+            self._counts['expired'] += len(expired)
+            # 引用在查询时发现缩略图不存在即失效，这里只清理内存中的映射
+            removed = set(evicted + expired)
+            for url in [url for url, digest in self._refs.items() if digest in removed]:
+                del self._refs[url]
+
+    async def _fetch(self, url):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        try:
+            async with self._semaphore:
+                # 按字节上限流式读取，Content-Length超出上限时不下载正文
+                response = await get_crawl_engine().fetch(url, headers=_HEADERS, max_bytes=self.max_image_bytes,
+                                                          label='thumbnail', html=False)
+            content_type = response.headers.get('Content-Type', '')
+            if response.status_code != 200 or not content_type.startswith('image/'):
+                raise ValueError(f'状态码{response.status_code}，内容类型{content_type}')
+            if response.truncated:
+                raise ValueError(f'图片大小超出上限{self.max_image_bytes}')
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._store, url, response.content)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            with self._lock:
+                self._counts['failed'] += 1
+            logger.debug(f"封面缩略图生成失败：{url}，{e}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def enqueue(self, urls):
+        """
+        在后台下载封面并生成缩略图，已缓存或正在处理的URL会被跳过
+
+        Args:
+            urls (iterable): 封面URL列表
+
+        Returns:
+            int: 新加入队列的数量
+        """
+        if not self.enabled:
+            return 0
+        queued = []
+        for url in dict.fromkeys(urls):
+            if not url or not url.startswith(('http://', 'https://')) or self.lookup(url):
+                continue
+            with self._lock:
+                if url in self._pending:
+                    continue
+                self._pending.add(url)
+                self._counts['queued'] += 1
+            queued.append(url)
+        engine = get_crawl_engine()
+        for url in queued:
+            engine.submit(self._fetch(url))
+        return len(queued)
+
+    def stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            return dict(
+                self._counts,
+                enabled=self.enabled,
+                entries=len(self._index),
+                bytes=self._total_bytes,
+                max_bytes=self.max_bytes,
+                pending=len(self._pending)
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_thumbnail_store():
+    """
+    获取进程级共享的缩略图缓存
+
+    Returns:
+        ThumbnailStore: 共享缓存实例
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                width, _, height = str(get_config_value('THUMBNAIL_SIZE', '160x120')).partition('x')
+                _store = ThumbnailStore(
+                    directory=get_config_value('THUMBNAIL_DIR'),
+                    size=(int(width), int(height or width)),
+                    max_bytes=int(get_config_value('THUMBNAIL_MAX_BYTES', 128 * 1024 * 1024)),
+                    max_age=int(get_config_value('THUMBNAIL_MAX_AGE_DAYS', 30)) * 86400,
+                    max_image_bytes=int(get_config_value('THUMBNAIL_MAX_IMAGE_BYTES', 5 * 1024 * 1024)),
+                    max_workers=int(get_config_value('THUMBNAIL_WORKERS', 8))
+                )
+    return _store
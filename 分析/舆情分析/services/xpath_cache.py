@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import OrderedDict
+
+from lxml import etree
+
+from utils.config_helper import get_config_value
+
+# 提取元素及其所有子元素的文本
+TEXT_OF = etree.XPath('string()')
+
+
+class CompiledXPath:
+    """编译后的XPath表达式，调用时记录求值耗时"""
+
+    __slots__ = ('expr', 'label', 'xpath', '_stats')
+
+    def __init__(self, expr, label, stats=None):
+        """
+        编译表达式
+
+        Args:
+            expr (str): XPath表达式
+            label (str): 统计时的归属，如rule:3、fallback
+            stats (XPathCache): 记录耗时的缓存，为空时不记录
+
+        Raises:
+            etree.XPathSyntaxError: 表达式语法错误
+        """
+        started = time.perf_counter()
+        self.expr = expr
+        self.label = label
+        self.xpath = etree.XPath(expr)
+        self._stats = stats
+        if stats is not None:
+            stats.record(label, expr, compile_ms=(time.perf_counter() - started) * 1000)
+
+    def __call__(self, tree):
+        started = time.perf_counter()
+        try:
+            return self.xpath(tree)
+        finally:
+            if self._stats is not None:
+                self._stats.record(self.label, self.expr, eval_ms=(time.perf_counter() - started) * 1000)
+
+
+class CompiledRule:
+    """一条采集规则某个版本编译后的标题和内容XPath，规则中未设置的为None"""
+
+    __slots__ = ('version', 'title_expr', 'content_expr', 'title', 'content')
+
+    def __init__(self, version, title_expr, content_expr, title, content):
+        self.version = version
+        self.title_expr = title_expr
+        self.content_expr = content_expr
+        self.title = title
+        self.content = content
+
+
+class XPathCache:
+    """
+    编译后的XPath缓存及耗时统计
+
+    采集规则的XPath按(规则ID, updated_at)缓存编译结果，规则更新后版本变化即重新编译并替换旧版本；
+    没有ID的规则（自动生成的规则等）按表达式文本缓存。每个表达式的编译和求值次数、耗时按规则分别统计，
+    便于找出耗时异常的表达式。
+    """
+
+    def __init__(self, max_rules=1024):
+        """
+        初始化缓存
+
+        Args:
+            max_rules (int): 缓存的规则数量上限，超出后按最近最少使用淘汰
+        """
+        self.max_rules = max_rules
+        self._lock = threading.Lock()
+        self._rules = OrderedDict()
+        self._stats = {}
+        self._counts = {'hits': 0, 'compiles': 0}
+
+    def record(self, label, expr, compile_ms=None, eval_ms=None):
+        """记录一次编译或求值的耗时（毫秒）"""
+        with self._lock:
+            stats = self._stats.get((label, expr))
+            if stats is None:
+                stats = self._stats[(label, expr)] = {'compiles': 0, 'compile_ms': 0.0, 'evals': 0, 'eval_ms': 0.0,
+                                                      'max_eval_ms': 0.0}
+            if compile_ms is not None:
+                stats['compiles'] += 1
+                stats['compile_ms'] += compile_ms
+            if eval_ms is not None:
+                stats['evals'] += 1
+                stats['eval_ms'] += eval_ms
+                stats['max_eval_ms'] = max(stats['max_eval_ms'], eval_ms)
+
+    def compile(self, expr, label):
+        """编译表达式并记录编译耗时"""
+        return CompiledXPath(expr, label, self)
+
+    def for_rule(self, rule):
+        """
+        获取规则编译后的XPath
+
+        Args:
+            rule (CollectionRule|RuleXPaths): 采集规则，读取title_xpath、content_xpath以及id、updated_at
+
+        Returns:
+            CompiledRule: 编译结果
+
+        Raises:
+            etree.XPathSyntaxError: 规则中的表达式语法错误
+        """
+        rule_id = getattr(rule, 'id', None)
+        version = getattr(rule, 'updated_at', None)
+        title_expr, content_expr = rule.title_xpath or None, rule.content_xpath or None
+        if rule_id is not None and version is not None:
+            key = rule_id
+        else:
+            key = ('expr', title_expr, content_expr)
+
+        with self._lock:
+            compiled = self._rules.get(key)
+            # 同一版本的表达式一致时才复用，规则在内存中被修改但尚未保存时同样重新编译
+            if (compiled is not None and compiled.version == version
+                    and compiled.title_expr == title_expr and compiled.content_expr == content_expr):
+                self._rules.move_to_end(key)
+                self._counts['hits'] += 1
+                return compiled
+
+        label = f'rule:{rule_id}' if rule_id is not None else 'rule:-'
+        compiled = CompiledRule(
+            version, title_expr, content_expr,
+            self.compile(title_expr, label) if title_expr else None,
+            self.compile(content_expr, label) if content_expr else None
+        )
+        with self._lock:
+            self._counts['compiles'] += 1
+            self._rules[key] = compiled
+            self._rules.move_to_end(key)
+            while len(self._rules) > self.max_rules:
+                self._rules.popitem(last=False)
+        return compiled
+
+    def stats(self, top=20):
+        """
+        获取统计信息
+
+        Args:
+            top (int): 按累计求值耗时返回的表达式数量
+
+        Returns:
+            dict: 缓存命中和编译次数，以及累计求值耗时最高的表达式
+        """
+        with self._lock:
+            items = [(label, expr, dict(stats)) for (label, expr), stats in self._stats.items()]
+            counts = dict(self._counts, rules=len(self._rules))
+        items.sort(key=lambda item: item[2]['eval_ms'], reverse=True)
+        counts['expressions'] = [
+            {
+                'label': label,
+                'xpath': expr,
+                'compiles': stats['compiles'],
+                'compile_ms': round(stats['compile_ms'], 3),
+                'evals': stats['evals'],
+                'avg_eval_ms': round(stats['eval_ms'] / stats['evals'], 3) if stats['evals'] else 0.0,
+                'max_eval_ms': round(stats['max_eval_ms'], 3),
+                'total_eval_ms': round(stats['eval_ms'], 2)
+            }
+            for label, expr, stats in items[:top]
+        ]
+        return counts
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_xpath_cache():
+    """
+    获取进程级共享的XPath缓存
+
+    Returns:
+        XPathCache: 共享缓存实例
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = XPathCache(max_rules=int(get_config_value('XPATH_CACHE_RULES', 1024)))
+    return _cache
+
+
+def compile_list(exprs, label):
+    """编译固定的候选表达式列表，在模块加载时调用一次"""
+    return [get_xpath_cache().compile(expr, label) for expr in exprs]
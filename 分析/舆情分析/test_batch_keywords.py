@@ -0,0 +1,49 @@
+import requests
+import time
+
+# 登录信息
+login_data = {
+    'username': 'admin',
+    'password': 'admin123',
+    'remember': 'on'
+}
+
+# 创建会话
+session = requests.Session()
+
+# 登录
+domain = 'http://127.0.0.1:5000'
+login_url = f'{domain}/login'
+response = session.post(login_url, data=login_data)
+
+if response.url != login_url:
+    print('✓ 登录成功')
+    
+    # 多关键词批量采集，每个关键词采集第1-3页
+    batch_url = f'{domain}/data/collection/batch'
+    keywords = ['宜宾', '成都', '人工智能', '乡村振兴']
+    
+    start = time.time()
+    response = session.post(batch_url, data={
+        'spider_type': 'baidu',
+        'keywords': '\n'.join(keywords),
+        'page': 1,
+        'page_end': 3
+    })
+    elapsed = time.time() - start
+    
+    result = response.json()
+    print(f'状态码: {result.get("code")}')
+    print(f'消息: {result.get("msg")}')
+    print(f'请求耗时: {elapsed:.2f}秒')
+    
+    if result.get('code') == 0:
+        summary = result.get('summary', {})
+        print('✓ 批量采集成功')
+        for item in summary.get('keywords', []):
+            print(f'  {item["keyword"]}: 抓取{item["fetched"]}条，去重后{item["unique"]}条')
+        print(f'新增记录: {summary.get("saved")}')
+    else:
+        print('✗ 批量采集失败')
+else:
+    print('✗ 登录失败')
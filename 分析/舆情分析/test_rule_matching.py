@@ -0,0 +1,105 @@
+# 测试批量入库时采集规则的匹配与创建
+#
+# 使用内存数据库，不访问网络：
+#     python test_rule_matching.py
+
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from run import app
+from __init__ import db
+from models import CollectionRule, CollectionTemp, Role, User
+from services.rule_index import bump_rule_version, get_rule_index
+
+app.config['WTF_CSRF_ENABLED'] = False
+
+
+def setup():
+    """建表并创建管理员，返回已登录的测试客户端"""
+    db.create_all()
+    db.session.add(Role(id=1, name='admin'))
+    db.session.add(Role(id=2, name='user'))
+    db.session.add(User(username='admin', password='admin123', role_id=1))
+    db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+def batch_save(client, items):
+    """把(来源, URL)列表写入临时表后批量入库，返回接口响应"""
+    ids = []
+    for index, (source, url) in enumerate(items):
+        temp = CollectionTemp(title=f'标题{index}', content='内容', source=source, url=url)
+        db.session.add(temp)
+        db.session.flush()
+        ids.append(str(temp.id))
+    db.session.commit()
+    return client.post('/data/warehouse/batch-save', data={'collection_ids[]': ids}).get_json()
+
+
+def check(passed, message):
+    print(f"{'✓' if passed else '✗'} {message}")
+    return passed
+
+
+def test_root_rule_vs_other_source(client):
+    """百度首页的规则不应抢走百度子域名上其他来源的数据"""
+    print("\n1. 百度首页规则与其他来源...")
+    baidu = CollectionRule(site_name='百度', site_url='https://www.baidu.com/', title_xpath='//h1',
+                           content_xpath='//article', request_headers='{}')
+    db.session.add(baidu)
+    bump_rule_version()
+    db.session.commit()
+
+    result = batch_save(client, [
+        ('百度', 'https://www.baidu.com/news/1.html'),
+        ('百家号', 'https://baijiahao.baidu.com/s?id=1'),
+    ])
+    ok = check(result['code'] == 0, f"批量入库：{result['msg']}")
+
+    ok &= check(CollectionRule.query.filter_by(site_name='百度').count() == 1, '同一主机的数据沿用百度首页规则')
+    created = CollectionRule.query.filter_by(site_name='百家号').first()
+    ok &= check(created is not None, '其他来源没有被上级域名的百度规则代为匹配，新建了自己的规则')
+    ok &= check(created is not None and created.site_url == 'https://baijiahao.baidu.com/',
+                f"新规则按站点首页匹配：{created.site_url if created else None}")
+
+    index = get_rule_index().refresh()
+    ok &= check(index.resolve('百家号', 'https://baijiahao.baidu.com/s?id=2').site_name == '百家号',
+                '来源名称优先于上级域名的规则')
+    ok &= check(index.resolve('未知来源', 'https://tieba.baidu.com/p/1').site_name == '百度',
+                '没有同主机和同名规则时才使用上级域名的规则')
+    return ok
+
+
+def test_redirector_url(client):
+    """跳转服务主机上的地址不能代表文章所在的站点，新建的规则只按来源名称匹配"""
+    print("\n2. 跳转服务上的地址...")
+    # 与规则管理接口一样，删除规则时更新版本戳
+    CollectionRule.query.filter_by(site_name='百度').delete()
+    bump_rule_version()
+    db.session.commit()
+
+    result = batch_save(client, [('宜宾发布', 'https://www.baidu.com/s?wd=%E5%AE%9C%E5%AE%BE')])
+    ok = check(result['code'] == 0, f"批量入库：{result['msg']}")
+
+    created = CollectionRule.query.filter_by(site_name='宜宾发布').first()
+    ok &= check(created is not None, '为来源新建了规则')
+    ok &= check(created is not None and created.site_url == '', '规则不以跳转服务的主机作为站点地址')
+
+    index = get_rule_index().refresh()
+    ok &= check(index.resolve('其他来源', 'https://www.baidu.com/s?wd=1') is None,
+                '跳转服务上其他来源的数据不会匹配到这条规则')
+    return ok
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        client = setup()
+        results = [test_root_rule_vs_other_source(client), test_redirector_url(client)]
+    print(f"\n{sum(results)}/{len(results)} 组测试通过")
+    sys.exit(0 if all(results) else 1)
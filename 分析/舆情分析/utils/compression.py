@@ -0,0 +1,116 @@
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # 未安装zstandard时使用zlib压缩
+    zstandard = None
+
+CODECS = ('zstd', 'zlib')
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+DEFAULT_LEVELS = {'zstd': 9, 'zlib': 6}
+
+# zstandard的压缩和解压对象不能在线程间共享，每个线程各自创建
+_local = threading.local()
+
+
+def resolve_codec(codec):
+    """
+    获取实际使用的压缩格式，配置为zstd但未安装zstandard时退回zlib
+
+    Args:
+        codec (str): zstd或zlib
+
+    Returns:
+        str: 实际使用的压缩格式
+    """
+    if codec not in CODECS:
+        raise ValueError(f'不支持的压缩格式：{codec}')
+    if codec == 'zstd' and zstandard is None:
+        return 'zlib'
+    return codec
+
+
+def codec_of(data):
+    """
+    按数据头部识别压缩格式
+
+    Args:
+        data (bytes): 数据库中保存的数据
+
+    Returns:
+        str: zstd、zlib，未压缩时返回None
+    """
+    if data[:4] == ZSTD_MAGIC:
+        return 'zstd'
+    # zlib头部第一个字节为0x78（deflate、32K窗口），前两个字节按大端组成的数能被31整除
+    if len(data) >= 2 and data[0] == 0x78 and ((data[0] << 8) | data[1]) % 31 == 0:
+        return 'zlib'
+    return None
+
+
+def _zstd_compressor(level):
+    compressors = getattr(_local, 'compressors', None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    compressor = compressors.get(level)
+    if compressor is None:
+        compressor = compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_local, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def compress_text(text, codec='zstd', level=None):
+    """
+    压缩文本
+
+    Args:
+        text (str): 文本
+        codec (str): zstd或zlib，未安装zstandard时使用zlib
+        level (int): 压缩级别，为空时使用各格式的默认级别
+
+    Returns:
+        bytes: 压缩后的数据，带有该格式的标准头部
+    """
+    codec = resolve_codec(codec)
+    level = DEFAULT_LEVELS[codec] if level is None else int(level)
+    data = text.encode('utf-8')
+    if codec == 'zstd':
+        return _zstd_compressor(level).compress(data)
+    return zlib.compress(data, level)
+
+
+def decompress_text(data):
+    """
+    解压文本，未压缩的数据按UTF-8解码后原样返回
+
+    Args:
+        data (bytes|str): 数据库中保存的数据，压缩之前写入的行可能是str
+
+    Returns:
+        str: 文本
+
+    Raises:
+        RuntimeError: 数据为zstd格式但未安装zstandard
+    """
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    codec = codec_of(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('数据为zstd压缩格式，需要安装zstandard')
+        return _zstd_decompressor().decompress(data).decode('utf-8')
+    if codec == 'zlib':
+        try:
+            return zlib.decompress(data).decode('utf-8')
+        except zlib.error:
+            # 恰好以类似zlib头部开头的未压缩文本
+            pass
+    return data.decode('utf-8', errors='replace')
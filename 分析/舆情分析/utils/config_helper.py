@@ -0,0 +1,24 @@
+from flask import current_app, has_app_context
+
+
+def get_config_value(name, default=None):
+    """
+    读取配置项，优先使用当前应用的配置，脱离应用上下文时回退到Config类
+
+    爬虫模块既会在请求中被调用，也会在命令行或后台线程中独立运行，
+    因此不能假设始终存在应用上下文。
+
+    Args:
+        name (str): 配置项名称
+        default: 配置项不存在时的默认值
+
+    Returns:
+        配置项的值
+    """
+    if has_app_context():
+        value = current_app.config.get(name)
+        if value is not None:
+            return value
+
+    from config import Config
+    return getattr(Config, name, default)
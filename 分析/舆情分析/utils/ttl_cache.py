@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """一次正在进行的加载，等待者共享同一个结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    带过期时间和单飞加载的内存缓存
+
+    同一个键并发未命中时只有一个线程执行加载函数，其他线程等待并共享其结果；
+    加载失败不缓存，等待者收到同样的异常。
+    """
+
+    def __init__(self, ttl=60, maxsize=128):
+        """
+        初始化缓存
+
+        Args:
+            ttl (float): 缓存有效期（秒）
+            maxsize (int): 最多保存的键数量，超出时淘汰最早写入的键
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._flights = {}
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+
+    def get(self, key):
+        """
+        获取未过期的缓存值
+
+        Returns:
+            缓存值，不存在或已过期时返回None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._hits += 1
+                return item[1]
+            return None
+
+    def set(self, key, value):
+        """写入缓存值"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """
+        获取缓存值，未命中时调用加载函数，同一个键同时只加载一次
+
+        Args:
+            key: 缓存键
+            loader (callable): 无参加载函数，返回None时不缓存
+
+        Returns:
+            缓存值或加载结果
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._hits += 1
+                return item[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            if flight.value is not None:
+                self.set(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """删除指定键，key为空时清空全部缓存"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        """获取命中统计"""
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'entries': len(self._data),
+                'hits': self._hits,
+                'misses': self._misses,
+                'shared_loads': self._shared
+            }
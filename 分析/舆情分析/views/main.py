@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, Response, stream_with_context, send_file
 from flask_login import login_user, logout_user, login_required, current_user
 from __init__ import db
 from models import User, Role, Setting, DataWarehouse, CollectionRule, AiEngine
@@ -6,8 +6,31 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import time
 import functools
+import hashlib
 import requests
 from lxml import etree
+from services.http_client import get_http_pool
+from services.http_cache import get_http_cache
+from services.async_engine import get_crawl_engine
+from services.rate_limiter import get_rate_limiter, load_rule_overrides
+from services.retry import get_retry_policy
+from utils.config_helper import get_config_value
+from services.encoding import get_encoding_resolver, html_tree
+from services.spider import get_list_cache
+from services.spider_registry import get_spider_registry
+from services.redirect_resolver import get_redirect_resolver
+from services.thumbnails import get_thumbnail_store
+from services.frontier import get_frontier
+from services.http_archive import get_http_archive
+from services.scheduler import get_scheduler, task_interval
+from services.jobs import get_job_runner
+from services.rule_index import bump_rule_version, get_rule_index, site_root
+from services.xpath_cache import get_xpath_cache
+from services.fetch_timing import current_collector, get_fetch_metrics, start_collecting, stop_collecting
+from services.collection_store import insert_collection_results, is_dirty_text
+from services.detail_collector import (
+    parse_rule_headers, detail_download_limits, detail_parse_key, extract_detail_fields, auto_update_rules
+)
 import json
 import logging
 
@@ -25,6 +48,43 @@ def admin_required(f):
 # 创建蓝图
 main = Blueprint('main', __name__)
 
+@main.before_app_request
+def start_fetch_timing():
+    """开启抓取耗时响应头时，收集本次请求中发生的全部抓取"""
+    requested = request.headers.get('X-Fetch-Timing') == '1' and current_user.is_authenticated and current_user.is_admin
+    if get_config_value('FETCH_TIMING_HEADER', False) or requested:
+        start_collecting()
+
+@main.after_app_request
+def add_fetch_timing_header(response):
+    """以Server-Timing响应头返回本次请求的抓取耗时分解，流式响应在生成内容前即已发送响应头，不包含该信息"""
+    collector = current_collector()
+    if collector is not None and collector.timings:
+        response.headers['Server-Timing'] = collector.server_timing()
+    return response
+
+@main.teardown_app_request
+def stop_fetch_timing(exc=None):
+    stop_collecting()
+
+def parse_rule_limits(data):
+    """
+    解析采集规则表单中的站点限额，留空表示使用全局配置
+    
+    Returns:
+        tuple: (每秒请求数, 最大在途请求数)
+    
+    Raises:
+        ValueError: 取值不是正数
+    """
+    rate_limit_rps = data.get('rate_limit_rps')
+    max_concurrency = data.get('max_concurrency')
+    rate_limit_rps = float(rate_limit_rps) if rate_limit_rps not in (None, '') else None
+    max_concurrency = int(max_concurrency) if max_concurrency not in (None, '') else None
+    if (rate_limit_rps is not None and rate_limit_rps <= 0) or (max_concurrency is not None and max_concurrency <= 0):
+        raise ValueError('限额必须为正数')
+    return rate_limit_rps, max_concurrency
+
 @main.route('/')
 @login_required
 def index():
@@ -207,6 +267,98 @@ def admin_save_setting():
 
 
 
+# 单次采集允许的最大页数
+MAX_COLLECTION_PAGES = 50
+# 批量采集单次允许的最大关键词数
+MAX_BATCH_KEYWORDS = 100
+def save_collection_results(results, user_id):
+    """
+    过滤脏数据并将采集结果写入临时表
+    
+    Args:
+        results (list): 采集结果列表
+        user_id (int): 采集者ID
+        
+    Returns:
+        tuple: (新增数量, 过滤脏数据数量, 重复数量)
+    """
+    saved, filtered_count, duplicate_count = insert_collection_results(results, user_id)
+    db.session.commit()
+    return len(saved), filtered_count, duplicate_count
+
+def format_collection(item):
+    """将临时采集记录转换为前端需要的格式"""
+    return {
+        'id': item.id,
+        'title': item.title,
+        'summary': item.summary,
+        'content': item.content,
+        'cover': item.cover,
+        'thumbnail': get_thumbnail_store().url_for(item.cover),
+        'url': item.url,
+        'source': item.source,
+        'collected_at': item.collected_at.isoformat(),
+        'is_deep_collected': item.is_deep_collected
+    }
+
+def format_collections(user_id):
+    """查询用户的全部临时采集数据并转换为前端需要的格式"""
+    from models import CollectionTemp
+    
+    all_collections = CollectionTemp.query.filter_by(collected_by=user_id).order_by(CollectionTemp.collected_at.desc()).all()
+    return [format_collection(item) for item in all_collections]
+
+def parse_page_range(form):
+    """
+    解析并校验采集的页码范围
+    
+    Args:
+        form: 请求参数，page为起始页码，可选的page_end为结束页码
+        
+    Returns:
+        list: 页码列表
+        
+    Raises:
+        ValueError: 页码范围不正确，异常信息可直接返回给前端
+    """
+    try:
+        page = int(form.get('page', 1))
+        # 可选的结束页码，与page组成页码范围
+        page_end = int(form.get('page_end') or page)
+    except (TypeError, ValueError):
+        raise ValueError('页码范围不正确')
+    
+    if page < 1 or page_end < page:
+        raise ValueError('页码范围不正确')
+    if page_end - page + 1 > MAX_COLLECTION_PAGES:
+        raise ValueError(f'单次最多采集{MAX_COLLECTION_PAGES}页')
+    return list(range(page, page_end + 1))
+
+def prepare_collection(form):
+    """
+    校验采集参数并创建爬虫
+    
+    Args:
+        form: 请求参数
+        
+    Returns:
+        tuple: (爬虫实例, 关键词, 页码列表)
+        
+    Raises:
+        ValueError: 参数不正确，异常信息可直接返回给前端
+    """
+    spider_type = form.get('spider_type', 'baidu')
+    keyword = form.get('keyword', '')
+    pages = parse_page_range(form)
+    
+    spider = get_spider_registry().create(spider_type)
+    if spider is None:
+        raise ValueError('不支持的爬虫类型')
+    # 按关键词搜索的爬虫需要关键词
+    if spider.requires_keyword and not keyword:
+        raise ValueError('请输入搜索关键词')
+    return spider, keyword, pages
+
 @main.route('/data/collection', methods=['GET', 'POST'])
 @login_required
 def data_collection():
@@ -215,97 +367,39 @@ def data_collection():
         # 获取当前用户的采集结果
         from models import CollectionTemp
         collections = CollectionTemp.query.filter_by(collected_by=current_user.id).order_by(CollectionTemp.collected_at.desc()).all()
-        return render_template('data_collection.html', collections=collections)
+        return render_template('data_collection.html', collections=collections,
+                               spiders=get_spider_registry().choices(),
+                               thumbnail_url=get_thumbnail_store().url_for)
     
     # 处理POST请求
-    spider_type = request.form.get('spider_type', 'baidu')
-    keyword = request.form.get('keyword', '')
-    page = int(request.form.get('page', 1))
-    
+    logger = logging.getLogger(__name__)
     try:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"用户{current_user.id}开始采集数据，爬虫类型：{spider_type}，关键词：{keyword}，页码：{page}")
-        
-        if spider_type == 'baidu':
-            from services.spider import BaiduSpider
-            spider = BaiduSpider()
-            # 百度爬虫需要关键词
-            if not keyword:
-                logger.warning(f"用户{current_user.id}未输入关键词，采集失败")
-                return jsonify({'code': 1, 'msg': '请输入搜索关键词'})
-            results = spider.fetch_data(keyword, page)
-        elif spider_type == 'xinhua':
-            from services.spider import XinhuaSpider
-            spider = XinhuaSpider()
-            # 新华爬虫目前不支持关键词搜索，使用默认关键词
-            results = spider.fetch_data(keyword, page)
+        try:
+            spider, keyword, pages = prepare_collection(request.form)
+        except ValueError as e:
+            logger.warning(f"用户{current_user.id}采集参数不正确：{e}")
+            return jsonify({'code': 1, 'msg': str(e)})
+        logger.info(f"用户{current_user.id}开始采集数据，爬虫类型：{request.form.get('spider_type', 'baidu')}，关键词：{keyword}，页码：{pages[0]}-{pages[-1]}")
+        
+        # 同步采集规则中配置的站点限额
+        load_rule_overrides()
+        
+        if len(pages) > 1:
+            # 多页抓取，结果数受MAX_CRAWL_RESULTS限制
+            results = spider.fetch_pages(keyword, pages)
         else:
-            logger.warning(f"用户{current_user.id}使用不支持的爬虫类型：{spider_type}")
-            return jsonify({'code': 1, 'msg': '不支持的爬虫类型'})
+            results = spider.fetch_data(keyword, pages[0])
         
         logger.info(f"用户{current_user.id}采集到{len(results)}条数据")
-        def _is_dirty_text(s):
-            if s is None:
-                return True
-            t = str(s).strip()
-            if t == '':
-                return True
-            l = t.lower()
-            return l in {'未知', '无标题', '未知标题', 'none', 'null', '-', 'n/a'}
-        def _is_dirty_item(r):
-            return _is_dirty_text(r.get('title')) or _is_dirty_text(r.get('summary')) or _is_dirty_text(r.get('url'))
-        raw_count = len(results)
-        results = [r for r in results if not _is_dirty_item(r)]
-        filtered_count = raw_count - len(results)
         
         # 将采集结果保存到临时表
-        from models import CollectionTemp
-        from datetime import datetime
-        
-        saved_count = 0
-        for result in results:
-            # 检查是否已存在相同URL的记录
-            existing = CollectionTemp.query.filter_by(url=result.get('url'), collected_by=current_user.id).first()
-            if not existing:
-                # 创建新的临时记录
-                temp_item = CollectionTemp(
-                    title=result.get('title', ''),
-                    content=result.get('summary', ''),
-                    summary=result.get('summary', ''),
-                    source=result.get('source', ''),
-                    url=result.get('url', ''),
-                    cover=result.get('cover', ''),
-                    collected_by=current_user.id
-                )
-                db.session.add(temp_item)
-                saved_count += 1
-        
-        db.session.commit()
+        saved_count, filtered_count, _ = save_collection_results(results, current_user.id)
         logger.info(f"用户{current_user.id}成功保存{saved_count}条新记录到临时表")
         
-        # 保存成功后，重新查询数据库获取所有数据，包含id字段
-        all_collections = CollectionTemp.query.filter_by(collected_by=current_user.id).order_by(CollectionTemp.collected_at.desc()).all()
-        
-        # 转换为前端需要的格式
-        formatted_data = []
-        for item in all_collections:
-            formatted_data.append({
-                'id': item.id,
-                'title': item.title,
-                'summary': item.summary,
-                'content': item.content,
-                'cover': item.cover,
-                'url': item.url,
-                'source': item.source,
-                'collected_at': item.collected_at.isoformat(),
-                'is_deep_collected': item.is_deep_collected
-            })
-        
         return jsonify({
             'code': 0, 
             'msg': f'采集成功，新增{saved_count}条记录，过滤脏数据{filtered_count}条', 
-            'data': formatted_data
+            'data': format_collections(current_user.id)
         })
     except Exception as e:
         db.session.rollback()
@@ -313,8 +407,164 @@ def data_collection():
         return jsonify({'code': 1, 'msg': f'采集失败：{str(e)}'})
 
 
+@main.route('/data/collection/stream', methods=['GET', 'POST'])
+@login_required
+def data_collection_stream():
+    """
+    流式采集API
+    
+    每解析完一页即写入临时表并推送本页新增的记录，不必等所有页面采集完毕。默认输出NDJSON，
+    每行一个{"event": 事件类型, "data": 数据}；format=sse或Accept为text/event-stream时输出
+    服务器推送事件，可直接用EventSource接收。事件类型：item（新增记录）、done（采集完成及统计）、
+    error（采集失败）。
+    """
+    logger = logging.getLogger(__name__)
+    user_id = current_user.id
+    try:
+        spider, keyword, pages = prepare_collection(request.values)
+    except ValueError as e:
+        logger.warning(f"用户{user_id}采集参数不正确：{e}")
+        return jsonify({'code': 1, 'msg': str(e)})
+    logger.info(f"用户{user_id}开始流式采集数据，爬虫类型：{request.values.get('spider_type', 'baidu')}，关键词：{keyword}，页码：{pages[0]}-{pages[-1]}")
+    
+    # 同步采集规则中配置的站点限额
+    load_rule_overrides()
+    
+    use_sse = request.values.get('format') == 'sse' or request.accept_mimetypes.best == 'text/event-stream'
+    
+    def encode(event, data):
+        payload = json.dumps(data, ensure_ascii=False)
+        if use_sse:
+            return f"event: {event}\ndata: {payload}\n\n"
+        return f'{{"event": "{event}", "data": {payload}}}\n'
+    
+    def generate():
+        saved_count = filtered_count = duplicate_count = 0
+        page_results = spider.iter_pages(keyword, pages)
+        try:
+            for items in page_results:
+                # 每页单独提交，内存中只保留当前页
+                saved, filtered, duplicates = insert_collection_results(items, user_id)
+                data = [format_collection(item) for item in saved]
+                db.session.commit()
+                saved_count += len(saved)
+                filtered_count += filtered
+                duplicate_count += duplicates
+                for item in data:
+                    yield encode('item', item)
+            
+            logger.info(f"用户{user_id}流式采集完成，新增{saved_count}条记录")
+            yield encode('done', {
+                'saved': saved_count,
+                'filtered': filtered_count,
+                'duplicates': duplicate_count,
+                'msg': f'采集成功，新增{saved_count}条记录，过滤脏数据{filtered_count}条'
+            })
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"用户{user_id}流式采集数据失败：{str(e)}", exc_info=True)
+            yield encode('error', {'msg': f'采集失败：{str(e)}'})
+        finally:
+            # 客户端断开时关闭生成器，取消尚未完成的页面请求
+            page_results.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@main.route('/thumbnails/<digest>.jpg')
+@login_required
+def thumbnail(digest):
+    """封面缩略图，内容按摘要寻址不会变化，浏览器可长期缓存"""
+    store = get_thumbnail_store()
+    if not store.is_digest(digest) or not store.touch(digest):
+        return jsonify({'code': 1, 'msg': '缩略图不存在'}), 404
+    response = send_file(store.blob_path(digest), mimetype='image/jpeg', max_age=31536000, conditional=True, etag=digest)
+    # 缩略图需要登录后访问，只允许浏览器缓存，不允许共享缓存
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+
 
 
+@main.route('/data/collection/batch', methods=['POST'])
+@login_required
+def batch_data_collection():
+    """多关键词批量采集"""
+    logger = logging.getLogger(__name__)
+    spider_type = request.form.get('spider_type', 'baidu')
+    raw_keywords = request.form.get('keywords', '')
+    
+    # 关键词支持换行、英文逗号和中文逗号分隔，去除空白与重复项并保持输入顺序
+    keywords = []
+    for keyword in raw_keywords.replace('，', '\n').replace(',', '\n').splitlines():
+        keyword = keyword.strip()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    
+    if not keywords:
+        return jsonify({'code': 1, 'msg': '请输入搜索关键词'})
+    if len(keywords) > MAX_BATCH_KEYWORDS:
+        return jsonify({'code': 1, 'msg': f'单次最多批量采集{MAX_BATCH_KEYWORDS}个关键词'})
+    try:
+        pages = parse_page_range(request.form)
+    except ValueError as e:
+        return jsonify({'code': 1, 'msg': str(e)})
+    if spider_type != 'baidu':
+        return jsonify({'code': 1, 'msg': '批量采集仅支持百度新闻爬虫'})
+    
+    try:
+        logger.info(f"用户{current_user.id}开始批量采集，关键词{len(keywords)}个，页码：{pages[0]}-{pages[-1]}")
+        started = time.time()
+        
+        load_rule_overrides()
+        from services.spider import BaiduSpider
+        spider = BaiduSpider()
+        keyword_results = spider.fetch_keywords(keywords, pages)
+        
+        # 跨关键词按URL去重，同一篇文章只归属于最先命中的关键词
+        results = []
+        seen_urls = set()
+        summary = []
+        for keyword in keywords:
+            items = keyword_results.get(keyword, [])
+            unique = 0
+            for item in items:
+                if item.get('url') in seen_urls:
+                    continue
+                seen_urls.add(item.get('url'))
+                results.append(item)
+                unique += 1
+            summary.append({'keyword': keyword, 'fetched': len(items), 'unique': unique})
+        
+        fetched_count = sum(item['fetched'] for item in summary)
+        saved_count, filtered_count, duplicate_count = save_collection_results(results, current_user.id)
+        elapsed = round(time.time() - started, 2)
+        logger.info(f"用户{current_user.id}批量采集完成，抓取{fetched_count}条，新增{saved_count}条，耗时{elapsed}秒")
+        
+        return jsonify({
+            'code': 0,
+            'msg': f'批量采集完成，{len(keywords)}个关键词共抓取{fetched_count}条，新增{saved_count}条记录，'
+                   f'跨关键词重复{fetched_count - len(results)}条，已存在{duplicate_count}条，过滤脏数据{filtered_count}条',
+            'summary': {
+                'keywords': summary,
+                'fetched': fetched_count,
+                'saved': saved_count,
+                'cross_keyword_duplicates': fetched_count - len(results),
+                'existing_duplicates': duplicate_count,
+                'filtered': filtered_count,
+                'elapsed': elapsed
+            },
+            'data': format_collections(current_user.id)
+        })
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"用户{current_user.id}批量采集失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'批量采集失败：{str(e)}'})
 
 @main.route('/data/deep-collection', methods=['POST'])
 @login_required
@@ -409,22 +659,24 @@ def batch_save_to_warehouse():
         saved_count = 0
         saved_ids = []
         dirty_filtered = 0
-        def _is_dirty_text(s):
-            if s is None:
-                return True
-            t = str(s).strip()
-            if t == '':
-                return True
-            l = t.lower()
-            return l in {'未知', '无标题', '未知标题', 'none', 'null', '-', 'n/a'}
+        # 来源对应的采集规则从进程内索引中查找，本批新建的规则单独记录
+        rules = get_rule_index().refresh()
+        resolver = get_redirect_resolver()
+        new_rules = {}
+        
+        # 较早采集的记录可能仍是跳转链接，入库前统一解析为真实地址，避免同一文章重复入库
+        redirects = resolver.resolve_many(
+            url for (url,) in db.session.query(CollectionTemp.url).filter(CollectionTemp.id.in_(collection_ids))
+        )
         
         for collection_id in collection_ids:
             collection = CollectionTemp.query.get(collection_id)
             if not collection:
                 logger.warning(f"用户{current_user.id}尝试保存不存在的临时记录：{collection_id}")
                 continue
+            collection.url = redirects.get(collection.url, collection.url)
             
-            if _is_dirty_text(collection.title) or _is_dirty_text(collection.content) or _is_dirty_text(collection.url):
+            if is_dirty_text(collection.title) or is_dirty_text(collection.content) or is_dirty_text(collection.url):
                 dirty_filtered += 1
                 continue
             
@@ -448,21 +700,23 @@ def batch_save_to_warehouse():
                 # 从临时表中删除已保存的数据
                 db.session.delete(collection)
                 if collection.source:
-                    rule = CollectionRule.query.filter_by(site_name=collection.source).first()
-                    if not rule:
-                        rule = CollectionRule(
+                    # 只有上级域名的规则时仍为该来源创建规则，不让其他站点的规则代为匹配
+                    rule = rules.resolve(collection.source, collection.url, parent_domains=False)
+                    if rule is None and collection.source not in new_rules:
+                        # 规则按站点首页匹配，同一站点的其他页面都能匹配到这条规则；未能解析的跳转链接
+                        # 不代表文章所在的站点，这时只按来源名称匹配
+                        new_rules[collection.source] = CollectionRule(
                             site_name=collection.source,
-                            site_url=collection.url or '',
+                            site_url='' if resolver.is_redirector(collection.url) else site_root(collection.url),
                             title_xpath='//h1',
                             content_xpath='//article',
                             request_headers='{}',
                             created_by=current_user.id
                         )
-                        db.session.add(rule)
-                    else:
-                        if not rule.site_url and collection.url:
-                            rule.site_url = collection.url
+                        db.session.add(new_rules[collection.source])
         
+        if new_rules:
+            bump_rule_version()
         db.session.commit()
         logger.info(f"用户{current_user.id}成功批量保存{saved_count}条数据到仓库")
         return jsonify({'code': 0, 'msg': f'成功保存{saved_count}条数据到仓库，过滤脏数据{dirty_filtered}条', 'saved_ids': saved_ids})
@@ -673,70 +927,33 @@ def detailed_collect(topic_id):
             return jsonify({'code': 1, 'msg': '数据缺少URL或来源信息'})
         
         # 查找匹配的采集规则
-        rule = CollectionRule.query.filter_by(site_name=source).first()
+        rule = get_rule_index().refresh().resolve(source, url)
         if not rule:
             return jsonify({'code': 1, 'msg': f'未找到来源为{source}的采集规则'})
         
         # 解析请求头
-        request_headers = {}
-        try:
-            if rule.request_headers:
-                # 解析JSON格式的请求头
-                raw_headers = json.loads(rule.request_headers)
-                # 清理和验证请求头
-                for key, value in raw_headers.items():
-                    # 确保键名不包含冒号、空格等非法字符
-                    clean_key = key.strip()
-                    if ':' in clean_key or not clean_key:
-                        continue
-                    request_headers[clean_key] = str(value).strip()
-        except (json.JSONDecodeError, AttributeError):
-            # 如果解析失败，使用默认请求头
-            request_headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        
-        # 发送请求获取页面内容
-        response = requests.get(url, headers=request_headers, timeout=10)
-        response.encoding = response.apparent_encoding
-        html = response.text
-        
-        # 使用lxml解析HTML
-        tree = etree.HTML(html)
-        
-        # 提取标题
-        title = ''
-        if rule.title_xpath:
-            title_elements = tree.xpath(rule.title_xpath)
-            if title_elements:
-                # 使用text_content()或string()来提取元素及其所有子元素的文本
-                title = title_elements[0].xpath("string()").strip()
-        
-        # 提取内容
-        content = ''
-        if rule.content_xpath:
-            content_elements = tree.xpath(rule.content_xpath)
-            if content_elements:
-                # 使用string()来提取元素及其所有子元素的文本
-                content = ' '.join([elem.xpath("string()").strip() for elem in content_elements])
-        
-        # 如果内容为空，尝试一些常见的内容XPath
-        if not content:
-            common_content_xpaths = [
-                '//*[@id="detailContent"]',  # 常用的内容ID
-                '//div[@id="detail"]//span[@id="detailContent"]',  # 针对当前页面的内容XPath
-                '//article',
-                '//div[contains(@class, "content")]',
-                '//div[contains(@class, "article")]',
-                '//div[contains(@id, "content")]'
-            ]
-            
-            for xpath in common_content_xpaths:
-                content_elements = tree.xpath(xpath)
-                if content_elements:
-                    content = ' '.join([elem.xpath("string()").strip() for elem in content_elements])
-                    if content:  # 如果成功提取到内容，就停止尝试
-                        break
+        request_headers = parse_rule_headers(rule)
+        load_rule_overrides()
+        
+        # 发送条件请求获取页面内容，页面未变化时直接使用缓存的提取结果
+        # 页面流式下载并边下载边解析，超过大小上限的部分不再读取，非HTML内容直接放弃
+        def parse_detail(response):
+            tree = getattr(response, 'tree', None)
+            if tree is None:
+                # 缓存命中时按缓存的正文重新构建文档树
+                encoding = response.encoding or get_encoding_resolver().resolve_response(response)
+                tree = html_tree(response.content, encoding)
+            return extract_detail_fields(tree, rule)
+        
+        max_bytes, content_types = detail_download_limits()
+        result = get_http_cache().fetch(url, parse=parse_detail, parse_key=detail_parse_key(rule), headers=request_headers,
+                                        max_bytes=max_bytes, content_types=content_types, label='detail')
+        # 请求失败时不写入详细内容，保留之前采集成功的记录
+        if result.status_code != 200:
+            return jsonify({'code': 1, 'msg': f'请求失败，状态码：{result.status_code}'})
+        html = result.response.text
+        title = result.parsed['title'] if result.parsed else ''
+        content = result.parsed['content'] if result.parsed else ''
         
         # 检查是否已经存在详细内容记录
         detailed_content = DetailedContent.query.filter_by(warehouse_id=topic_id).first()
@@ -772,24 +989,20 @@ def detailed_collect(topic_id):
                 new_title_xpath, new_content_xpath = auto_update_rules(html, source)
                 
                 if new_title_xpath or new_content_xpath:
+                    # 索引中的规则是快照，取出数据库中的规则更新
+                    rule = CollectionRule.query.get(rule.id)
                     # 更新规则
                     if new_title_xpath:
                         rule.title_xpath = new_title_xpath
                     if new_content_xpath:
                         rule.content_xpath = new_content_xpath
                     rule.updated_at = datetime.now()
+                    bump_rule_version()
                     db.session.commit()
                     
-                    # 使用新规则再次尝试提取
-                    if new_title_xpath:
-                        title_elements = tree.xpath(new_title_xpath)
-                        if title_elements:
-                            title = title_elements[0].xpath("string()").strip()
-                    
-                    if new_content_xpath:
-                        content_elements = tree.xpath(new_content_xpath)
-                        if content_elements:
-                            content = ' '.join([elem.xpath("string()").strip() for elem in content_elements])
+                    # 使用新规则再次尝试提取，规则版本已变化，按新规则重新编译XPath
+                    fields = extract_detail_fields(etree.HTML(html), rule)
+                    title, content = fields['title'], fields['content']
                     
                     # 更新详细内容记录
                     detailed_content.detailed_title = title
@@ -821,47 +1034,6 @@ def detailed_collect(topic_id):
         logging.getLogger(__name__).error(f"详细内容采集失败：{str(e)}", exc_info=True)
         return jsonify({'code': 1, 'msg': f'采集失败：{str(e)}'})
 
-def auto_update_rules(html, source):
-    """自动更新采集规则"""
-    try:
-        tree = etree.HTML(html)
-        
-        # 尝试自动识别标题元素
-        new_title_xpath = None
-        # 常见的标题标签顺序
-        title_tags = ['//h1', '//h2', '//header//h1', '//header//h2', '//div[contains(@class, "title")]', '//div[contains(@class, "headline")]']
-        
-        for xpath in title_tags:
-            elements = tree.xpath(xpath)
-            if elements:
-                text = elements[0].xpath("string()").strip()
-                if len(text) > 0:
-                    new_title_xpath = xpath
-                    break
-        
-        # 尝试自动识别内容元素
-        new_content_xpath = None
-        # 常见的内容标签顺序
-        content_tags = ['//article', '//div[contains(@class, "content")]', '//div[contains(@class, "article")]', '//div[contains(@id, "content")]', '//section[contains(@class, "main")]', '//div[contains(@class, "post")]']
-        
-        for xpath in content_tags:
-            elements = tree.xpath(xpath)
-            if elements:
-                # 检查是否包含足够的文本内容
-                text = ''.join(elements[0].itertext()).strip()
-                if len(text) > 100:  # 内容长度至少100个字符
-                    new_content_xpath = xpath
-                    break
-        
-        # 如果找到新规则，记录日志
-        if new_title_xpath or new_content_xpath:
-            logging.getLogger(__name__).info(f"自动更新了来源{source}的采集规则: title_xpath={new_title_xpath}, content_xpath={new_content_xpath}")
-        
-        return new_title_xpath, new_content_xpath
-    except Exception as e:
-        logging.getLogger(__name__).error(f"自动分析页面结构失败：{str(e)}", exc_info=True)
-        return None, None
-
 @main.route('/data/warehouse/detailed-content/<int:topic_id>', methods=['GET'])
 @login_required
 def get_detailed_content(topic_id):
@@ -899,7 +1071,6 @@ def get_detailed_content(topic_id):
 @login_required
 def batch_detailed_collect():
     """批量数据详细内容采集"""
-    from models import DetailedContent
     try:
         # 获取要采集的ID列表
         ids = request.form.getlist('ids[]')
@@ -909,159 +1080,35 @@ def batch_detailed_collect():
         # 转换ID列表为整数
         ids = list(map(int, ids))
         
-        # 获取数据仓库中的记录
-        topics = DataWarehouse.query.filter(DataWarehouse.id.in_(ids)).all()
-        if not topics:
-            return jsonify({'code': 1, 'msg': '未找到选中的数据'})
-        
-        success_count = 0
-        failed_count = 0
-        
-        for topic in topics:
-            try:
-                # 获取URL和来源
-                url = topic.url
-                source = topic.source
-                
-                if not url or not source:
-                    failed_count += 1
-                    continue
-                
-                # 查找匹配的采集规则
-                rule = CollectionRule.query.filter_by(site_name=source).first()
-                if not rule:
-                    failed_count += 1
-                    continue
-                
-                # 解析请求头
-                request_headers = {}
-                try:
-                    if rule.request_headers:
-                        # 解析JSON格式的请求头
-                        raw_headers = json.loads(rule.request_headers)
-                        # 清理和验证请求头
-                        for key, value in raw_headers.items():
-                            # 确保键名不包含冒号、空格等非法字符
-                            clean_key = key.strip()
-                            if ':' in clean_key or not clean_key:
-                                continue
-                            request_headers[clean_key] = str(value).strip()
-                except (json.JSONDecodeError, AttributeError):
-                    # 如果解析失败，使用默认请求头
-                    request_headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                    }
-                
-                # 发送请求获取页面内容
-                response = requests.get(url, headers=request_headers, timeout=10)
-                response.encoding = response.apparent_encoding
-                html = response.text
-                
-                # 使用lxml解析HTML
-                tree = etree.HTML(html)
-                
-                # 提取标题
-                title = ''
-                if rule.title_xpath:
-                    title_elements = tree.xpath(rule.title_xpath)
-                    if title_elements:
-                        # 使用text_content()或string()来提取元素及其所有子元素的文本
-                        title = title_elements[0].xpath("string()").strip()
-                
-                # 提取内容
-                content = ''
-                if rule.content_xpath:
-                    content_elements = tree.xpath(rule.content_xpath)
-                    if content_elements:
-                        # 使用string()来提取元素及其所有子元素的文本
-                        content = ' '.join([elem.xpath("string()").strip() for elem in content_elements])
-                
-                # 检查是否已经存在详细内容记录
-                detailed_content = DetailedContent.query.filter_by(warehouse_id=topic.id).first()
-                
-                if not detailed_content:
-                    # 创建新的详细内容记录
-                    detailed_content = DetailedContent(
-                        warehouse_id=topic.id,
-                        detailed_title=title,
-                        detailed_content=content,
-                        raw_html=html,
-                        is_collected=True if (title or content) else False,
-                        collection_error=None
-                    )
-                    db.session.add(detailed_content)
-                else:
-                    # 更新已存在的详细内容记录
-                    detailed_content.detailed_title = title
-                    detailed_content.detailed_content = content
-                    detailed_content.raw_html = html
-                    detailed_content.is_collected = True if (title or content) else False
-                    detailed_content.collection_error = None
-                    detailed_content.collected_at = datetime.now()
-                
-                # 如果提取到内容，则更新数据
-                if title or content:
-                    success_count += 1
-                else:
-                    # 尝试自动更新规则
-                    try:
-                        # 分析页面结构，尝试自动生成新的XPath规则
-                        new_title_xpath, new_content_xpath = auto_update_rules(html, source)
-                        
-                        if new_title_xpath or new_content_xpath:
-                            # 更新规则
-                            if new_title_xpath:
-                                rule.title_xpath = new_title_xpath
-                            if new_content_xpath:
-                                rule.content_xpath = new_content_xpath
-                            rule.updated_at = datetime.now()
-                            
-                            # 使用新规则再次尝试提取
-                            if new_title_xpath:
-                                title_elements = tree.xpath(new_title_xpath)
-                                if title_elements:
-                                    title = title_elements[0].text.strip() if title_elements[0].text else ''
-                            
-                            if new_content_xpath:
-                                content_elements = tree.xpath(new_content_xpath)
-                                if content_elements:
-                                    content = ' '.join([elem.text.strip() for elem in content_elements if elem.text])
-                            
-                            # 更新详细内容记录
-                            detailed_content.detailed_title = title
-                            detailed_content.detailed_content = content
-                            detailed_content.is_collected = True if (title or content) else False
-                            
-                            if title or content:
-                                success_count += 1
-                            else:
-                                detailed_content.is_collected = False
-                                detailed_content.collection_error = '规则已自动更新，但仍未提取到内容'
-                                failed_count += 1
-                        else:
-                            detailed_content.is_collected = False
-                            detailed_content.collection_error = '未提取到标题或内容，且无法自动更新规则'
-                            failed_count += 1
-                    except Exception as auto_update_error:
-                        logging.getLogger(__name__).error(f"自动更新规则失败：{str(auto_update_error)}", exc_info=True)
-                        detailed_content.is_collected = False
-                        detailed_content.collection_error = f'自动更新规则失败：{str(auto_update_error)}'
-                        failed_count += 1
-                    
-            except Exception as e:
-                logging.getLogger(__name__).error(f"批量采集单条数据失败：{str(e)}", exc_info=True)
-                failed_count += 1
-                continue
-        
-        # 提交事务
-        db.session.commit()
-        
-        return jsonify({'code': 0, 'msg': f'批量采集完成，成功{success_count}条，失败{failed_count}条'})
+        # 不论数量多少都在后台作业中并发抓取和提取并按批写库，接口立即返回作业ID，由页面轮询进度、预计剩余时间，
+        # 也可以取消
+        job = get_job_runner().submit('detail', current_user.id, {'ids': ids}, total=len(ids))
+        return jsonify({'code': 0, 'msg': '已提交详细内容采集作业', 'data': format_job(job)})
         
     except Exception as e:
         logging.getLogger(__name__).error(f"批量详细内容采集失败：{str(e)}", exc_info=True)
         return jsonify({'code': 1, 'msg': f'批量采集失败：{str(e)}'})
 
+@main.route('/data/warehouse/frontier/enqueue', methods=['POST'])
+@login_required
+def frontier_enqueue():
+    """将选中的数据（未选择时为全部尚未采集的数据）加入深度采集队列"""
+    try:
+        ids = request.form.getlist('ids[]')
+        priority = request.form.get('priority', 0, type=int)
+        frontier = get_frontier()
+        if ids:
+            added = frontier.enqueue_warehouse(list(map(int, ids)), include_collected=True,
+                                               priority=priority, requeue=True)
+        else:
+            added = frontier.enqueue_warehouse(priority=priority)
+        db.session.commit()
+        return jsonify({'code': 0, 'msg': f'已将{added}条数据加入采集队列', 'data': frontier.stats()})
+    except Exception as e:
+        db.session.rollback()
+        logging.getLogger(__name__).error(f"加入采集队列失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'加入采集队列失败：{str(e)}'})
+
 @main.route('/data/warehouse/ai-analysis', methods=['POST'])
 @login_required
 def ai_analysis():
@@ -1072,14 +1119,299 @@ def ai_analysis():
         if not ids:
             return jsonify({'code': 1, 'msg': '请选择要分析的数据'})
         
-        # 这里将在后期实现AI分析功能
-        # 目前仅返回成功信息
+        # 这里将在后期实现AI分析功能，实现之前不创建后台作业，以免记录为处理了0条的成功作业
+        # 目前仅返回提示信息
         
         return jsonify({'code': 0, 'msg': 'AI分析功能开发中，敬请期待'})
     except Exception as e:
         logging.getLogger(__name__).error(f"AI分析失败：{str(e)}", exc_info=True)
         return jsonify({'code': 1, 'msg': f'分析失败：{str(e)}'})
 
+def format_job(job):
+    """将后台作业转换为接口返回的字典，运行中的作业按已处理的速度估算剩余时间"""
+    processed = (job.done or 0) + (job.failed or 0)
+    eta_seconds = None
+    if job.status == 'running' and job.started_at and processed:
+        elapsed = (datetime.utcnow() - job.started_at).total_seconds()
+        eta_seconds = round(elapsed / processed * max(job.total - processed, 0), 1)
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'total': job.total,
+        'done': job.done,
+        'failed': job.failed,
+        'progress': round(processed * 100 / job.total, 1) if job.total else 100.0,
+        'eta_seconds': eta_seconds,
+        'cancel_requested': job.cancel_requested,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def get_own_job(job_id):
+    """获取当前用户的后台作业，管理员可访问全部作业"""
+    from models import CrawlJob
+    job = CrawlJob.query.get(job_id)
+    if job is None or (job.owner_id != current_user.id and not current_user.is_admin):
+        return None
+    return job
+
+@main.route('/data/jobs', methods=['GET'])
+@login_required
+def list_jobs():
+    """获取当前用户最近的后台作业"""
+    from models import CrawlJob
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        query = CrawlJob.query.filter_by(owner_id=current_user.id)
+        if request.args.get('kind'):
+            query = query.filter_by(kind=request.args['kind'])
+        jobs = query.order_by(CrawlJob.id.desc()).limit(limit).all()
+        return jsonify({'code': 0, 'data': [format_job(job) for job in jobs]})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"获取后台作业失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'获取失败：{str(e)}'})
+
+@main.route('/data/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """获取后台作业进度"""
+    try:
+        job = get_own_job(job_id)
+        if job is None:
+            return jsonify({'code': 1, 'msg': '作业不存在'})
+        return jsonify({'code': 0, 'data': format_job(job)})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"获取后台作业进度失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'获取失败：{str(e)}'})
+
+@main.route('/data/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    """取消后台作业，运行中的作业在处理完当前一批后停止"""
+    try:
+        job = get_own_job(job_id)
+        if job is None:
+            return jsonify({'code': 1, 'msg': '作业不存在'})
+        if not get_job_runner().cancel(job):
+            return jsonify({'code': 1, 'msg': '作业已结束'})
+        return jsonify({'code': 0, 'msg': '已请求取消作业', 'data': format_job(job)})
+    except Exception as e:
+        db.session.rollback()
+        logging.getLogger(__name__).error(f"取消后台作业失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'取消失败：{str(e)}'})
+
+def format_crawl_run(run):
+    """将采集运行记录转换为接口返回的字典"""
+    return {
+        'id': run.id,
+        'trigger': run.trigger,
+        'status': run.status,
+        'started_at': run.started_at.isoformat() if run.started_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'duration_ms': run.duration_ms,
+        'pages': run.pages,
+        'fetched': run.fetched,
+        'saved': run.saved,
+        'duplicates': run.duplicates,
+        'filtered': run.filtered,
+        'error': run.error
+    }
+
+def format_crawl_task(task):
+    """将定时采集任务转换为接口返回的字典"""
+    from models import CrawlRun
+    last_run = task.runs.order_by(CrawlRun.id.desc()).first()
+    return {
+        'id': task.id,
+        'name': task.name,
+        'spider': task.spider,
+        'keyword': task.keyword,
+        'pages': task.pages,
+        'max_results': task.max_results,
+        'interval': task_interval(task),
+        'incremental': task.incremental,
+        'enabled': task.enabled,
+        'next_run_at': task.next_run_at.isoformat() if task.next_run_at else None,
+        'last_run_at': task.last_run_at.isoformat() if task.last_run_at else None,
+        'last_run': format_crawl_run(last_run) if last_run else None
+    }
+
+def get_own_crawl_task(task_id):
+    """获取当前用户的定时采集任务，管理员可访问全部任务"""
+    from models import CrawlTask
+    task = CrawlTask.query.get(task_id)
+    if task is None or (task.owner_id != current_user.id and not current_user.is_admin):
+        return None
+    return task
+
+@main.route('/data/crawl-tasks', methods=['GET'])
+@login_required
+def list_crawl_tasks():
+    """获取定时采集任务列表"""
+    from models import CrawlTask
+    try:
+        tasks = CrawlTask.query.filter_by(owner_id=current_user.id).order_by(CrawlTask.id).all()
+        return jsonify({'code': 0, 'data': [format_crawl_task(task) for task in tasks]})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"获取定时采集任务失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'获取失败：{str(e)}'})
+
+@main.route('/data/crawl-tasks', methods=['POST'])
+@login_required
+def add_crawl_task():
+    """添加定时采集任务，采集结果写入当前用户的临时表"""
+    from models import CrawlTask
+    try:
+        data = request.get_json() or request.form
+        name = (data.get('name') or '').strip()
+        spider_name = data.get('spider') or 'baidu'
+        keyword = (data.get('keyword') or '').strip()
+        
+        spider = get_spider_registry().create(spider_name)
+        if not name:
+            return jsonify({'code': 1, 'msg': '任务名称不能为空'})
+        if spider is None:
+            return jsonify({'code': 1, 'msg': '不支持的爬虫'})
+        if getattr(spider, 'requires_keyword', False) and not keyword:
+            return jsonify({'code': 1, 'msg': '该爬虫需要搜索关键词'})
+        
+        try:
+            pages = int(data.get('pages') or 1)
+            max_results = int(data['max_results']) if data.get('max_results') else None
+            interval = int(data['interval']) if data.get('interval') else None
+        except (TypeError, ValueError):
+            return jsonify({'code': 1, 'msg': '页数、结果数和采集间隔必须为整数'})
+        if not 1 <= pages <= MAX_COLLECTION_PAGES:
+            return jsonify({'code': 1, 'msg': f'页数必须在1到{MAX_COLLECTION_PAGES}之间'})
+        if (max_results is not None and max_results <= 0) or (interval is not None and interval < 60):
+            return jsonify({'code': 1, 'msg': '结果数必须为正数，采集间隔不能小于60秒'})
+        
+        task = CrawlTask(
+            name=name,
+            spider=spider_name,
+            keyword=keyword or None,
+            pages=pages,
+            max_results=max_results,
+            interval=interval,
+            incremental=str(data.get('incremental', True)).lower() not in ['false', '0', 'no'],
+            enabled=True,
+            owner_id=current_user.id,
+            next_run_at=datetime.utcnow()
+        )
+        db.session.add(task)
+        db.session.commit()
+        return jsonify({'code': 0, 'msg': '添加成功', 'data': format_crawl_task(task)})
+    except Exception as e:
+        db.session.rollback()
+        logging.getLogger(__name__).error(f"添加定时采集任务失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'添加失败：{str(e)}'})
+
+@main.route('/data/crawl-tasks/<int:task_id>/toggle', methods=['POST'])
+@login_required
+def toggle_crawl_task(task_id):
+    """启用或停用定时采集任务"""
+    try:
+        task = get_own_crawl_task(task_id)
+        if task is None:
+            return jsonify({'code': 1, 'msg': '任务不存在'})
+        task.enabled = not task.enabled
+        if task.enabled:
+            task.next_run_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'code': 0, 'msg': '已启用' if task.enabled else '已停用', 'data': format_crawl_task(task)})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 1, 'msg': f'操作失败：{str(e)}'})
+
+@main.route('/data/crawl-tasks/<int:task_id>/delete', methods=['POST'])
+@login_required
+def delete_crawl_task(task_id):
+    """删除定时采集任务及其运行记录"""
+    try:
+        task = get_own_crawl_task(task_id)
+        if task is None:
+            return jsonify({'code': 1, 'msg': '任务不存在'})
+        db.session.delete(task)
+        db.session.commit()
+        return jsonify({'code': 0, 'msg': '删除成功'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 1, 'msg': f'删除失败：{str(e)}'})
+
+@main.route('/data/crawl-tasks/<int:task_id>/run', methods=['POST'])
+@login_required
+def run_crawl_task_now(task_id):
+    """立即运行一次定时采集任务，不影响下次定时运行的时间"""
+    try:
+        task = get_own_crawl_task(task_id)
+        if task is None:
+            return jsonify({'code': 1, 'msg': '任务不存在'})
+        if not get_scheduler().dispatch(task.id, trigger='manual'):
+            return jsonify({'code': 1, 'msg': '该任务正在运行'})
+        return jsonify({'code': 0, 'msg': '任务已开始运行'})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"运行定时采集任务失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'运行失败：{str(e)}'})
+
+@main.route('/data/crawl-tasks/<int:task_id>/runs', methods=['GET'])
+@login_required
+def list_crawl_runs(task_id):
+    """获取定时采集任务最近的运行记录"""
+    from models import CrawlRun
+    try:
+        task = get_own_crawl_task(task_id)
+        if task is None:
+            return jsonify({'code': 1, 'msg': '任务不存在'})
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        runs = task.runs.order_by(CrawlRun.id.desc()).limit(limit).all()
+        return jsonify({'code': 0, 'data': [format_crawl_run(run) for run in runs]})
+    except Exception as e:
+        return jsonify({'code': 1, 'msg': f'获取失败：{str(e)}'})
+
+@main.route('/admin/crawl-metrics')
+@login_required
+@admin_required
+def crawl_metrics():
+    """采集网络层运行指标"""
+    try:
+        metrics = {
+            'http_pool': get_http_pool().stats(),
+            'crawl_engine': get_crawl_engine().stats(),
+            'rate_limiter': get_rate_limiter().stats(),
+            'retry': get_retry_policy().stats(),
+            'http_cache': get_http_cache().stats(),
+            'list_cache': get_list_cache().stats(),
+            'encoding': get_encoding_resolver().stats(),
+            'redirects': get_redirect_resolver().stats(),
+            'thumbnails': get_thumbnail_store().stats(),
+            'xpath': get_xpath_cache().stats(),
+            'rule_index': get_rule_index().stats(),
+            'frontier': get_frontier().stats(),
+            'http_archive': get_http_archive().stats(),
+            'scheduler': get_scheduler().stats(),
+            'jobs': get_job_runner().stats(),
+            'fetch_timing': get_fetch_metrics().stats(recent=request.args.get('recent', 20, type=int))
+        }
+        return jsonify({'code': 0, 'data': metrics})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"获取采集指标失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'获取指标失败：{str(e)}'})
+
+@main.route('/admin/crawl-engine/cancel', methods=['POST'])
+@login_required
+@admin_required
+def cancel_crawl_tasks():
+    """取消采集引擎中所有未完成的任务"""
+    try:
+        cancelled = get_crawl_engine().cancel_all()
+        return jsonify({'code': 0, 'msg': f'已取消{cancelled}个采集任务'})
+    except Exception as e:
+        logging.getLogger(__name__).error(f"取消采集任务失败：{str(e)}", exc_info=True)
+        return jsonify({'code': 1, 'msg': f'取消失败：{str(e)}'})
+
 
 # 缓存app_name，避免每次请求都查询数据库
 APP_NAME_CACHE = None
@@ -1310,6 +1642,11 @@ def add_collection_rule():
         if not all([site_name, site_url, title_xpath, content_xpath]):
             return jsonify({'code': 1, 'msg': '站点名称、URL、标题XPath和内容XPath不能为空'})
         
+        try:
+            rate_limit_rps, max_concurrency = parse_rule_limits(data)
+        except ValueError:
+            return jsonify({'code': 1, 'msg': '限速和并发数必须为正数'})
+        
         # 转换headers为JSON字符串
         headers_json = json.dumps(headers)
         
@@ -1320,11 +1657,15 @@ def add_collection_rule():
             title_xpath=title_xpath,
             content_xpath=content_xpath,
             request_headers=headers_json,
+            rate_limit_rps=rate_limit_rps,
+            max_concurrency=max_concurrency,
             created_by=current_user.id
         )
         
         db.session.add(rule)
+        bump_rule_version()
         db.session.commit()
+        load_rule_overrides(force=True)
         
         return jsonify({'code': 0, 'msg': '规则添加成功'})
     except Exception as e:
@@ -1363,14 +1704,23 @@ def update_collection_rule(rule_id):
         except json.JSONDecodeError:
             return jsonify({'code': 1, 'msg': 'Request Headers格式错误，请使用有效的JSON格式'})
         
+        try:
+            rate_limit_rps, max_concurrency = parse_rule_limits(request.form)
+        except ValueError:
+            return jsonify({'code': 1, 'msg': '限速和并发数必须为正数'})
+        
         # 更新规则
         rule.site_name = site_name
         rule.site_url = site_url
         rule.title_xpath = title_xpath
         rule.content_xpath = content_xpath
         rule.request_headers = headers_json
+        rule.rate_limit_rps = rate_limit_rps
+        rule.max_concurrency = max_concurrency
+        bump_rule_version()
         
         db.session.commit()
+        load_rule_overrides(force=True)
         
         return jsonify({'code': 0, 'msg': '规则更新成功'})
     except Exception as e:
@@ -1392,7 +1742,9 @@ def delete_collection_rule(rule_id):
         
         # 删除规则
         db.session.delete(rule)
+        bump_rule_version()
         db.session.commit()
+        load_rule_overrides(force=True)
         
         return jsonify({'code': 0, 'msg': '规则删除成功'})
     except Exception as e:
@@ -1420,7 +1772,9 @@ def get_collection_rule(rule_id):
             'site_url': rule.site_url,
             'title_xpath': rule.title_xpath,
             'content_xpath': rule.content_xpath,
-            'request_headers': json.loads(rule.request_headers) if rule.request_headers else {}
+            'request_headers': json.loads(rule.request_headers) if rule.request_headers else {},
+            'rate_limit_rps': rule.rate_limit_rps,
+            'max_concurrency': rule.max_concurrency
         }
         
         return jsonify({'code': 0, 'data': rule_data})